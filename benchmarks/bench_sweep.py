@@ -0,0 +1,278 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+import numpy as np
+import scipy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clases import profiling
+from clases.sweep_engine import SweepRunner, agrupar_subcarpetas, OPCIONES_DEFECTO
+from clases.equation_cache import CACHE
+from clases.equation_compiler import compilar_ecuaciones
+
+# Banco de pruebas del barrido completo (info.txt -> SweepRunner -> log):
+# sistemas de Lorenz, Rössler y Chen acoplados en x (a*(x1 - x2) en dx2/dt)
+# con las tres restas x, y, z, para varios tamaños de rejilla de 'a' y
+# varias configuraciones del motor. Por cada caso mide:
+#   - a_por_s: valores de 'a' integrados por segundo (tiempo de pared),
+#   - etapas: tiempo por etapa (lectura, compilación, integración,
+#     extracción del error, escritura), ver clases/profiling.py,
+#   - memoria: maxrss del proceso principal y, con --tracemalloc, el pico
+#     de memoria reservada por Python y NumPy durante el caso (tracemalloc
+#     frena bastante la integración, así que no se activa por defecto),
+#   - desviación respecto de referencia.json: máxima diferencia de la
+#     métrica por 'a' (media de max_value), absoluta y en décadas.
+# Antes de los casos se comprueba que el lado derecho compilado (ver
+# clases/equation_compiler.py) no es más lento por llamada escalar que el
+# sistema_dinamico de exec: es lo que llama solve_ivp en cada paso, así
+# que cualquier sobrecoste se multiplica en todo el barrido.
+# La salida es JSON lines (un caso por línea) para comparar motores y
+# seguir regresiones; la tabla legible va a stderr.
+#
+#   python benchmarks/bench_sweep.py --n-a 8 32 --configs solve_ivp ensemble -o res.jsonl
+#   python benchmarks/bench_sweep.py --guardar-referencia
+
+REFERENCIA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "referencia.json")
+
+INIT = (1.0, 1.0, 1.0, -1.0, 2.0, 3.0)
+RESTAS = ("x1 - x2", "y1 - y2", "z1 - z2")
+
+SISTEMAS = {
+    "lorenz": {
+        "ecuaciones": ["10*(y1 - x1)", "x1*(28 - z1) - y1", "x1*y1 - 8/3*z1",
+                       "10*(y2 - x2) + a*(x1 - x2)", "x2*(28 - z2) - y2", "x2*y2 - 8/3*z2"],
+        "a": (0.0, 16.0),
+    },
+    "rossler": {
+        "ecuaciones": ["-y1 - z1", "x1 + 0.2*y1", "0.2 + z1*(x1 - 5.7)",
+                       "-y2 - z2 + a*(x1 - x2)", "x2 + 0.2*y2", "0.2 + z2*(x2 - 5.7)"],
+        "a": (0.0, 1.0),
+    },
+    "chen": {
+        "ecuaciones": ["35*(y1 - x1)", "(28 - 35)*x1 - x1*z1 + 28*y1", "x1*y1 - 3*z1",
+                       "35*(y2 - x2) + a*(x1 - x2)", "(28 - 35)*x2 - x2*z2 + 28*y2", "x2*y2 - 3*z2"],
+        "a": (0.0, 40.0),
+    },
+}
+
+# Máximo cociente de tiempo por llamada (n,) compilado / exec
+MAX_SOBRECOSTE_RHS = 1.5
+
+CONFIGS = {
+    "solve_ivp": {},
+    "ensemble": {"engine": "ensemble"},
+    "ensemble_rk4": {"engine": "ensemble", "ensemble_method": "rk4"},
+    "parada": {"parada_temprana": True},
+    "interp": {"error_mode": "interp"},
+    "npy": {"formato": "npy"},
+}
+
+
+def eq_code(ecuaciones):
+    return ("def sistema_dinamico(t, variables, a):\n"
+            "    x1, y1, z1, x2, y2, z2 = variables\n"
+            "    return [" + ", ".join(ecuaciones) + "]")
+
+
+def crear_restas(base, sistema, n_a):
+    a_start, a_stop = SISTEMAS[sistema]["a"]
+    a_step = (a_stop - a_start) / n_a
+    codigo = eq_code(SISTEMAS[sistema]["ecuaciones"])
+    subfolders = []
+    for resta in RESTAS:
+        nombre = resta.replace(" ", "")
+        subdir = os.path.join(base, nombre)
+        os.makedirs(subdir)
+        with open(os.path.join(subdir, "info.txt"), "w", encoding="utf-8") as f:
+            f.write(f"Resta: {resta}\n")
+            f.write(f"a_start = {a_start}\n")
+            f.write(f"a_stop = {a_stop}\n")
+            f.write(f"a_step = {a_step}\n\n")
+            f.write("Ecuaciones:\n")
+            f.write(codigo + "\n\n")
+            f.write("CondicionesIniciales:\n")
+            for var, valor in zip(["x1", "y1", "z1", "x2", "y2", "z2"], INIT):
+                f.write(f"{var} = {valor}\n")
+        subfolders.append(nombre)
+    return subfolders
+
+
+def sobrecoste_rhs(sistema, llamadas=20000, repeticiones=5):
+    """
+    Cociente entre el tiempo por llamada con variables (n,) del lado
+    derecho compilado y el del sistema_dinamico de exec (mejor de
+    varias repeticiones).
+    """
+    codigo = eq_code(SISTEMAS[sistema]["ecuaciones"])
+    local_vars = {}
+    exec(codigo, {"np": np}, local_vars)
+    original = local_vars["sistema_dinamico"]
+    compilado = compilar_ecuaciones(codigo)
+    y = np.array(INIT)
+    # solve_ivp convierte la salida con np.asarray en cada llamada
+    t_original = min(timeit.repeat(lambda: np.asarray(original(0.0, y, 1.0)),
+                                   number=llamadas, repeat=repeticiones))
+    t_compilado = min(timeit.repeat(lambda: np.asarray(compilado(0.0, y, 1.0)),
+                                    number=llamadas, repeat=repeticiones))
+    return t_compilado / t_original
+
+
+def metricas_resultado(base, subfolders, formato):
+    """
+    {resta: {k: media de max_value}} de lo que dejó el barrido.
+    """
+    grupos, _ = agrupar_subcarpetas(base, subfolders, formato)
+    return {t.resta_name: {str(k): v for k, v in sorted(t.metricas().items())}
+            for g in grupos for t in g.tareas}
+
+
+def desviacion(metricas, referencia, piso):
+    if not referencia:
+        return None
+    d_abs, d_dec, n = 0.0, 0.0, 0
+    for resta, ref in referencia.items():
+        for k, m_ref in ref.items():
+            m = metricas.get(resta, {}).get(k)
+            if m is None:
+                continue
+            n += 1
+            d_abs = max(d_abs, abs(m - m_ref))
+            d_dec = max(d_dec, abs(np.log10(max(m, piso)) - np.log10(max(m_ref, piso))))
+    return {"abs": d_abs, "decadas": d_dec, "a_comparados": n}
+
+
+def ejecutar_caso(sistema, n_a, config, workers, referencia, medir_memoria=False):
+    opciones = dict(CONFIGS[config])
+    base = tempfile.mkdtemp(prefix=f"bench_{sistema}_{n_a}_")
+    try:
+        subfolders = crear_restas(base, sistema, n_a)
+        runner = SweepRunner(base, subfolders, on_progress=None, workers=workers,
+                             opciones=opciones)
+        # Cada caso compila desde cero, como un barrido nuevo
+        CACHE.limpiar()
+        tiempos = profiling.activar()
+        if medir_memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        try:
+            runner.run()
+        finally:
+            total = time.perf_counter() - inicio
+            pico = None
+            if medir_memoria:
+                _, pico = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            profiling.desactivar()
+        errores = runner.errores
+
+        formato = opciones.get("formato", OPCIONES_DEFECTO["formato"])
+        metricas = metricas_resultado(base, subfolders, formato)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    ref = (referencia or {}).get(sistema, {}).get(str(n_a))
+    return {
+        "sistema": sistema,
+        "n_a": n_a,
+        "config": config,
+        "opciones": opciones,
+        "workers": workers,
+        "segundos": total,
+        "a_por_s": n_a / total if total > 0 else None,
+        "etapas": tiempos.como_dict(),
+        "memoria_pico_mb": pico / 2**20 if pico is not None else None,
+        "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "errores": len(errores),
+        "desviacion": desviacion(metricas, ref, OPCIONES_DEFECTO["sync_tol"]),
+        "metricas": metricas,
+    }
+
+
+def entorno():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def linea_resumen(r):
+    etapas = " ".join(f"{nombre}={datos['segundos']:.2f}s"
+                      for nombre, datos in sorted(r["etapas"].items()))
+    dev = r["desviacion"]
+    dev_txt = f"dev={dev['abs']:.3g} ({dev['decadas']:.2f} déc.)" if dev else "dev=-"
+    memoria = r["memoria_pico_mb"] if r["memoria_pico_mb"] is not None else r["maxrss_mb"]
+    return (f"{r['sistema']:8s} n_a={r['n_a']:<4d} {r['config']:13s} "
+            f"{r['a_por_s']:7.2f} a/s  {memoria:7.1f} MB  {dev_txt}  {etapas}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Banco de pruebas del barrido de 'a'.")
+    parser.add_argument("--sistemas", nargs="+", choices=sorted(SISTEMAS), default=sorted(SISTEMAS))
+    parser.add_argument("--n-a", nargs="+", type=int, default=[8],
+                        help="número de valores de 'a' de cada rejilla")
+    parser.add_argument("--configs", nargs="+", choices=sorted(CONFIGS), default=["solve_ivp"])
+    parser.add_argument("-w", "--workers", type=int, default=1)
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="medir el pico de memoria de Python/NumPy (más lento)")
+    parser.add_argument("-o", "--salida", help="archivo JSON lines (por defecto, stdout)")
+    parser.add_argument("--guardar-referencia", action="store_true",
+                        help="guardar las métricas de la configuración solve_ivp en referencia.json")
+    args = parser.parse_args(argv)
+
+    referencia = {}
+    if os.path.exists(REFERENCIA):
+        with open(REFERENCIA, "r", encoding="utf-8") as f:
+            referencia = json.load(f)
+    if args.guardar_referencia:
+        args.configs = ["solve_ivp"]
+
+    for sistema in args.sistemas:
+        cociente = sobrecoste_rhs(sistema)
+        print(f"{sistema:8s} rhs compilado/exec = {cociente:.2f}", file=sys.stderr)
+        assert cociente <= MAX_SOBRECOSTE_RHS, (
+            f"El lado derecho compilado de {sistema} es {cociente:.2f} veces más lento "
+            f"por llamada que sistema_dinamico (máximo {MAX_SOBRECOSTE_RHS})")
+
+    info_entorno = entorno()
+    salida = open(args.salida, "a", encoding="utf-8") if args.salida else sys.stdout
+    try:
+        for sistema in args.sistemas:
+            for n_a in args.n_a:
+                for config in args.configs:
+                    r = ejecutar_caso(sistema, n_a, config, args.workers,
+                                      None if args.guardar_referencia else referencia,
+                                      args.tracemalloc)
+                    print(linea_resumen(r), file=sys.stderr, flush=True)
+                    if args.guardar_referencia:
+                        referencia.setdefault(sistema, {})[str(n_a)] = r["metricas"]
+                    r["entorno"] = info_entorno
+                    del r["metricas"]
+                    salida.write(json.dumps(r) + "\n")
+                    salida.flush()
+    finally:
+        if args.salida:
+            salida.close()
+
+    if args.guardar_referencia:
+        with open(REFERENCIA, "w", encoding="utf-8") as f:
+            json.dump(referencia, f, indent=1)
+        print(f"Referencia guardada en {REFERENCIA}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Barrido adaptativo de 'a': en lugar de integrar toda la rejilla uniforme
+# a_start + k*a_step, se empieza por unos pocos índices k repartidos por el
+# rango y se van bisecando sólo los intervalos donde la métrica de error
+# (media de los máximos por ventana) cambia bruscamente, hasta llegar a la
+# resolución pedida. Al trabajar sobre índices de la rejilla original, los
+# 'a' evaluados son los mismos que en un barrido uniforme y el log.csv
+# conserva su formato (aunque sus filas ya no van ordenadas por 'a').
+
+
+def indice_de_a(a_val, a_start, a_step):
+    return int(round((a_val - a_start) / a_step))
+
+
+def indices_iniciales(n, puntos, paso_min=1):
+    """
+    Índices de la rejilla gruesa inicial: puntos índices equiespaciados en
+    [0, n-1], sin bajar de paso_min entre ellos.
+    """
+    if n <= 0:
+        return []
+    puntos = max(2, min(puntos, (n - 1) // max(1, paso_min) + 1))
+    return sorted(set(np.round(np.linspace(0, n - 1, puntos)).astype(int).tolist()))
+
+
+def salto(m_i, m_j, piso):
+    """
+    Cambio de la métrica entre dos 'a' vecinos, en décadas: el error pasa
+    de O(1) a casi cero en la transición, así que se compara en log10.
+    """
+    return np.abs(np.log10(np.maximum(m_i, piso)) - np.log10(np.maximum(m_j, piso)))
+
+
+def indices_a_refinar(metricas, umbral, paso_min=1, piso=1e-12):
+    """
+    metricas: dict k -> array (P,) con la métrica de cada resta.
+    Devuelve los índices medios de los intervalos [k_i, k_j] consecutivos
+    con k_j - k_i > paso_min en los que alguna resta salta más de umbral
+    décadas (o alguna métrica no es finita).
+    """
+    ks = sorted(metricas)
+    nuevos = []
+    for k_i, k_j in zip(ks[:-1], ks[1:]):
+        if k_j - k_i <= paso_min:
+            continue
+        m_i, m_j = metricas[k_i], metricas[k_j]
+        finitas = np.all(np.isfinite(m_i)) and np.all(np.isfinite(m_j))
+        if not finitas or np.any(salto(m_i, m_j, piso) > umbral):
+            nuevos.append((k_i + k_j) // 2)
+    return nuevos
+
+
+def estimar_critico(grid, metricas, p, umbral_sync):
+    """
+    Acoplamiento crítico de la resta p: primer intervalo [a_i, a_j] de los
+    'a' evaluados en el que la métrica pasa de >= umbral_sync a < umbral_sync.
+    Devuelve un dict con la estimación (punto medio) y el intervalo, o None
+    si no hay transición.
+    """
+    ks = sorted(metricas)
+    for k_i, k_j in zip(ks[:-1], ks[1:]):
+        m_i, m_j = metricas[k_i][p], metricas[k_j][p]
+        if m_i >= umbral_sync and m_j < umbral_sync:
+            a_i, a_j = float(grid[k_i]), float(grid[k_j])
+            return {"a_critico": (a_i + a_j) / 2, "intervalo": [a_i, a_j]}
+    return None
+
+
+def metricas_guardadas(log_path, a_start, a_step):
+    """
+    Lee un log.csv y devuelve dict k -> métrica (media de max_value por 'a').
+    """
+    if not os.path.exists(log_path):
+        return {}
+    df = pd.read_csv(log_path)
+    if df.empty:
+        return {}
+    medias = df.groupby('a')['max_value'].mean()
+    return {indice_de_a(a, a_start, a_step): float(m) for a, m in medias.items()}
+
+
+def guardar_critico(path, critico, evaluados, opciones):
+    datos = {
+        "a_critico": critico["a_critico"] if critico else None,
+        "intervalo": critico["intervalo"] if critico else None,
+        "a_evaluados": evaluados,
+        "umbral_sync": opciones["adapt_sync"],
+        "umbral_salto": opciones["adapt_umbral"],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=4)
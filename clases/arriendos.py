@@ -0,0 +1,202 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+# Reparto de una carpeta de restas entre varios procesos (en uno o varios
+# equipos que la comparten por red) sin ningún servicio externo, sólo con
+# operaciones de archivo atómicas:
+#
+#   - Un proceso trabaja en una subcarpeta sólo si tiene su arriendo: el
+#     archivo .arriendo creado con O_CREAT | O_EXCL (falla si ya existe),
+#     con el propietario (equipo:pid:id) y la fecha.
+#   - Mientras trabaja, un hilo renueva cada "latido" segundos la fecha de
+#     modificación de sus arriendos (os.utime) y comprueba que siguen
+#     siendo suyos.
+#   - Un arriendo sin renovar durante "duracion" segundos se considera
+#     abandonado (proceso caído): otro proceso lo aparta con os.rename
+#     (sólo uno de los que lo intenten a la vez lo consigue) y crea el suyo.
+#     Si al apartarlo resulta que ya no era el caducado, lo devuelve.
+#   - Un proceso cuyo arriendo ha pasado a otro (se quedó colgado más de
+#     "duracion") se entera en el siguiente latido y debe dejar de escribir.
+#
+# Lo ya escrito queda en el diario de cada subcarpeta (checkpoint.py), así
+# que quien recoge un arriendo caducado reanuda donde lo dejó el anterior.
+# Se supone que los relojes de los equipos están sincronizados (NTP): la
+# caducidad compara la fecha del archivo con la hora local, así que
+# "duracion" debe ser mucho mayor que el desfase posible.
+
+NOMBRE = ".arriendo"
+DURACION = 120.0
+LATIDO = 20.0
+
+
+def identidad():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def ruta(subdir):
+    return os.path.join(subdir, NOMBRE)
+
+
+def leer(path):
+    """
+    Contenido de un arriendo (dict) o None si no existe o está a medio
+    escribir.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def caducado(path, duracion=DURACION):
+    try:
+        return time.time() - os.path.getmtime(path) > duracion
+    except FileNotFoundError:
+        return False
+
+
+class GestorArriendos:
+    """
+    Arriendos de un proceso sobre las subcarpetas de base_folder.
+    on_perdido(subcarpeta) se llama (desde el hilo de latidos) si un
+    arriendo deja de ser nuestro.
+    """
+    def __init__(self, base_folder, duracion=DURACION, latido=LATIDO, propietario=None,
+                 on_perdido=None):
+        self.base_folder = base_folder
+        self.duracion = duracion
+        self.latido = latido
+        self.propietario = propietario or identidad()
+        self.on_perdido = on_perdido
+        self.propios = set()
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._hilo = None
+
+    def _ruta(self, subfolder):
+        return ruta(os.path.join(self.base_folder, subfolder))
+
+    def _crear(self, path):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"propietario": self.propietario, "desde": time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+
+    def _apartar_caducado(self, path):
+        """
+        Aparta un arriendo caducado. Devuelve True si lo ha quitado.
+        """
+        visto = leer(path)
+        apartado = f"{path}.caducado.{uuid.uuid4().hex[:8]}"
+        try:
+            os.rename(path, apartado)
+        except FileNotFoundError:
+            return False
+        if leer(apartado) != visto or not caducado(apartado, self.duracion):
+            # Otro proceso lo renovó o lo recogió entre medias: se devuelve
+            # (os.link no pisa un arriendo creado mientras tanto)
+            try:
+                os.link(apartado, path)
+            except OSError:
+                pass
+            os.remove(apartado)
+            return False
+        os.remove(apartado)
+        return True
+
+    def reclamar(self, subfolder):
+        """
+        Intenta tomar el arriendo de subfolder; True si ahora es nuestro.
+        """
+        path = self._ruta(subfolder)
+        if self._crear(path) or (caducado(path, self.duracion) and self._apartar_caducado(path)
+                                 and self._crear(path)):
+            with self._lock:
+                self.propios.add(subfolder)
+            return True
+        return False
+
+    def reclamar_todas(self, subfolders):
+        """
+        Toma los arriendos de todas las subcarpetas o de ninguna.
+        """
+        tomadas = []
+        for subfolder in subfolders:
+            if not self.reclamar(subfolder):
+                for s in tomadas:
+                    self.liberar(s)
+                return False
+            tomadas.append(subfolder)
+        return True
+
+    def ocupada(self, subfolder):
+        """
+        True si otro proceso tiene un arriendo vigente sobre subfolder.
+        """
+        path = self._ruta(subfolder)
+        return os.path.exists(path) and not caducado(path, self.duracion) \
+            and subfolder not in self.propios
+
+    def liberar(self, subfolder):
+        path = self._ruta(subfolder)
+        with self._lock:
+            self.propios.discard(subfolder)
+        datos = leer(path)
+        if datos is not None and datos.get("propietario") == self.propietario:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def liberar_todas(self):
+        for subfolder in list(self.propios):
+            self.liberar(subfolder)
+
+    def renovar(self):
+        """
+        Renueva los arriendos propios y devuelve los que se han perdido.
+        """
+        perdidos = []
+        with self._lock:
+            propios = list(self.propios)
+        for subfolder in propios:
+            path = self._ruta(subfolder)
+            datos = leer(path)
+            if datos is None or datos.get("propietario") != self.propietario:
+                perdidos.append(subfolder)
+                continue
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                perdidos.append(subfolder)
+        with self._lock:
+            self.propios.difference_update(perdidos)
+        return perdidos
+
+    def _latir(self):
+        while not self._parar.wait(self.latido):
+            for subfolder in self.renovar():
+                if self.on_perdido:
+                    self.on_perdido(subfolder)
+
+    def iniciar(self):
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._latir, name="arriendos", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._parar.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+        self.liberar_todas()
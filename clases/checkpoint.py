@@ -0,0 +1,264 @@
+import os
+import numpy as np
+
+from clases.adaptive_sweep import indice_de_a
+
+# Escritura incremental y a prueba de cortes de los resultados de un barrido.
+#
+# Las filas de cada 'a' se añaden a log.csv (y eventos.csv) en cuanto se
+# calculan, con flush + fsync. Después se apunta ese 'a' en un diario,
+# completados.csv, junto con el tamaño en bytes que tenían log.csv y
+# eventos.csv tras escribirlo:
+#
+#     k,a,log_bytes,eventos_bytes
+#
+# donde k es el índice de 'a' en la rejilla a_start + k*a_step. Un 'a' sólo
+# cuenta como hecho si está en el diario. Al reanudar se descartan la línea
+# final incompleta del diario y todo lo que log.csv y eventos.csv tengan más
+# allá del último 'a' apuntado (un bloque a medio escribir), y se retoma
+# exactamente el conjunto de índices pendientes, sin depender de max(a).
+#
+# Los log.csv antiguos, sin diario, se aceptan tal cual (se escribían
+# enteros al final) y se genera su diario a partir de los 'a' que contienen.
+#
+# Con el almacén binario (result_store.py) las filas van a resultados.npy en
+# lugar de log.csv y el diario es completados_npy.csv (log_bytes = 0).
+
+CABECERA_LOG = "a,max_value\n"
+CABECERA_EVENTOS = "a,estado,t_evento\n"
+CABECERA_DIARIO = "k,a,log_bytes,eventos_bytes\n"
+
+
+def ruta_diario(subdir, sufijo="", formato="csv"):
+    if formato == "npy":
+        return os.path.join(subdir, f"completados_npy{sufijo}.csv")
+    return os.path.join(subdir, f"completados{sufijo}.csv")
+
+
+def _formato(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, str):
+        return valor
+    return repr(float(valor))
+
+
+def leer_lineas_completas(path):
+    """
+    Devuelve (lineas, n_bytes): las líneas terminadas en salto de línea de
+    path y cuántos bytes ocupan. Una última línea sin terminar (escritura
+    interrumpida) se ignora.
+    """
+    if not os.path.exists(path):
+        return [], 0
+    with open(path, "rb") as f:
+        datos = f.read()
+    fin = datos.rfind(b"\n") + 1
+    return datos[:fin].decode("utf-8").splitlines(), fin
+
+
+def completados(diario):
+    """
+    Índices k apuntados en el diario, sin reparar nada (sólo lectura, p. ej.
+    para contar lo pendiente antes de empezar).
+    """
+    lineas, _ = leer_lineas_completas(diario)
+    indices = set()
+    for linea in lineas[1:]:
+        try:
+            indices.add(int(linea.split(",")[0]))
+        except ValueError:
+            break
+    return indices
+
+
+def _truncar(path, n_bytes):
+    if os.path.exists(path) and os.path.getsize(path) > n_bytes:
+        with open(path, "r+b") as f:
+            f.truncate(n_bytes)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def sincronizar(f):
+    """
+    flush + fsync: lo escrito en f queda en disco antes de seguir.
+    """
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def anexar_lineas(path, lineas, cabecera=""):
+    """
+    Añade (con fsync) lineas, ya terminadas en salto de línea, a un archivo
+    auxiliar con una línea por 'a' (cuenca.csv, metodos.csv,
+    estadisticas.jsonl). Estos archivos se escriben antes de apuntar el 'a'
+    en el diario, así que al reanudar puede repetirse un 'a' (vale la
+    última línea). Si un corte dejó una última línea sin terminar, se
+    descarta antes de escribir: si no, la primera línea nueva quedaría
+    pegada a ella y se perdería al leer. cabecera se escribe si el archivo
+    está vacío.
+    """
+    if not lineas:
+        return
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            terminado = f.read(1) == b"\n"
+        if not terminado:
+            _truncar(path, leer_lineas_completas(path)[1])
+    with open(path, "ab") as f:
+        if f.tell() == 0 and cabecera:
+            f.write(cabecera.encode("utf-8"))
+        f.write("".join(lineas).encode("utf-8"))
+        sincronizar(f)
+
+
+def reparar(diario, log_path, eventos_path, a_start, a_step):
+    """
+    Deja log.csv, eventos.csv y el diario en un estado consistente tras un
+    posible corte y devuelve el conjunto de índices k ya completados.
+    log_path es None con el almacén binario.
+    """
+    if not os.path.exists(diario):
+        if log_path is None:
+            return set()
+        return _diario_desde_log(log_path, eventos_path, diario, a_start, a_step)
+
+    lineas, _ = leer_lineas_completas(diario)
+    log_size = os.path.getsize(log_path) if log_path and os.path.exists(log_path) else 0
+    ev_size = os.path.getsize(eventos_path) if os.path.exists(eventos_path) else 0
+
+    completados = set()
+    log_bytes, ev_bytes = 0, 0
+    validas = 0
+    for linea in lineas[1:]:
+        try:
+            k, _, lb, eb = linea.split(",")
+            k, lb, eb = int(k), int(lb), int(eb)
+        except ValueError:
+            break
+        # Entradas que apuntan más allá de los datos no se pueden fiar
+        if lb > log_size or eb > ev_size:
+            break
+        completados.add(k)
+        log_bytes, ev_bytes = lb, eb
+        validas += 1
+
+    if validas == 0:
+        # También cubre una cabecera a medio escribir
+        with open(diario, "wb") as f:
+            f.write(CABECERA_DIARIO.encode("utf-8"))
+            sincronizar(f)
+    else:
+        _truncar(diario, sum(len(l.encode("utf-8")) + 1 for l in lineas[:validas + 1]))
+    if log_path is not None:
+        _truncar(log_path, log_bytes)
+    _truncar(eventos_path, ev_bytes)
+    return completados
+
+
+def ordenar_log(log_path):
+    """
+    Reescribe log_path con las filas ordenadas por 'a' si no lo estaban
+    (orden estable: las ventanas de cada 'a' siguen igual) y devuelve si
+    hubo que hacerlo. Se escribe aparte y se sustituye con os.replace; el
+    archivo ocupa los mismos bytes, así que el diario sigue siendo válido.
+    Sólo para un log.csv sin bloques a medio escribir (tras reparar o
+    anexar).
+    """
+    lineas, n_bytes = leer_lineas_completas(log_path)
+    if len(lineas) < 3 or n_bytes != os.path.getsize(log_path):
+        return False
+    try:
+        claves = [float(linea.split(",", 1)[0]) for linea in lineas[1:]]
+    except ValueError:
+        return False
+    if all(a <= b for a, b in zip(claves, claves[1:])):
+        return False
+    orden = sorted(range(len(claves)), key=claves.__getitem__)
+    temporal = log_path + ".tmp"
+    with open(temporal, "wb") as f:
+        f.write("".join(l + "\n" for l in [lineas[0]] + [lineas[1 + i] for i in orden])
+                .encode("utf-8"))
+        sincronizar(f)
+    os.replace(temporal, log_path)
+    return True
+
+
+def _diario_desde_log(log_path, eventos_path, diario, a_start, a_step):
+    lineas, n_bytes = leer_lineas_completas(log_path)
+    completados = []
+    for linea in lineas[1:]:
+        try:
+            a_val = float(linea.split(",")[0])
+        except ValueError:
+            continue
+        k = indice_de_a(a_val, a_start, a_step)
+        if k not in completados:
+            completados.append(k)
+    _truncar(log_path, n_bytes)
+    _, ev_bytes = leer_lineas_completas(eventos_path)
+    _truncar(eventos_path, ev_bytes)
+
+    with open(diario, "w", encoding="utf-8", newline="") as f:
+        f.write(CABECERA_DIARIO)
+        for k in completados:
+            f.write(f"{k},{_formato(a_start + k * a_step)},{n_bytes},{ev_bytes}\n")
+        sincronizar(f)
+    return set(completados)
+
+
+def _abrir_para_anexar(path, cabecera):
+    # En binario, para que tell() dé la posición en bytes
+    f = open(path, "ab")
+    if f.tell() == 0:
+        f.write(cabecera.encode("utf-8"))
+    return f
+
+
+def anexar(diario, log_path, eventos_path, bloques, a_start, a_step, almacen=None):
+    """
+    Añade los resultados de varios 'a' y los apunta en el diario.
+    bloques: lista de (a_val, maximos, eventos), con maximos el array de
+    máximos por ventana (los NaN no se escriben en log.csv) y eventos una
+    lista de (estado, t_evento) (puede ir vacía). Con almacen (un
+    result_store.AlmacenResultados) las filas van ahí y no a log_path.
+    Devuelve los índices k escritos.
+    """
+    if not bloques:
+        return []
+    entradas = []
+    f_log = _abrir_para_anexar(log_path, CABECERA_LOG) if almacen is None else None
+    f_ev = None
+    try:
+        if any(eventos for _, _, eventos in bloques) or os.path.exists(eventos_path):
+            f_ev = _abrir_para_anexar(eventos_path, CABECERA_EVENTOS)
+        for a_val, maximos, eventos in bloques:
+            a_txt = _formato(a_val)
+            if f_log is not None:
+                f_log.write("".join(f"{a_txt},{_formato(v)}\n" for v in maximos
+                                    if not np.isnan(v)).encode("utf-8"))
+            else:
+                almacen.escribir(a_val, maximos)
+            for estado, t_evento in eventos:
+                f_ev.write(f"{a_txt},{estado},{_formato(t_evento)}\n".encode("utf-8"))
+            entradas.append((indice_de_a(a_val, a_start, a_step), a_txt,
+                             f_log.tell() if f_log else 0, f_ev.tell() if f_ev else 0))
+        # Los datos tienen que estar en disco antes de apuntarlos
+        if f_log is not None:
+            sincronizar(f_log)
+        else:
+            almacen.flush()
+        if f_ev:
+            sincronizar(f_ev)
+    finally:
+        if f_log is not None:
+            f_log.close()
+        if f_ev:
+            f_ev.close()
+
+    with _abrir_para_anexar(diario, CABECERA_DIARIO) as f:
+        f.write("".join(f"{k},{a_txt},{lb},{eb}\n" for k, a_txt, lb, eb in entradas).encode("utf-8"))
+        sincronizar(f)
+    return [e[0] for e in entradas]
@@ -0,0 +1,63 @@
+import json
+import os
+import numpy as np
+
+from clases import adaptive_sweep
+
+# Barridos por continuación: el estado final de la integración en a_k se usa
+# como condición inicial en a_{k+1}, con un transitorio más corto. El barrido
+# inverso (de a_stop hacia a_start) sigue la otra rama; si ambas ramas no
+# coinciden en algún 'a' hay histéresis (multiestabilidad) en la transición.
+#
+# Archivos por subcarpeta:
+#   continuacion.json / continuacion_reverso.json: último 'a' y su estado
+#       final, para reanudar la cadena sin volver al transitorio completo.
+#   log_reverso.csv / eventos_reverso.csv: resultados del barrido inverso.
+#   histeresis.json: 'a' en los que las dos ramas difieren.
+
+SUFIJO_REVERSO = "_reverso"
+
+
+def ruta_estado(subdir, sufijo=""):
+    return os.path.join(subdir, f"continuacion{sufijo}.json")
+
+
+def guardar_estado(path, a_val, estado):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"a": float(a_val), "estado": [float(v) for v in estado]}, f)
+
+
+def leer_estado(path):
+    """
+    Devuelve (a, estado) guardados en path, o (None, None).
+    """
+    if not os.path.exists(path):
+        return None, None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        return datos["a"], np.array(datos["estado"], dtype=float)
+    except (ValueError, KeyError):
+        return None, None
+
+
+def detectar_histeresis(subdir, directo, reverso, a_start, a_step, umbral, piso):
+    """
+    Compara las métricas (dict k -> media de max_value) del barrido directo
+    y del inverso 'a' a 'a' y guarda en histeresis.json los valores en los
+    que difieren más de umbral décadas. Devuelve la lista de esos 'a'.
+    """
+    a_hist = []
+    for k in sorted(set(directo) & set(reverso)):
+        if adaptive_sweep.salto(directo[k], reverso[k], piso) > umbral:
+            a_hist.append(a_start + k * a_step)
+
+    datos = {
+        "a_histeresis": a_hist,
+        "rango": [min(a_hist), max(a_hist)] if a_hist else None,
+        "a_comparados": len(set(directo) & set(reverso)),
+        "umbral_decadas": umbral,
+    }
+    with open(os.path.join(subdir, "histeresis.json"), "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=4)
+    return a_hist
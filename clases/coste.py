@@ -0,0 +1,166 @@
+import math
+import time
+import numpy as np
+
+# Modelo de coste de las integraciones de un barrido, para repartir mejor
+# el trabajo entre procesos y dar un ETA con intervalo de confianza.
+#
+# El coste de un 'a' no es uniforme: con acoplamientos grandes el sistema
+# se vuelve rígido y un 'a' puede costar muchas veces más que otro. Cada
+# integración terminada aporta una muestra (a, segundos, nfev) a su grupo
+# de restas y el coste de los 'a' pendientes se estima interpolando en 'a'
+# (en escala logarítmica, constante fuera del rango muestreado):
+#
+#   - Si todas las muestras del grupo tienen nfev, se interpola log(nfev),
+#     que no depende de la carga del equipo, y se pasa a segundos con la
+#     mediana de segundos/nfev del grupo.
+#   - Si no, se interpola log(segundos).
+#   - Un grupo sin muestras usa la mediana de las de todos los grupos.
+#
+# El ETA es el coste estimado de lo pendiente dividido por el ritmo
+# observado (segundos de integración terminados por segundo de reloj, que
+# ya incluye el número de procesos). Antes de añadir cada muestra al
+# modelo se guarda el error relativo de su predicción, r = log(real /
+# estimado); con su desviación típica s el intervalo del 95 % es
+#
+#     ETA * exp(± 1.96 * sqrt(s^2 / n + s^2 * sum(c^2) / sum(c)^2))
+#
+# (error del sesgo medio del modelo con n muestras más el de cada uno de
+# los costes c pendientes, supuestos independientes).
+
+Z_95 = 1.96
+# Muestras de error de predicción necesarias para dar el intervalo
+MIN_RESIDUOS = 3
+
+
+class ModeloCoste:
+    """
+    Muestras (a, segundos, nfev) por grupo (cualquier clave hashable).
+    version aumenta con cada muestra, para saber cuándo reordenar.
+    """
+    def __init__(self):
+        self.muestras = {}
+        self.version = 0
+
+    def observar(self, clave, a_val, segundos, nfev=None):
+        nfev = nfev if nfev is not None and nfev > 0 else None
+        self.muestras.setdefault(clave, {})[float(a_val)] = (max(float(segundos), 1e-9), nfev)
+        self.version += 1
+
+    def _global(self):
+        segundos = [s for m in self.muestras.values() for s, _ in m.values()]
+        return float(np.median(segundos)) if segundos else None
+
+    def predecir(self, clave, a_values):
+        """
+        Segundos estimados de cada 'a' de a_values (array), o None si aún
+        no hay ninguna muestra.
+        """
+        a_values = np.asarray(a_values, dtype=float)
+        muestras = self.muestras.get(clave)
+        if not muestras:
+            defecto = self._global()
+            return None if defecto is None else np.full(len(a_values), defecto)
+        a_s = np.array(sorted(muestras))
+        segundos = np.array([muestras[a][0] for a in a_s])
+        nfev = [muestras[a][1] for a in a_s]
+        if all(n is not None for n in nfev):
+            nfev = np.array(nfev, dtype=float)
+            por_nfev = float(np.median(segundos / nfev))
+            return por_nfev * np.exp(np.interp(a_values, a_s, np.log(nfev)))
+        return np.exp(np.interp(a_values, a_s, np.log(segundos)))
+
+
+class EstimadorETA:
+    """
+    Trabajo pendiente de un barrido (grupo -> 'a' que faltan) y ETA a
+    partir del ModeloCoste.
+    """
+    def __init__(self, modelo=None):
+        self.modelo = modelo if modelo is not None else ModeloCoste()
+        self.pendientes = {}
+        self.residuos = []
+        self.hecho = 0.0
+        self.inicio = time.time()
+
+    def planificar(self, clave, a_values):
+        self.pendientes.setdefault(clave, set()).update(float(a) for a in a_values)
+
+    def completar(self, clave, a_val, segundos, nfev=None):
+        estimado = self.modelo.predecir(clave, [a_val])
+        if estimado is not None and segundos > 0:
+            self.residuos.append(math.log(segundos / estimado[0]))
+        self.modelo.observar(clave, a_val, segundos, nfev)
+        self.hecho += segundos
+        if clave in self.pendientes:
+            self.pendientes[clave].discard(float(a_val))
+
+    def restante(self):
+        """
+        Costes estimados (array) de todos los 'a' pendientes, o None si
+        aún no se puede estimar.
+        """
+        costes = []
+        for clave, a_values in self.pendientes.items():
+            if not a_values:
+                continue
+            estimados = self.modelo.predecir(clave, sorted(a_values))
+            if estimados is None:
+                return None
+            costes.append(estimados)
+        return np.concatenate(costes) if costes else np.zeros(0)
+
+    def estimar(self):
+        """
+        (eta, eta_min, eta_max) en segundos; los extremos son None sin
+        suficientes muestras y todo es None sin ninguna.
+        """
+        costes = self.restante()
+        transcurrido = time.time() - self.inicio
+        if costes is None or self.hecho <= 0 or transcurrido <= 0:
+            return None, None, None
+        total = float(np.sum(costes))
+        eta = total / (self.hecho / transcurrido)
+        if len(self.residuos) < MIN_RESIDUOS or total <= 0:
+            return eta, None, None
+        s2 = float(np.var(self.residuos, ddof=1))
+        rel = math.sqrt(s2 / len(self.residuos) + s2 * float(np.sum(costes ** 2)) / total ** 2)
+        return eta, eta * math.exp(-Z_95 * rel), eta * math.exp(Z_95 * rel)
+
+
+def indices_sondeo(n, k):
+    """
+    k índices de 0..n-1 repartidos por igual (los extremos incluidos).
+    """
+    if n <= k:
+        return list(range(n))
+    return sorted(set(np.linspace(0, n - 1, k).round().astype(int).tolist()))
+
+
+def ordenar(trabajos, modelo, clave):
+    """
+    trabajos: lista de (g, a_values) con clave(g) el grupo del modelo.
+    Devuelve la lista ordenada de menor a mayor coste estimado (el más
+    costoso, al final, es el primero que se saca con pop()). Sin muestras
+    se deja como está.
+    """
+    costes = np.zeros(len(trabajos))
+    por_grupo = {}
+    for i, (g, bloque) in enumerate(trabajos):
+        por_grupo.setdefault(g, []).append(i)
+    for g, indices in por_grupo.items():
+        bloques = [trabajos[i][1] for i in indices]
+        estimados = modelo.predecir(clave(g), np.concatenate(bloques))
+        if estimados is None:
+            return list(trabajos)
+        inicios = np.cumsum([0] + [len(b) for b in bloques[:-1]])
+        costes[indices] = np.add.reduceat(estimados, inicios)
+    return [trabajos[i] for i in np.argsort(costes, kind="stable")]
+
+
+def texto_eta(eta, eta_min=None, eta_max=None):
+    if eta is None:
+        return "ETA=?"
+    if eta_min is None:
+        return f"ETA={eta:.1f}s"
+    return f"ETA={eta:.1f}s (95%: {eta_min:.0f}-{eta_max:.0f}s)"
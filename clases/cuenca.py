@@ -0,0 +1,90 @@
+import os
+import numpy as np
+
+from clases import checkpoint
+
+# Estabilidad de cuenca de la sincronización: en lugar de una sola
+# condición inicial (la de info.txt), cada 'a' se integra desde K
+# condiciones iniciales y se mide qué fracción sincroniza. Las muestras son
+# las mismas para todos los 'a' (misma semilla), así que las diferencias
+# entre 'a' vecinos no vienen del azar del muestreo.
+#
+# La primera muestra es siempre la condición de info.txt: sus máximos por
+# ventana siguen yendo a log.csv como en el barrido normal. El resumen del
+# conjunto va a cuenca.csv, una línea por 'a' (ver checkpoint.anexar_lineas):
+#
+#     a,k,fraccion_sync,q05,q25,q50,q75,q95
+#
+# con los cuantiles de la métrica (media de max_value por ventana) de las
+# K trayectorias; las que divergen cuentan como inf.
+
+MUESTREOS = ("aleatorio", "lhs")
+CUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+CABECERA = "a,k,fraccion_sync," + ",".join(f"q{int(round(100 * q)):02d}" for q in CUANTILES) + "\n"
+
+
+def muestras(init_values, k, muestreo="aleatorio", radio=5.0, semilla=0):
+    """
+    Array (n_vars, k) de condiciones iniciales: init_values y k-1 puntos de
+    la caja init_values ± radio, uniformes ("aleatorio") o por hipercubo
+    latino ("lhs": un punto por estrato en cada variable).
+    """
+    centro = np.asarray(init_values, dtype=float)
+    n = len(centro)
+    rng = np.random.default_rng(semilla)
+    m = max(0, k - 1)
+    if muestreo == "aleatorio":
+        u = rng.random((n, m))
+    elif muestreo == "lhs":
+        estratos = np.argsort(rng.random((n, m)), axis=1)
+        u = (estratos + rng.random((n, m))) / max(m, 1)
+    else:
+        raise ValueError(f"Muestreo desconocido: {muestreo}")
+    return np.concatenate([centro[:, None], centro[:, None] + radio * (2 * u - 1)], axis=1)
+
+
+def resumen(metricas, tol):
+    """
+    metricas: (K, P) métrica de cada trayectoria y resta (NaN o inf si
+    divergió). Devuelve (fraccion (P,), cuantiles (P, len(CUANTILES))).
+    """
+    metricas = np.where(np.isnan(metricas), np.inf, metricas)
+    fraccion = np.mean(metricas < tol, axis=0)
+    cuantiles = np.quantile(metricas, CUANTILES, axis=0).T
+    return fraccion, cuantiles
+
+
+def ruta(subdir, sufijo=""):
+    return os.path.join(subdir, f"cuenca{sufijo}.csv")
+
+
+def anexar(path, filas):
+    """
+    Añade (con fsync) las filas (a_val, k, fraccion, cuantiles) de una resta.
+    """
+    lineas = []
+    for a_val, k, fraccion, cuantiles in filas:
+        valores = ",".join(repr(float(q)) for q in cuantiles)
+        lineas.append(f"{float(a_val)!r},{int(k)},{float(fraccion)!r},{valores}\n")
+    checkpoint.anexar_lineas(path, lineas, CABECERA)
+
+
+def leer(path):
+    """
+    dict a -> (k, fraccion, cuantiles) (la última línea de cada 'a').
+    """
+    filas = {}
+    if not os.path.exists(path):
+        return filas
+    with open(path, "r", encoding="utf-8") as f:
+        next(f, None)
+        for linea in f:
+            partes = linea.strip().split(",")
+            if len(partes) != 3 + len(CUANTILES):
+                continue
+            try:
+                filas[float(partes[0])] = (int(partes[1]), float(partes[2]),
+                                           np.array([float(v) for v in partes[3:]]))
+            except ValueError:
+                continue
+    return filas
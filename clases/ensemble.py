@@ -0,0 +1,233 @@
+import numpy as np
+from scipy.integrate import RK45
+
+# Integrador "ensemble": avanza a la vez un lote de N valores de 'a' como un
+# único estado (n_vars, N). sistema_dinamico se evalúa una vez por etapa para
+# todo el lote: el desempaquetado "x1, y1, ... = variables" recorre las filas
+# y las expresiones de las ecuaciones operan elemento a elemento.
+#
+# Métodos:
+#   "rk4":  Runge-Kutta clásico de paso fijo h, salida densa por Hermite cúbico.
+#   "rk45": Dormand-Prince 5(4) con paso adaptativo común a todo el lote
+#           (lo fija el miembro con mayor error) y la misma salida densa que
+#           usa solve_ivp.
+#
+# Un miembro que diverge (valores no finitos, o en rk45 un paso que se
+# reduce por debajo del mínimo por su culpa, como en una explosión en
+# tiempo finito) se congela en NaN y el resto del lote sigue.
+
+ENSEMBLE_METHODS = ("rk45", "rk4")
+
+SAFETY = 0.9
+MIN_FACTOR = 0.2
+MAX_FACTOR = 10
+
+
+def rhs_lote(sistema_dinamico, n_vars, n_lote):
+    """
+    Devuelve f(t, Y, a) -> (n_vars, N) a partir de sistema_dinamico.
+    Si las ecuaciones no admiten arrays (p. ej. usan max() de Python) se
+    recurre a un bucle por miembro del lote.
+    """
+    def vectorizada(t, Y, a):
+        salida = sistema_dinamico(t, Y, a)
+        return np.stack([np.broadcast_to(np.asarray(v, dtype=float), (n_lote,))
+                         for v in salida])
+
+    def por_miembro(t, Y, a):
+        return np.stack([np.asarray(sistema_dinamico(t, Y[:, j], a[j]), dtype=float)
+                         for j in range(n_lote)], axis=1)
+
+    def f(t, Y, a):
+        return f.impl(t, Y, a)
+
+    f.impl = vectorizada
+
+    def probar(t, Y, a):
+        try:
+            with np.errstate(all='ignore'):
+                prueba = vectorizada(t, Y, a)
+            if prueba.shape == (n_vars, n_lote):
+                f.impl = vectorizada
+                return prueba
+        except Exception:
+            pass
+        f.impl = por_miembro
+        return por_miembro(t, Y, a)
+
+    f.probar = probar
+    return f
+
+
+class _Muestreo:
+    """
+    Guarda el estado del lote en los instantes t_muestras (ordenados) a
+    medida que el integrador los va cruzando.
+    """
+    def __init__(self, t_muestras, n_vars, n_lote):
+        self.t = np.asarray(t_muestras, dtype=float)
+        self.Y = np.full((n_vars, n_lote, len(self.t)), np.nan)
+        self.siguiente = 0
+
+    def registrar(self, t_old, t_new, interpolar):
+        fin = np.searchsorted(self.t, t_new, side='right')
+        if fin > self.siguiente:
+            ts = self.t[self.siguiente:fin]
+            x = (ts - t_old) / (t_new - t_old) if t_new > t_old else np.zeros(len(ts))
+            self.Y[:, :, self.siguiente:fin] = interpolar(x)
+            self.siguiente = fin
+
+
+def _norma_rms(error, escala):
+    return np.sqrt(np.mean((error / escala) ** 2, axis=0))
+
+
+def integrar_lote(sistema_dinamico, t_span, y0, a_values, t_muestras,
+                  method="rk45", h=0.01, rtol=1e-3, atol=1e-6, max_pasos=10_000_000):
+    """
+    Integra y' = sistema_dinamico(t, y, a) para todos los a_values a la vez,
+    partiendo de y0 (mismo vector para todos, o un array (n_vars, N)).
+
+    Devuelve (Y, info): Y es (n_vars, N, len(t_muestras)) con el estado en
+    t_muestras, e info un dict con nfev, n_pasos, rechazados y 'vivos'
+    (máscara de los miembros que no divergieron; los demás quedan en NaN).
+    """
+    a_values = np.asarray(a_values, dtype=float)
+    N = len(a_values)
+    y0 = np.asarray(y0, dtype=float)
+    if y0.ndim == 1:
+        y0 = np.repeat(y0[:, None], N, axis=1)
+    n = y0.shape[0]
+    t0, t_final = float(t_span[0]), float(t_span[1])
+
+    f = rhs_lote(sistema_dinamico, n, N)
+    muestreo = _Muestreo(t_muestras, n, N)
+    info = {"nfev": 0, "n_pasos": 0, "rechazados": 0}
+
+    t = t0
+    Y = y0.copy()
+    F = f.probar(t, Y, a_values)
+    info["nfev"] += 1
+    vivos = np.all(np.isfinite(Y), axis=0) & np.all(np.isfinite(F), axis=0)
+    muestreo.registrar(t, t, lambda x: Y[:, :, None].repeat(len(x), axis=2))
+
+    def evaluar(t_, Y_):
+        info["nfev"] += 1
+        with np.errstate(all='ignore'):
+            return f(t_, Y_, a_values)
+
+    def marcar_divergentes(Y_new, F_new):
+        malos = ~(np.all(np.isfinite(Y_new), axis=0) & np.all(np.isfinite(F_new), axis=0))
+        if np.any(malos & vivos):
+            vivos[malos] = False
+        # Los miembros divergidos se congelan en NaN y no cuentan para el paso
+        Y_new[:, ~vivos] = np.nan
+        F_new[:, ~vivos] = 0.0
+
+    if method == "rk4":
+        while t < t_final and info["n_pasos"] < max_pasos:
+            paso = min(h, t_final - t)
+            k1 = F
+            k2 = evaluar(t + paso / 2, Y + paso / 2 * k1)
+            k3 = evaluar(t + paso / 2, Y + paso / 2 * k2)
+            k4 = evaluar(t + paso, Y + paso * k3)
+            Y_new = Y + paso / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+            F_new = evaluar(t + paso, Y_new)
+            marcar_divergentes(Y_new, F_new)
+
+            def hermite(x, Y0=Y, F0=F, Y1=Y_new, F1=F_new, paso=paso):
+                x2, x3 = x * x, x * x * x
+                h00 = 2 * x3 - 3 * x2 + 1
+                h10 = x3 - 2 * x2 + x
+                h01 = -2 * x3 + 3 * x2
+                h11 = x3 - x2
+                return (Y0[:, :, None] * h00 + F0[:, :, None] * (paso * h10)
+                        + Y1[:, :, None] * h01 + F1[:, :, None] * (paso * h11))
+
+            muestreo.registrar(t, t + paso, hermite)
+            t, Y, F = t + paso, Y_new, F_new
+            info["n_pasos"] += 1
+
+    elif method == "rk45":
+        A, B, C, E, P = RK45.A, RK45.B, RK45.C, RK45.E, RK45.P
+        n_etapas = RK45.n_stages
+        exponente = -1 / (RK45.error_estimator_order + 1)
+        K = np.empty((n_etapas + 1, n, N))
+
+        # Paso inicial (Hairer, Nørsett y Wanner), con la norma del peor miembro
+        escala = atol + np.abs(Y) * rtol
+        d0 = np.max(_norma_rms(Y, escala)[vivos], initial=0.0)
+        d1 = np.max(_norma_rms(F, escala)[vivos], initial=0.0)
+        h_abs = 1e-6 if (d0 < 1e-5 or d1 < 1e-5) else 0.01 * d0 / d1
+        h_abs = min(h_abs, t_final - t0)
+        F1 = evaluar(t + h_abs, Y + h_abs * F)
+        d2 = np.max(_norma_rms(F1 - F, escala)[vivos], initial=0.0) / h_abs
+        if d1 <= 1e-15 and d2 <= 1e-15:
+            h1 = max(1e-6, h_abs * 1e-3)
+        else:
+            h1 = (0.01 / max(d1, d2)) ** (1 / (RK45.error_estimator_order + 1))
+        h_abs = min(100 * h_abs, h1, t_final - t0)
+        h_aceptado = h_abs
+        # Miembros que rechazaron el último intento de paso
+        culpables = np.zeros(N, dtype=bool)
+
+        while t < t_final and info["n_pasos"] < max_pasos:
+            min_paso = 10 * np.abs(np.nextafter(t, np.inf) - t)
+            if h_abs < min_paso:
+                # Divergen los miembros que obligan a reducir el paso; sólo
+                # si son todos los que quedan falla el lote entero
+                if not np.any(vivos & ~culpables):
+                    raise RuntimeError(f"Paso demasiado pequeño en t={t:.6g} (lote ensemble)")
+                vivos[culpables] = False
+                Y[:, culpables] = np.nan
+                F[:, culpables] = 0.0
+                culpables[:] = False
+                h_abs = h_aceptado
+                continue
+            paso = min(h_abs, t_final - t)
+
+            K[0] = F
+            with np.errstate(all='ignore'):
+                for s in range(1, n_etapas):
+                    dY = np.tensordot(A[s, :s], K[:s], axes=(0, 0)) * paso
+                    K[s] = evaluar(t + C[s] * paso, Y + dY)
+                Y_new = Y + paso * np.tensordot(B, K[:n_etapas], axes=(0, 0))
+            F_new = evaluar(t + paso, Y_new)
+            K[-1] = F_new
+
+            with np.errstate(all='ignore'):
+                error = np.tensordot(E, K, axes=(0, 0)) * paso
+                escala = atol + np.maximum(np.abs(Y), np.abs(Y_new)) * rtol
+                normas = _norma_rms(error, escala)
+            finitos = np.all(np.isfinite(Y_new), axis=0) & np.isfinite(normas)
+            activos = vivos & finitos
+            error_norm = np.max(normas[activos], initial=0.0)
+
+            if error_norm < 1:
+                if error_norm == 0:
+                    factor = MAX_FACTOR
+                else:
+                    factor = min(MAX_FACTOR, SAFETY * error_norm ** exponente)
+                marcar_divergentes(Y_new, F_new)
+                with np.errstate(all='ignore'):
+                    Q = np.tensordot(K, P, axes=(0, 0))  # (n, N, orden)
+
+                def polinomio(x, Y0=Y, Q=Q, paso=paso):
+                    potencias = np.cumprod(np.repeat(x[None, :], Q.shape[2], axis=0), axis=0)
+                    return Y0[:, :, None] + paso * np.einsum('njk,kt->njt', Q, potencias)
+
+                muestreo.registrar(t, t + paso, polinomio)
+                t, Y, F = t + paso, Y_new, F_new
+                h_aceptado = paso
+                h_abs = paso * factor
+                culpables[:] = False
+                info["n_pasos"] += 1
+            else:
+                h_abs = paso * max(MIN_FACTOR, SAFETY * error_norm ** exponente)
+                culpables = activos & (normas >= 1)
+                info["rechazados"] += 1
+    else:
+        raise ValueError(f"Método ensemble desconocido: {method}")
+
+    info["vivos"] = vivos.copy()
+    return muestreo.Y, info
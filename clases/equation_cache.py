@@ -0,0 +1,87 @@
+import ast
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Caché de ecuaciones compiladas, compartida por la vista previa y el motor
+# de barridos (y una por proceso en los workers). La clave es un hash del
+# código normalizado: si se puede parsear, del árbol AST (no importan
+# espacios, comentarios ni saltos de línea); si no, del texto sin espacios
+# sobrantes. Cada ecuación puede guardar varias variantes ("sistema", o las
+# que añadan otros módulos, p. ej. ecuaciones variacionales), y al llenarse
+# se descarta la menos usada recientemente.
+
+MAX_ENTRADAS = 64
+
+
+def clave_ecuacion(eq_code):
+    try:
+        normalizado = ast.dump(ast.parse(eq_code))
+    except SyntaxError:
+        normalizado = "\n".join(l.rstrip() for l in eq_code.strip().splitlines() if l.strip())
+    return hashlib.sha256(normalizado.encode("utf-8")).hexdigest()
+
+
+class CacheEcuaciones:
+    """
+    Caché LRU (clave de ecuación, variante) -> objeto compilado, segura
+    entre hilos. Los fallos de compilación no se guardan.
+    """
+    def __init__(self, max_entradas=MAX_ENTRADAS):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.RLock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.descartes = 0
+
+    def obtener(self, eq_code, compilar, variante="sistema"):
+        """
+        Devuelve el objeto de (eq_code, variante), llamando a
+        compilar(eq_code) si no está.
+        """
+        clave = (clave_ecuacion(eq_code), variante)
+        with self._lock:
+            if clave in self._entradas:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return self._entradas[clave]
+            self.fallos += 1
+        # Fuera del cerrojo: algunas variantes (p. ej. la MSF) tardan
+        # segundos y no deben bloquear a la vista previa
+        objeto = compilar(eq_code)
+        with self._lock:
+            self._entradas[clave] = objeto
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+                self.descartes += 1
+            return objeto
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "max_entradas": self.max_entradas,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "descartes": self.descartes,
+                "tasa_aciertos": self.aciertos / total if total else 0.0,
+            }
+
+    def resumen(self):
+        e = self.estadisticas()
+        return (f"Caché de ecuaciones: {e['aciertos']} aciertos, {e['fallos']} fallos, "
+                f"{e['entradas']}/{e['max_entradas']} entradas")
+
+
+# Caché del proceso
+CACHE = CacheEcuaciones()
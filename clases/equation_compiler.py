@@ -0,0 +1,317 @@
+import ast
+import numpy as np
+from scipy import sparse
+
+# Compilador de ecuaciones: a partir del eq_code generado por
+# ModernApp.buildSystemFunction
+#
+#     def sistema_dinamico(t, variables, a):
+#         x1, y1, z1, x2, y2, z2 = variables
+#         return [expr_x1, expr_y1, ...]
+#
+# genera un lado derecho vectorizado (acepta variables de forma (n,) o
+# (n, k), como pide solve_ivp(vectorized=True) y el integrador ensemble) y el
+# jacobiano analítico, derivando simbólicamente el árbol de cada expresión.
+# El jacobiano se devuelve disperso (csc) cuando el sistema es grande y poco
+# denso; si alguna expresión no se sabe derivar sólo se aporta el patrón de
+# dispersión para que solve_ivp lo estime por diferencias finitas.
+
+# A partir de este tamaño y por debajo de esta densidad el jacobiano se
+# devuelve como matriz dispersa
+N_MIN_DISPERSO = 50
+DENSIDAD_MAX_DISPERSO = 0.25
+
+
+class NoDiferenciable(Exception):
+    pass
+
+
+def _const(valor):
+    return ast.Constant(value=valor)
+
+
+def _es_const(nodo, valor=None):
+    if not isinstance(nodo, ast.Constant) or isinstance(nodo.value, bool):
+        return False
+    if not isinstance(nodo.value, (int, float)):
+        return False
+    return valor is None or nodo.value == valor
+
+
+def _np(nombre, *args):
+    func = ast.Attribute(value=ast.Name(id="np", ctx=ast.Load()), attr=nombre, ctx=ast.Load())
+    return ast.Call(func=func, args=list(args), keywords=[])
+
+
+def _suma(u, v):
+    if _es_const(u) and _es_const(v):
+        return _const(u.value + v.value)
+    if _es_const(u, 0):
+        return v
+    if _es_const(v, 0):
+        return u
+    return ast.BinOp(left=u, op=ast.Add(), right=v)
+
+
+def _resta(u, v):
+    if _es_const(u) and _es_const(v):
+        return _const(u.value - v.value)
+    if _es_const(v, 0):
+        return u
+    if _es_const(u, 0):
+        return _neg(v)
+    return ast.BinOp(left=u, op=ast.Sub(), right=v)
+
+
+def _neg(u):
+    if _es_const(u, 0):
+        return u
+    if _es_const(u):
+        return _const(-u.value)
+    return ast.UnaryOp(op=ast.USub(), operand=u)
+
+
+def _mul(u, v):
+    if _es_const(u, 0) or _es_const(v, 0):
+        return _const(0)
+    if _es_const(u) and _es_const(v):
+        return _const(u.value * v.value)
+    if _es_const(u, 1):
+        return v
+    if _es_const(v, 1):
+        return u
+    return ast.BinOp(left=u, op=ast.Mult(), right=v)
+
+
+def _div(u, v):
+    if _es_const(u, 0):
+        return _const(0)
+    if _es_const(v, 1):
+        return u
+    return ast.BinOp(left=u, op=ast.Div(), right=v)
+
+
+def _pow(u, v):
+    return ast.BinOp(left=u, op=ast.Pow(), right=v)
+
+
+def nombres_usados(nodo):
+    return {n.id for n in ast.walk(nodo) if isinstance(n, ast.Name)}
+
+
+# Derivada de np.f(u) respecto de u, como función del nodo u
+_DERIVADAS_NP = {
+    "sin": lambda u: _np("cos", u),
+    "cos": lambda u: _neg(_np("sin", u)),
+    "tan": lambda u: _div(_const(1), _pow(_np("cos", u), _const(2))),
+    "exp": lambda u: _np("exp", u),
+    "log": lambda u: _div(_const(1), u),
+    "log10": lambda u: _div(_const(1), _mul(u, _np("log", _const(10)))),
+    "sqrt": lambda u: _div(_const(1), _mul(_const(2), _np("sqrt", u))),
+    "tanh": lambda u: _resta(_const(1), _pow(_np("tanh", u), _const(2))),
+    "sinh": lambda u: _np("cosh", u),
+    "cosh": lambda u: _np("sinh", u),
+    "arctan": lambda u: _div(_const(1), _suma(_const(1), _pow(u, _const(2)))),
+    "arcsin": lambda u: _div(_const(1), _np("sqrt", _resta(_const(1), _pow(u, _const(2))))),
+    "arccos": lambda u: _neg(_div(_const(1), _np("sqrt", _resta(_const(1), _pow(u, _const(2)))))),
+    "abs": lambda u: _np("sign", u),
+    "absolute": lambda u: _np("sign", u),
+}
+
+
+def derivar(nodo, var):
+    """
+    Derivada simbólica del nodo (expresión) respecto del nombre var.
+    Lanza NoDiferenciable si encuentra algo que no sabe derivar.
+    """
+    if var not in nombres_usados(nodo):
+        return _const(0)
+
+    if isinstance(nodo, ast.Name):
+        return _const(1 if nodo.id == var else 0)
+
+    if isinstance(nodo, ast.UnaryOp):
+        du = derivar(nodo.operand, var)
+        if isinstance(nodo.op, ast.USub):
+            return _neg(du)
+        if isinstance(nodo.op, ast.UAdd):
+            return du
+        raise NoDiferenciable(ast.unparse(nodo))
+
+    if isinstance(nodo, ast.BinOp):
+        u, v = nodo.left, nodo.right
+        du, dv = derivar(u, var), derivar(v, var)
+        if isinstance(nodo.op, ast.Add):
+            return _suma(du, dv)
+        if isinstance(nodo.op, ast.Sub):
+            return _resta(du, dv)
+        if isinstance(nodo.op, ast.Mult):
+            return _suma(_mul(du, v), _mul(u, dv))
+        if isinstance(nodo.op, ast.Div):
+            if _es_const(dv, 0):
+                return _div(du, v)
+            return _div(_resta(_mul(du, v), _mul(u, dv)), _pow(v, _const(2)))
+        if isinstance(nodo.op, ast.Pow):
+            if var not in nombres_usados(v):
+                # d(u^c) = c * u^(c-1) * du
+                if _es_const(v):
+                    exponente = _const(v.value - 1)
+                else:
+                    exponente = _resta(v, _const(1))
+                return _mul(_mul(v, _pow(u, exponente)), du)
+            # d(u^v) = u^v * (dv*log(u) + v*du/u)
+            return _mul(nodo, _suma(_mul(dv, _np("log", u)), _div(_mul(v, du), u)))
+        raise NoDiferenciable(ast.unparse(nodo))
+
+    if isinstance(nodo, ast.Call):
+        func = nodo.func
+        if (isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name)
+                and func.value.id == "np" and func.attr in _DERIVADAS_NP
+                and len(nodo.args) == 1 and not nodo.keywords):
+            u = nodo.args[0]
+            return _mul(_DERIVADAS_NP[func.attr](u), derivar(u, var))
+        raise NoDiferenciable(ast.unparse(nodo))
+
+    raise NoDiferenciable(ast.unparse(nodo))
+
+
+def parse_eq_code(eq_code):
+    """
+    Extrae (var_names, expresiones) de un eq_code con la forma que genera
+    buildSystemFunction. expresiones es una lista de nodos ast.
+    Devuelve None si el código no tiene esa forma.
+    """
+    try:
+        modulo = ast.parse(eq_code)
+    except SyntaxError:
+        return None
+    if len(modulo.body) != 1 or not isinstance(modulo.body[0], ast.FunctionDef):
+        return None
+    cuerpo = modulo.body[0].body
+    if len(cuerpo) != 2:
+        return None
+    asignacion, retorno = cuerpo
+    if not (isinstance(asignacion, ast.Assign) and len(asignacion.targets) == 1
+            and isinstance(asignacion.targets[0], ast.Tuple)
+            and isinstance(asignacion.value, ast.Name)
+            and asignacion.value.id == "variables"):
+        return None
+    if not all(isinstance(e, ast.Name) for e in asignacion.targets[0].elts):
+        return None
+    if not (isinstance(retorno, ast.Return) and isinstance(retorno.value, (ast.List, ast.Tuple))):
+        return None
+
+    var_names = [e.id for e in asignacion.targets[0].elts]
+    expresiones = list(retorno.value.elts)
+    if len(expresiones) != len(var_names):
+        return None
+    return var_names, expresiones
+
+
+def _apilar(valores, variables):
+    forma = np.shape(variables)[1:]
+    return np.stack([np.broadcast_to(np.asarray(v, dtype=float), forma) for v in valores])
+
+
+class SistemaCompilado:
+    """
+    Lado derecho vectorizado y jacobiano de un eq_code. Se llama igual que
+    sistema_dinamico(t, variables, a), pero devuelve un array y admite
+    variables de forma (n, k).
+
+    Atributos:
+        var_names, expresiones (texto),
+        vectorized: si el lado derecho admite (n, k) (no lo admiten las
+            expresiones sólo escalares, p. ej. "x1 if x1 > 0 else 0"),
+        sparsity: matriz dispersa 0/1 con las dependencias de cada ecuación,
+        disperso: si compensa tratar el jacobiano como disperso (jac
+            devuelve entonces una matriz csc),
+        jac: jac(t, y, a) analítico, o None si no se pudo derivar.
+    """
+    def __init__(self, var_names, expresiones):
+        self.var_names = var_names
+        self.expresiones = [ast.unparse(e) for e in expresiones]
+        n = len(var_names)
+        cabecera = ["def {nombre}(t, variables, a):",
+                    "    " + ", ".join(var_names) + (" = variables" if n > 1 else ", = variables")]
+
+        # Dos versiones del lado derecho: la de variables (n,), que es la que
+        # llama solve_ivp en cada paso y no puede costar más que el
+        # sistema_dinamico original, y la de columnas (n, k), que tiene que
+        # ajustar a (k,) los términos constantes o escalares
+        codigo_rhs = "\n".join(cabecera).format(nombre="rhs_escalar") + \
+            "\n    return np.array([" + ", ".join(self.expresiones) + "], dtype=float)"
+        codigo_columnas = "\n".join(cabecera).format(nombre="rhs") + \
+            "\n    return _apilar([" + ", ".join(self.expresiones) + "], variables)"
+        entorno = {"np": np, "_apilar": _apilar}
+        exec(codigo_rhs, entorno)
+        exec(codigo_columnas, entorno)
+        self._rhs_escalar = entorno["rhs_escalar"]
+        self._rhs = entorno["rhs"]
+        self.vectorized = self._admite_columnas()
+
+        # Patrón estructural: qué variables aparecen en cada ecuación
+        filas, columnas = [], []
+        for i, expr in enumerate(expresiones):
+            usadas = nombres_usados(expr)
+            for j, var in enumerate(var_names):
+                if var in usadas:
+                    filas.append(i)
+                    columnas.append(j)
+        self.sparsity = sparse.csc_matrix(
+            (np.ones(len(filas)), (filas, columnas)), shape=(n, n))
+        # Sólo compensa trabajar con matrices dispersas en sistemas grandes
+        self.disperso = (n >= N_MIN_DISPERSO and
+                         len(filas) <= DENSIDAD_MAX_DISPERSO * n * n)
+
+        self.jac = None
+        try:
+            entradas = []
+            for i, j in zip(filas, columnas):
+                d = derivar(expresiones[i], var_names[j])
+                if not _es_const(d, 0):
+                    entradas.append((i, j, ast.unparse(d)))
+        except NoDiferenciable:
+            return
+
+        self.jac_filas = np.array([e[0] for e in entradas], dtype=int)
+        self.jac_columnas = np.array([e[1] for e in entradas], dtype=int)
+        self.jac_expresiones = [e[2] for e in entradas]
+        codigo_jac = "\n".join(cabecera).format(nombre="jac") + \
+            "\n    return [" + ", ".join(self.jac_expresiones) + "]"
+        exec(codigo_jac, entorno)
+        self._jac = entorno["jac"]
+        self.jac = self.jacobiano
+
+    def _admite_columnas(self):
+        n = len(self.var_names)
+        try:
+            with np.errstate(all="ignore"):
+                return np.shape(self._rhs(0.0, np.ones((n, 2)), 1.0)) == (n, 2)
+        except Exception:
+            return False
+
+    def __call__(self, t, variables, a):
+        if np.ndim(variables) == 1:
+            return self._rhs_escalar(t, variables, a)
+        return self._rhs(t, variables, a)
+
+    def jacobiano(self, t, y, a):
+        n = len(self.var_names)
+        valores = np.array([float(v) for v in self._jac(t, y, a)], dtype=float)
+        if self.disperso:
+            return sparse.csc_matrix((valores, (self.jac_filas, self.jac_columnas)), shape=(n, n))
+        J = np.zeros((n, n))
+        J[self.jac_filas, self.jac_columnas] = valores
+        return J
+
+
+def compilar_ecuaciones(eq_code):
+    """
+    Devuelve un SistemaCompilado para eq_code, o None si eq_code no tiene
+    la forma de buildSystemFunction.
+    """
+    partes = parse_eq_code(eq_code)
+    if partes is None:
+        return None
+    return SistemaCompilado(*partes)
@@ -0,0 +1,266 @@
+import numpy as np
+from scipy.optimize import minimize_scalar
+
+try:
+    from scipy.integrate._ivp.rk import RkDenseOutput
+except ImportError:
+    # Módulo privado de SciPy: sin él se usa siempre OdeSolution.__call__
+    RkDenseOutput = None
+
+# Extracción del error de sincronización: máximo de |x_A - x_B| en cada
+# sub-intervalo unitario [i, i+1] de la ventana de medida.
+#
+# Modos:
+#   "minimize": el método original (minimize_scalar acotado sobre np.interp,
+#               100 llamadas por resta). Reproduce los log.csv antiguos.
+#   "interp":   máximo exacto del interpolante lineal de t_eval, vectorizado.
+#               Mismos datos que "minimize" pero sin quedarse en un máximo local.
+#   "denso":    muestrea la salida densa de solve_ivp dentro de cada ventana
+#               y refina hasta que el máximo cambia menos que error_tol.
+
+# Sub-intervalos [200..300] donde se mide el error de sincronización
+VENTANAS = np.arange(200, 300)
+
+ERROR_MODES = ("denso", "interp", "minimize")
+
+# Tamaño máximo (en elementos) de los coeficientes reunidos de una vez al
+# evaluar la salida densa
+MAX_ELEMENTOS_DENSA = 2_000_000
+
+
+class ErrorGlobal:
+    """
+    "Resta" de toda una red (ver network.py): en cada instante, la mayor
+    distancia |x_i - <x>| de un nodo a la media de la red, en las
+    componentes dadas (índices dentro de cada nodo de d variables).
+    Se usa en lugar de un par (A, B) en las listas de pares.
+    """
+    def __init__(self, componentes, d=3):
+        self.componentes = list(componentes)
+        self.d = d
+
+    def __call__(self, y):
+        n = y.shape[0] // self.d
+        nodos = y[:n * self.d].reshape((n, self.d) + y.shape[1:])[:, self.componentes]
+        return np.max(np.abs(nodos - nodos.mean(axis=0)), axis=(0, 1))
+
+    def __eq__(self, otro):
+        return (isinstance(otro, ErrorGlobal) and otro.componentes == self.componentes
+                and otro.d == self.d)
+
+    def __hash__(self):
+        return hash((tuple(self.componentes), self.d))
+
+
+def lista_pares(pares):
+    """
+    pares como lista (un solo par (A, B) también vale).
+    """
+    if isinstance(pares, ErrorGlobal):
+        return [pares]
+    if isinstance(pares, tuple) and len(pares) == 2 and all(np.isscalar(p) for p in pares):
+        return [pares]
+    return list(pares)
+
+
+def diferencias(y, pares):
+    """
+    x_A - x_B para todos los pares a la vez: devuelve un array (P, T).
+    Las entradas ErrorGlobal dan su error de red (ya en valor absoluto).
+    """
+    pares = lista_pares(pares)
+    simples = [p for p, par in enumerate(pares) if not isinstance(par, ErrorGlobal)]
+    if len(simples) == len(pares):
+        indices = np.asarray(pares, dtype=int).reshape(-1, 2)
+        return y[indices[:, 0]] - y[indices[:, 1]]
+    salida = np.empty((len(pares),) + y.shape[1:])
+    if simples:
+        indices = np.asarray([pares[p] for p in simples], dtype=int)
+        salida[simples] = y[indices[:, 0]] - y[indices[:, 1]]
+    for p, par in enumerate(pares):
+        if isinstance(par, ErrorGlobal):
+            salida[p] = par(y)
+    return salida
+
+
+def maximos_minimize(t_values, diffs, ventanas=VENTANAS, on_error=None):
+    """
+    Máximo local de |x_A - x_B| en cada sub-intervalo [i, i+1] de ventanas
+    para cada fila de diffs. Como la interpolación lineal es lineal,
+    interp(A) - interp(B) == interp(A - B), así que basta con interpolar
+    la diferencia (con signo) ya calculada.
+
+    Devuelve un array (P, len(ventanas)); las ventanas que fallen quedan NaN.
+    """
+    maximos = np.full((diffs.shape[0], len(ventanas)), np.nan)
+    for p in range(diffs.shape[0]):
+        d = diffs[p]
+
+        def abs_diff(t_):
+            return abs(np.interp(t_, t_values, d))
+
+        for k, i_time in enumerate(ventanas):
+            try:
+                res = minimize_scalar(lambda tau: -abs_diff(tau),
+                                      bounds=(i_time, i_time+1),
+                                      method='bounded')
+                maximos[p, k] = -res.fun
+            except Exception as e:
+                if on_error:
+                    on_error(p, i_time, e)
+    return maximos
+
+
+def maximos_interp(t_values, diffs, ventanas=VENTANAS):
+    """
+    Máximo exacto de |interp(x_A - x_B)| en cada [i, i+1]. El interpolante
+    es lineal a trozos, así que su máximo está en un nodo de t_values
+    interior a la ventana o en uno de sus extremos.
+    """
+    ventanas = np.asarray(ventanas, dtype=float)
+    bordes = np.concatenate([ventanas, ventanas[-1:] + 1])
+
+    # Valores en los extremos de cada ventana: (P, W+1)
+    extremos = np.abs(np.stack([np.interp(bordes, t_values, d) for d in diffs]))
+    maximos = np.maximum(extremos[:, :-1], extremos[:, 1:])
+
+    # Nodos interiores: ventana w contiene los índices [lo[w], lo[w+1])
+    lo = np.searchsorted(t_values, bordes, side='right')
+    hi_total = lo[-1]
+    no_vacias = lo[:-1] < lo[1:]
+    if hi_total > lo[0] and np.any(no_vacias):
+        absd = np.abs(diffs[:, :hi_total])
+        inicios = np.minimum(lo[:-1], hi_total - 1)
+        nodos = np.maximum.reduceat(absd, inicios, axis=1)
+        nodos = np.where(no_vacias[None, :], nodos, -np.inf)
+        maximos = np.maximum(maximos, nodos)
+    return maximos
+
+
+def _refinar_parabola(valores):
+    """
+    Ajusta una parábola por las tres muestras alrededor del máximo muestreado
+    de cada ventana (valores: (P, W, K)) y devuelve el máximo estimado, nunca
+    menor que el muestreado. El vértice sólo se usa si cae dentro de la
+    ventana, lo que también cubre máximos pegados a un extremo.
+    """
+    K = valores.shape[-1]
+    i = np.argmax(valores, axis=-1)
+    m = np.take_along_axis(valores, i[..., None], axis=-1)[..., 0]
+    ic = np.clip(i, 1, K - 2)
+    y0 = np.take_along_axis(valores, (ic - 1)[..., None], axis=-1)[..., 0]
+    y1 = np.take_along_axis(valores, ic[..., None], axis=-1)[..., 0]
+    y2 = np.take_along_axis(valores, (ic + 1)[..., None], axis=-1)[..., 0]
+    curv = y0 - 2 * y1 + y2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = (y0 - y2) / (2 * curv)
+        pico = y1 + (y2 - y0) * delta / 4
+    valido = (curv < 0) & (np.abs(delta) <= 1) & np.isfinite(pico)
+    return np.where(valido, np.maximum(m, pico), m)
+
+
+def salida_densa_vectorizada(ode_solution):
+    """
+    Evalúa un OdeSolution de métodos Runge-Kutta explícitos sin el bucle
+    por segmento de OdeSolution.__call__: cada paso guarda un polinomio
+    y(t) = y_old + h * Q @ [x, x^2, ...], con x = (t - t_old) / h, así que
+    basta con reunir los coeficientes de todos los pasos en arrays.
+    Si ode_solution no es un OdeSolution o algún interpolante no es de ese
+    tipo, devuelve ode_solution tal cual.
+    """
+    interpolantes = getattr(ode_solution, "interpolants", None)
+    # Sólo los de RK: RadauDenseOutput también tiene Q e y_old, pero su
+    # polinomio es y_old + Q @ [x, ...] (sin el factor h)
+    if RkDenseOutput is None or not interpolantes \
+            or not all(isinstance(i, RkDenseOutput) for i in interpolantes):
+        return ode_solution
+    if len({i.Q.shape for i in interpolantes}) != 1:
+        return ode_solution
+
+    t_old = np.array([i.t_old for i in interpolantes])
+    h = np.array([i.h for i in interpolantes])
+    Q = np.stack([i.Q for i in interpolantes])            # (S, n, orden+1)
+    y_old = np.stack([i.y_old for i in interpolantes])    # (S, n)
+    inicios = np.minimum(t_old, t_old + h)
+    n, orden = Q.shape[1], Q.shape[2]
+    # Q[idx] ocupa (T, n, orden): en sistemas grandes (redes) se evalúa por trozos de t
+    por_trozo = max(1, MAX_ELEMENTOS_DENSA // (n * orden))
+
+    def evaluar_trozo(t):
+        idx = np.clip(np.searchsorted(inicios, t, side='right') - 1, 0, len(h) - 1)
+        x = (t - t_old[idx]) / h[idx]
+        potencias = np.cumprod(np.repeat(x[None, :], orden, axis=0), axis=0)  # (orden, T)
+        y = np.einsum('tnk,kt->nt', Q[idx], potencias)
+        return y * h[idx] + y_old[idx].T
+
+    def evaluar(t):
+        t = np.asarray(t, dtype=float)
+        if t.size <= por_trozo:
+            return evaluar_trozo(t)
+        return np.concatenate([evaluar_trozo(t[i:i + por_trozo])
+                               for i in range(0, t.size, por_trozo)], axis=1)
+
+    return evaluar
+
+
+def malla_ventanas(muestras, ventanas=VENTANAS):
+    """
+    Instantes de una malla uniforme de muestras+1 puntos por ventana,
+    aplanados ventana a ventana: array (len(ventanas) * (muestras+1),).
+    """
+    ventanas = np.asarray(ventanas, dtype=float)
+    s = np.linspace(0.0, 1.0, muestras + 1)
+    return (ventanas[:, None] + s[None, :]).ravel()
+
+
+def maximos_malla(y_malla, pares, n_ventanas=len(VENTANAS)):
+    """
+    Máximos por ventana a partir del estado muestreado en malla_ventanas
+    (y_malla: (n_vars, n_ventanas * (muestras+1))), en una sola pasada.
+    """
+    d = np.abs(diferencias(y_malla, pares))
+    return _refinar_parabola(d.reshape(d.shape[0], n_ventanas, -1))
+
+
+def maximos_denso(dense_sol, pares, ventanas=VENTANAS, error_tol=1e-4,
+                  muestras=32, max_muestras=1024):
+    """
+    Máximo de |x_A - x_B| en cada [i, i+1] evaluando la salida densa
+    (sol.sol) en una malla uniforme dentro de cada ventana. Sólo las
+    ventanas cuyo máximo cambió más de error_tol se vuelven a muestrear con
+    el doble de puntos (hasta max_muestras puntos por ventana).
+    """
+    ventanas = np.asarray(ventanas, dtype=float)
+    n_pares = len(lista_pares(pares))
+    maximos = np.full((n_pares, len(ventanas)), np.nan)
+    activas = np.arange(len(ventanas))
+    k = muestras
+    while len(activas):
+        t = malla_ventanas(k, ventanas[activas])
+        nuevos = maximos_malla(dense_sol(t), pares, len(activas))
+
+        cambio = np.abs(nuevos - maximos[:, activas])
+        maximos[:, activas] = nuevos
+        if k >= max_muestras:
+            break
+        # En la primera pasada cambio es NaN: todas siguen activas
+        sin_converger = ~np.all(cambio <= error_tol, axis=0)
+        activas = activas[sin_converger]
+        k *= 2
+    return maximos
+
+
+def maximos_por_ventana(sol, pares, error_mode="denso", error_tol=1e-4, on_error=None):
+    """
+    Devuelve la matriz (P, len(VENTANAS)) de máximos por ventana para
+    los pares dados, según error_mode. "denso" requiere que sol se haya
+    obtenido con dense_output=True.
+    """
+    if error_mode == "denso":
+        return maximos_denso(salida_densa_vectorizada(sol.sol), pares, error_tol=error_tol)
+    diffs = diferencias(sol.y, pares)
+    if error_mode == "interp":
+        return maximos_interp(sol.t, diffs)
+    if error_mode == "minimize":
+        return maximos_minimize(sol.t, diffs, on_error=on_error)
+    raise ValueError(f"error_mode desconocido: {error_mode}")
@@ -13,6 +13,10 @@ from clases.initial_condition_row import InitialConditionRow
 from clases.resta_dialog import RestaDialog
 from clases.varias_restas_panel import VariasRestasPanel
 from clases.panel_graficas import PanelGraficas # Ensure this is present
+from clases.preview import DEBOUNCE_MS
+from clases.preview_thread import PreviewThread
+from clases.msf_thread import MSFThread
+from clases import msf
 
 
 class ModernApp(QMainWindow):
@@ -85,6 +89,14 @@ class ModernApp(QMainWindow):
         eqGroup = QtWidgets.QGroupBox("Ecuaciones")
         eqLayout = QtWidgets.QVBoxLayout(eqGroup)
         self.eq_rows = []
+        # Vista previa: se espera DEBOUNCE_MS sin cambios antes de simular,
+        # en otro hilo; sólo cuenta la petición más reciente (preview_gen)
+        self.preview_timer = QtCore.QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(DEBOUNCE_MS)
+        self.preview_timer.timeout.connect(self.updateSimulationAndPlot)
+        self.preview_gen = 0
+        self.preview_threads = []
         # Asumimos 2 eq_rows => x1,y1,z1 y x2,y2,z2
         for i in range(2):
             row = EquationRow(f"x{i+1}", f"y{i+1}", f"z{i+1}") # Assuming EquationRow takes var names
@@ -109,6 +121,28 @@ class ModernApp(QMainWindow):
         self.crearRestasButton = QtWidgets.QPushButton("Crear restas (info.txt con ecuaciones e iniciales)")
         leftLayout.addWidget(self.crearRestasButton)
 
+        # Función maestra de estabilidad del sistema 1 como nodo
+        msfGroup = QtWidgets.QGroupBox("Estabilidad maestra (MSF)")
+        msfLayout = QtWidgets.QHBoxLayout(msfGroup)
+        msfLayout.addWidget(QtWidgets.QLabel("Acoplamiento:"))
+        self.msfAcoplamientoEdit = QtWidgets.QLineEdit("x")
+        self.msfAcoplamientoEdit.setMaximumWidth(60)
+        msfLayout.addWidget(self.msfAcoplamientoEdit)
+        msfLayout.addWidget(QtWidgets.QLabel("alfa máx:"))
+        self.msfAlfaMaxSpin = QtWidgets.QDoubleSpinBox()
+        self.msfAlfaMaxSpin.setRange(0.01, 1e4)
+        self.msfAlfaMaxSpin.setValue(10.0)
+        msfLayout.addWidget(self.msfAlfaMaxSpin)
+        msfLayout.addWidget(QtWidgets.QLabel("puntos:"))
+        self.msfPuntosSpin = QtWidgets.QSpinBox()
+        self.msfPuntosSpin.setRange(2, 1000)
+        self.msfPuntosSpin.setValue(41)
+        msfLayout.addWidget(self.msfPuntosSpin)
+        self.msfButton = QtWidgets.QPushButton("Calcular MSF")
+        msfLayout.addWidget(self.msfButton)
+        leftLayout.addWidget(msfGroup)
+        self.msf_thread = None
+
         # Panel "Varias restas"
         self.variasRestasPanel = VariasRestasPanel() # No longer takes a string title
         leftLayout.addWidget(self.variasRestasPanel)
@@ -139,8 +173,10 @@ class ModernApp(QMainWindow):
         self.setCentralWidget(centralWidget)
 
         self.crearRestasButton.clicked.connect(self.onCrearRestasClicked)
+        self.msfButton.clicked.connect(self.onCalcularMSF)
         self.variasRestasPanel.progress_message_signal.connect(self.log) # Assuming this signal exists
         self.variasRestasPanel.plot_batch_results.connect(self.panel_graficas.plot_simulation_batch) # New connection
+        self.variasRestasPanel.plot_mapa.connect(self.panel_graficas.plot_mapa_subcarpeta)
 
     # ---------------------------------------------------------------------
     # Menú "Inicio" -> "Cargar" / "Guardar"
@@ -229,13 +265,52 @@ class ModernApp(QMainWindow):
         for row in self.init_rows:
             init_vals.extend(row.getInitialValues())
 
-        dialog = RestaDialog(var_list, eq_code, init_vals, parent=self)
+        dialog = RestaDialog(var_list, eq_code, init_vals, parent=self,
+                             nodo_code=self.buildNodeFunction())
         res = dialog.exec()
         if res == QtWidgets.QDialog.DialogCode.Accepted:
             self.log("Se han creado restas (info.txt con ecuaciones e iniciales).")
         else:
             self.log("Operación de crear restas cancelada.")
 
+    def onCalcularMSF(self):
+        """
+        Lanza el cálculo de la MSF del sistema 1 (x1, y1, z1) como nodo,
+        con alfa en [0, alfa máx].
+        """
+        if self.msf_thread is not None:
+            self.msf_thread.cancel()
+        alfas = np.linspace(0.0, self.msfAlfaMaxSpin.value(), self.msfPuntosSpin.value())
+        self.log(f"Calculando la MSF con {len(alfas)} valores de alfa...")
+        thread = MSFThread(self.buildNodeFunction(), alfas, self.msfAcoplamientoEdit.text(),
+                           self.init_rows[0].getInitialValues(), parent=self)
+        thread.result_signal.connect(self.onMSFResult)
+        thread.error_signal.connect(self.onMSFError)
+        thread.finished.connect(thread.deleteLater)
+        self.msf_thread = thread
+        thread.start()
+
+    def onMSFError(self, mensaje):
+        if self.sender() is self.msf_thread:
+            self.msf_thread = None
+        self.log(mensaje)
+
+    def onMSFResult(self, resultado):
+        if self.sender() is not self.msf_thread:
+            return
+        self.msf_thread = None
+        self.panel_graficas.plot_msf(resultado["alfas"], resultado["lyapunov"])
+        estables = resultado["estables"]
+        if not estables:
+            self.log("MSF: ningún alfa de la rejilla es estable.")
+            return
+        self.log("MSF: estable para alfa en " +
+                 ", ".join(f"[{a0:.4g}, {a1:.4g}]" for a0, a1 in estables))
+        for nombre, autovalores in msf.AUTOVALORES_PAR.items():
+            intervalos = msf.umbrales(estables, autovalores)
+            self.log(f"  Par {nombre}: sincroniza para a en " +
+                     ", ".join(f"[{a0:.4g}, {a1:.4g}]" for a0, a1 in intervalos))
+
     def buildVariableList(self):
         n = len(self.eq_rows)
         var_list = []
@@ -249,38 +324,51 @@ class ModernApp(QMainWindow):
         self.logText.appendPlainText(msg)
 
     def onEquationChanged(self):
-        self.log("Ecuaciones modificadas. Actualizando simulación y gráficas con a=0...")
-        self.updateSimulationAndPlot()
+        # Cada tecla reinicia la espera; sólo se simula al dejar de escribir
+        self.preview_timer.start()
 
     def updateSimulationAndPlot(self, a_param=0.0): # New consolidated method
+        """
+        Lanza la vista previa en un PreviewThread y cancela las anteriores.
+        """
         eq_code = self.buildSystemFunction()
         if not eq_code:
             return
-        local_vars = {}
-        try:
-            exec(eq_code, {"np": np}, local_vars) # Pass np for eval
-            sistema_dinamico = local_vars['sistema_dinamico']
-        except Exception as e:
-            self.log(f"Error generando ecuación: {e}")
-            return
 
         init_values = []
         for row in self.init_rows:
             init_values.extend(row.getInitialValues())
 
-        t_span = (0, 5) # These should ideally be configurable
-        t_eval = np.linspace(0, 5, 200) # These should ideally be configurable
-        try:
-            sol = solve_ivp(sistema_dinamico, t_span, init_values, t_eval=t_eval, args=(a_param,))
-        except Exception as e:
-            self.log(f"Error solve_ivp: {e}")
-            return
+        for thread in self.preview_threads:
+            thread.cancel()
+        self.preview_gen += 1
+        self.log(f"Ecuaciones modificadas. Actualizando simulación y gráficas con a={a_param:g}...")
 
+        thread = PreviewThread(self.preview_gen, eq_code, init_values, a_param, parent=self)
+        thread.result_signal.connect(self.onPreviewResult)
+        thread.error_signal.connect(self.onPreviewError)
+        thread.finished.connect(lambda t=thread: self.onPreviewFinished(t))
+        self.preview_threads.append(thread)
+        thread.start()
+
+    def onPreviewResult(self, generacion, sol):
+        if generacion != self.preview_gen:
+            return
         if sol.success:
             self.panel_graficas.plot_simulation(sol)
         else:
             self.log("La simulación no fue exitosa.")
 
+    def onPreviewError(self, generacion, msg):
+        # Los errores de textos ya sustituidos (a medio escribir) no interesan
+        if generacion == self.preview_gen:
+            self.log(msg)
+
+    def onPreviewFinished(self, thread):
+        if thread in self.preview_threads:
+            self.preview_threads.remove(thread)
+        thread.deleteLater()
+
 
     def buildSystemFunction(self):
         """
@@ -319,6 +407,18 @@ class ModernApp(QMainWindow):
 
         return "\n".join(lines)
 
+    def buildNodeFunction(self):
+        """
+        eq_code del sistema 1 solo (x1, y1, z1), que hace de nodo al crear
+        restas sobre una red.
+        """
+        if not self.eq_rows:
+            return None
+        dx, dy, dz = (e.strip() or "0" for e in self.eq_rows[0].getEquations())
+        return ("def sistema_dinamico(t, variables, a):\n"
+                "    x1, y1, z1 = variables\n"
+                f"    return [{dx}, {dy}, {dz}]")
+
     def setTheme(self, theme: str) -> None:
         """Cambia el tema a 'Dark', 'Light' o 'Acrylic'."""
         if theme == "Dark":
@@ -429,6 +529,14 @@ class ModernApp(QMainWindow):
             QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No
         )
         if reply == QtWidgets.QMessageBox.StandardButton.Yes:
+            for thread in self.preview_threads:
+                thread.cancel()
+                thread.wait()
+            # También los cálculos de MSF ya cancelados que aún no han terminado
+            for thread in self.findChildren(MSFThread):
+                thread.cancel()
+                thread.wait()
+            self.msf_thread = None
             event.accept()
         else:
             event.ignore()
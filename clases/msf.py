@@ -0,0 +1,248 @@
+import numpy as np
+from scipy import sparse
+from scipy.integrate import solve_ivp
+
+from clases.equation_compiler import compilar_ecuaciones
+from clases.equation_cache import CACHE
+from clases import network
+
+# Función maestra de estabilidad (MSF, Pecora y Carroll). Para N nodos
+# idénticos con acoplamiento difusivo
+#
+#     dX_i/dt = F(X_i) - a * sum_j L_ij H X_j
+#
+# la perturbación transversal a la sincronización en el modo propio k de L
+# evoluciona con
+#
+#     dxi/dt = [DF(s(t)) - alfa H] xi,    alfa = a * lambda_k,
+#
+# con s(t) una trayectoria de un nodo aislado. El mayor exponente de
+# Lyapunov Lambda(alfa) de esa ecuación sólo depende del nodo y de H, así
+# que se calcula una vez para una rejilla de alfa y el estado sincronizado
+# de cualquier red (cualquier L) es estable para los 'a' con
+# Lambda(a * lambda_k) < 0 en todos los lambda_k != 0.
+#
+# Las ecuaciones variacionales de todos los alfa se integran juntas (un
+# solo s(t), una columna de xi por alfa) con renormalización cada TAU
+# (método de Benettin). El jacobiano del nodo es el analítico de
+# equation_compiler; si no se puede derivar, se estima por diferencias.
+# Tanto las ecuaciones variacionales como cada resultado se guardan en la
+# caché de ecuaciones (variantes "variacional" y ("msf", ...)), así que
+# repetir el cálculo para el mismo nodo (escrito de cualquier forma) es
+# inmediato.
+#
+# Pares de sistemas de siempre: x2 += a*(x1 - x2) es una red de 2 nodos
+# dirigida con lambda = 1; el acoplamiento simétrico a*(x2 - x1) en el 1 y
+# a*(x1 - x2) en el 2 tiene lambda = 2.
+
+T_TRANSITORIO = 100.0
+T_MEDIDA = 200.0
+TAU = 1.0
+RTOL = 1e-6
+ATOL = 1e-9
+
+# Autovalores de L del par de sistemas de siempre (ver arriba)
+AUTOVALORES_PAR = {"unidireccional": (1.0,), "bidireccional": (2.0,)}
+
+# Por encima de estos nodos sólo se calculan lambda_2 y lambda_max
+MAX_NODOS_DENSO = 2000
+
+
+class MSFCancelado(Exception):
+    pass
+
+
+class Variacional:
+    """
+    Lado derecho de un nodo y su jacobiano (d, d) denso.
+    """
+    def __init__(self, sistema):
+        self.sistema = sistema
+        self.var_names = sistema.var_names
+        self.d = len(sistema.var_names)
+        self.analitico = sistema.jac is not None
+
+    def rhs(self, t, s):
+        return np.asarray(self.sistema(t, s, 0.0), dtype=float)
+
+    def jacobiano(self, t, s):
+        if self.analitico:
+            J = self.sistema.jac(t, s, 0.0)
+            return J.toarray() if sparse.issparse(J) else np.asarray(J)
+        # Diferencias centradas
+        J = np.empty((self.d, self.d))
+        for j in range(self.d):
+            h = 1e-7 * max(1.0, abs(s[j]))
+            e = np.zeros(self.d)
+            e[j] = h
+            J[:, j] = (self.rhs(t, s + e) - self.rhs(t, s - e)) / (2 * h)
+        return J
+
+
+def compilar_variacional(nodo_code):
+    sistema = compilar_ecuaciones(nodo_code)
+    if sistema is None:
+        raise ValueError("El nodo no tiene la forma "
+                         "def sistema_dinamico(t, variables, a): ... return [...]")
+    return Variacional(sistema)
+
+
+def variacional(nodo_code):
+    return CACHE.obtener(nodo_code, compilar_variacional, variante="variacional")
+
+
+def indices_acoplados(variacional_, acoplamiento):
+    """
+    Índices de las componentes de acoplamiento ("x", "x,y"...) en el nodo.
+    """
+    comps = [network.componente(v) for v in variacional_.var_names]
+    indices = []
+    for c in str(acoplamiento).split(","):
+        c = c.strip()
+        if not c:
+            continue
+        if c not in comps:
+            raise ValueError(f"Componente de acoplamiento desconocida: {c}")
+        indices.append(comps.index(c))
+    if not indices:
+        raise ValueError("No hay componentes de acoplamiento")
+    return indices
+
+
+def calcular_msf(nodo_code, alfas, acoplamiento="x", init_values=None,
+                 t_transitorio=T_TRANSITORIO, t_medida=T_MEDIDA, tau=TAU,
+                 rtol=RTOL, atol=ATOL, cancelado=None, on_progress=None):
+    """
+    Mayor exponente de Lyapunov transversal Lambda(alfa) para cada alfa.
+    cancelado() se consulta tras cada renormalización (lanza MSFCancelado)
+    y on_progress(fraccion) informa del avance.
+    """
+    var = variacional(nodo_code)
+    d = var.d
+    alfas = np.asarray(alfas, dtype=float)
+    m = len(alfas)
+    h = np.zeros(d)
+    h[indices_acoplados(var, acoplamiento)] = 1.0
+
+    s0 = np.ones(d) if init_values is None else np.asarray(init_values, dtype=float)[:d]
+    if t_transitorio > 0:
+        sol = solve_ivp(lambda t, s: var.rhs(t, s), (0.0, t_transitorio), s0,
+                        rtol=rtol, atol=atol)
+        s0 = sol.y[:, -1]
+    if not np.all(np.isfinite(s0)):
+        raise ValueError("La trayectoria de referencia diverge")
+
+    def rhs(t, z):
+        s = z[:d]
+        X = z[d:].reshape(d, m)
+        dX = var.jacobiano(t, s) @ X - h[:, None] * X * alfas[None, :]
+        return np.concatenate([var.rhs(t, s), dX.ravel()])
+
+    # Misma perturbación inicial (unitaria) para todos los alfa
+    xi = np.random.default_rng(0).standard_normal(d)
+    X = np.repeat((xi / np.linalg.norm(xi))[:, None], m, axis=1)
+    suma = np.zeros(m)
+    n_pasos = max(1, int(round(t_medida / tau)))
+    t = 0.0
+    for paso in range(n_pasos):
+        if cancelado is not None and cancelado():
+            raise MSFCancelado()
+        sol = solve_ivp(rhs, (t, t + tau), np.concatenate([s0, X.ravel()]),
+                        rtol=rtol, atol=atol)
+        z = sol.y[:, -1]
+        if not sol.success or not np.all(np.isfinite(z)):
+            raise ValueError(f"Las ecuaciones variacionales divergen en t={t:g}")
+        s0 = z[:d]
+        X = z[d:].reshape(d, m)
+        normas = np.linalg.norm(X, axis=0)
+        suma += np.log(normas)
+        X = X / normas[None, :]
+        t += tau
+        if on_progress is not None:
+            on_progress((paso + 1) / n_pasos)
+    return suma / t
+
+
+def msf(nodo_code, alfas, acoplamiento="x", init_values=None, **opciones):
+    """
+    Como calcular_msf, pero guarda el resultado en la caché de ecuaciones
+    (por hash del nodo y parámetros). Devuelve un dict con "alfas",
+    "lyapunov" y "estables" (intervalos de alfa con Lambda < 0).
+    """
+    alfas = np.asarray(alfas, dtype=float)
+    init = None if init_values is None else tuple(float(v) for v in init_values)
+    claves = tuple(sorted((k, v) for k, v in opciones.items()
+                          if k not in ("cancelado", "on_progress")))
+    variante = ("msf", tuple(alfas.tolist()), str(acoplamiento), init, claves)
+
+    def calcular(codigo):
+        lyapunov = calcular_msf(codigo, alfas, acoplamiento, init, **opciones)
+        return {"alfas": alfas, "lyapunov": lyapunov,
+                "estables": intervalos_estables(alfas, lyapunov)}
+
+    return CACHE.obtener(nodo_code, calcular, variante=variante)
+
+
+def intervalos_estables(alfas, lyapunov):
+    """
+    Intervalos [alfa_ini, alfa_fin] de la rejilla donde Lambda < 0, con los
+    bordes interpolados linealmente entre puntos de la rejilla.
+    """
+    intervalos = []
+    inicio = None
+    for i, (alfa, lam) in enumerate(zip(alfas, lyapunov)):
+        estable = lam < 0
+        if estable and inicio is None:
+            inicio = alfa if i == 0 else _cero(alfas[i - 1], alfa, lyapunov[i - 1], lam)
+        elif not estable and inicio is not None:
+            intervalos.append((inicio, _cero(alfas[i - 1], alfa, lyapunov[i - 1], lam)))
+            inicio = None
+    if inicio is not None:
+        intervalos.append((inicio, alfas[-1]))
+    return [(float(a0), float(a1)) for a0, a1 in intervalos]
+
+
+def _cero(a0, a1, l0, l1):
+    if not (np.isfinite(l0) and np.isfinite(l1)) or l0 == l1:
+        return a1
+    return a0 + (a1 - a0) * l0 / (l0 - l1)
+
+
+def umbrales(estables, autovalores):
+    """
+    Intervalos de 'a' con el estado sincronizado estable: a * lambda_k en
+    algún intervalo de estables para todos los autovalores no nulos.
+    """
+    lambdas = [lam for lam in np.real(np.asarray(autovalores, dtype=complex)) if lam > 1e-10]
+    if not lambdas:
+        return []
+    resultado = None
+    for lam in lambdas:
+        propios = [(float(a0 / lam), float(a1 / lam)) for a0, a1 in estables]
+        resultado = propios if resultado is None else _interseccion(resultado, propios)
+    return resultado
+
+
+def _interseccion(u, v):
+    salida = []
+    for a0, a1 in u:
+        for b0, b1 in v:
+            inicio, fin = max(a0, b0), min(a1, b1)
+            if inicio < fin:
+                salida.append((float(inicio), float(fin)))
+    return salida
+
+
+def autovalores_red(red):
+    """
+    Autovalores del laplaciano de la red (todos, o sólo lambda_2 y
+    lambda_max en redes de más de MAX_NODOS_DENSO nodos, lo que basta si
+    la región estable es un solo intervalo).
+    """
+    L = network.laplaciano(network.adyacencia(red), bool(red["normalizar"]))
+    if L.shape[0] <= MAX_NODOS_DENSO:
+        return np.sort(np.real(np.linalg.eigvals(L.toarray())))
+    from scipy.sparse.linalg import eigs
+    extremos = np.real(np.concatenate([eigs(L, k=2, which="SR", return_eigenvectors=False),
+                                       eigs(L, k=1, which="LR", return_eigenvectors=False)]))
+    return np.sort(extremos)
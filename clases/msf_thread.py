@@ -0,0 +1,35 @@
+import threading
+from PyQt6 import QtCore
+from clases import msf
+
+class MSFThread(QtCore.QThread):
+    """
+    Calcula la función maestra de estabilidad (msf.msf) fuera del hilo de
+    la interfaz.
+    """
+    result_signal = QtCore.pyqtSignal(object)
+    progress_signal = QtCore.pyqtSignal(int)
+    error_signal = QtCore.pyqtSignal(str)
+
+    def __init__(self, nodo_code, alfas, acoplamiento="x", init_values=None, parent=None):
+        super().__init__(parent)
+        self.nodo_code = nodo_code
+        self.alfas = alfas
+        self.acoplamiento = acoplamiento
+        self.init_values = init_values
+        self._cancelado = threading.Event()
+
+    def cancel(self):
+        self._cancelado.set()
+
+    def run(self):
+        try:
+            resultado = msf.msf(self.nodo_code, self.alfas, self.acoplamiento, self.init_values,
+                                cancelado=self._cancelado.is_set,
+                                on_progress=lambda f: self.progress_signal.emit(int(100 * f)))
+        except msf.MSFCancelado:
+            return
+        except Exception as e:
+            self.error_signal.emit(f"Error calculando la MSF: {e}")
+            return
+        self.result_signal.emit(resultado)
@@ -0,0 +1,311 @@
+import ast
+import os
+import re
+import numpy as np
+from scipy import sparse
+
+from clases.equation_compiler import (N_MIN_DISPERSO, NoDiferenciable, derivar,
+                                      nombres_usados, parse_eq_code)
+
+# Redes de N nodos idénticos acoplados. El eq_code de una red es el sistema
+# de un nodo precedido de una línea con la descripción de la red:
+#
+#     RED = {"nodos": 100, "topologia": "anillo", "k": 1, "acoplamiento": "x"}
+#     def sistema_dinamico(t, variables, a):
+#         x, y, z = variables
+#         return [-y - z, x + 0.2*y, 0.2 + z*(x - 5.7)]
+#
+# y el sistema completo es
+#
+#     dX_i/dt = F(X_i) + a * sum_j A_ij (H X_j - H X_i) = F(X_i) - a (L ⊗ H) X
+#
+# con A la matriz de adyacencia (dispersa), L = D - A su laplaciano y H la
+# diagonal que elige las componentes acopladas. Las variables van nodo a
+# nodo (x1, y1, z1, x2, y2, z2, ...), igual que en el par de sistemas de
+# siempre, que es la red de 2 nodos. El lado derecho evalúa las ecuaciones
+# del nodo una vez para todos los nodos (arrays de N) y el acoplamiento es
+# un producto disperso, así que el coste crece con nodos + aristas y no hay
+# bucles de Python por nodo. El jacobiano (disperso) es diagonal por bloques
+# más -a (L ⊗ H).
+#
+# Claves de RED:
+#   nodos, topologia ("anillo", "aleatoria", "completa", "archivo"),
+#   k (vecinos a cada lado en el anillo), p y semilla (grafo aleatorio
+#   G(N, p)), archivo (matriz de adyacencia .npz de scipy.sparse, .npy o
+#   texto), acoplamiento (componentes acopladas, p. ej. "x" o "x,y"),
+#   normalizar (dividir el acoplamiento de cada nodo por su grado),
+#   ci_semilla y ci_escala (condiciones iniciales aleatorias, uniformes en
+#   [-ci_escala, ci_escala], para las variables que no se den en info.txt).
+
+TOPOLOGIAS = ("anillo", "aleatoria", "completa", "archivo")
+COMPONENTES = ("x", "y", "z")
+
+RED_DEFECTO = {
+    "nodos": 2,
+    "topologia": "anillo",
+    "k": 1,
+    "p": 0.1,
+    "semilla": 0,
+    "acoplamiento": "x",
+    "normalizar": False,
+}
+
+
+def componente(var_name):
+    """
+    Nombre de la componente de una variable de nodo ("x1" -> "x").
+    """
+    return re.sub(r"\d+$", "", var_name)
+
+
+def codigo_red(red, nodo_code):
+    """
+    eq_code de una red a partir de su descripción y del sistema de un nodo.
+    """
+    # Literal de Python (no JSON) para que leer_red lo lea con literal_eval
+    literal = ", ".join(f"{clave!r}: {red[clave]!r}" for clave in sorted(red))
+    return "RED = {" + literal + "}\n" + nodo_code.strip()
+
+
+def leer_red(eq_code):
+    """
+    (red, nodo_code) de un eq_code de red, o None si eq_code no lo es.
+    """
+    try:
+        modulo = ast.parse(eq_code)
+    except SyntaxError:
+        return None
+    if len(modulo.body) < 2:
+        return None
+    primera = modulo.body[0]
+    if not (isinstance(primera, ast.Assign) and len(primera.targets) == 1
+            and isinstance(primera.targets[0], ast.Name) and primera.targets[0].id == "RED"):
+        return None
+    try:
+        red = dict(RED_DEFECTO, **ast.literal_eval(primera.value))
+    except (ValueError, TypeError):
+        return None
+    return red, ast.unparse(ast.Module(body=modulo.body[1:], type_ignores=[]))
+
+
+def es_red(eq_code):
+    return leer_red(eq_code) is not None
+
+
+def componentes(eq_code):
+    """
+    Componentes de cada nodo del sistema de eq_code (("x", "y", "z") para
+    el par de sistemas de siempre).
+    """
+    partes = leer_red(eq_code)
+    if partes is None:
+        return COMPONENTES
+    nodo = parse_eq_code(partes[1])
+    if nodo is None:
+        return COMPONENTES
+    return tuple(componente(v) for v in nodo[0])
+
+
+def adyacencia(red):
+    """
+    Matriz de adyacencia (N, N) dispersa (csr) de la red.
+    """
+    n = int(red["nodos"])
+    topologia = red["topologia"]
+    if topologia == "anillo":
+        k = max(1, int(red["k"]))
+        i = np.repeat(np.arange(n), 2 * k)
+        saltos = np.tile(np.concatenate([np.arange(1, k + 1), -np.arange(1, k + 1)]), n)
+        j = (i + saltos) % n
+        A = sparse.csr_matrix((np.ones(len(i)), (i, j)), shape=(n, n))
+        A.data[:] = 1.0
+    elif topologia == "aleatoria":
+        rng = np.random.default_rng(int(red["semilla"]))
+        i, j = np.triu_indices(n, 1)
+        arista = rng.random(len(i)) < float(red["p"])
+        i, j = i[arista], j[arista]
+        A = sparse.csr_matrix((np.ones(2 * len(i)), (np.concatenate([i, j]), np.concatenate([j, i]))),
+                              shape=(n, n))
+    elif topologia == "completa":
+        A = sparse.csr_matrix(np.ones((n, n)) - np.eye(n))
+    elif topologia == "archivo":
+        path = red["archivo"]
+        if path.endswith(".npz"):
+            A = sparse.load_npz(path).tocsr()
+        elif path.endswith(".npy"):
+            A = sparse.csr_matrix(np.load(path))
+        else:
+            A = sparse.csr_matrix(np.loadtxt(path, ndmin=2))
+        if A.shape != (n, n):
+            raise ValueError(f"La matriz de {path} es {A.shape[0]}x{A.shape[1]} y la red tiene {n} nodos")
+    else:
+        raise ValueError(f"Topología desconocida: {topologia}")
+    A.setdiag(0)
+    A.eliminate_zeros()
+    return A
+
+
+def laplaciano(A, normalizar=False):
+    """
+    L = D - A (o D^-1 L si normalizar), con D los grados.
+    """
+    grados = np.asarray(A.sum(axis=1)).ravel()
+    L = sparse.diags(grados) - A
+    if normalizar:
+        with np.errstate(divide="ignore"):
+            inversos = np.where(grados > 0, 1.0 / grados, 0.0)
+        L = sparse.diags(inversos) @ L
+    return sparse.csr_matrix(L)
+
+
+class RedCompilada:
+    """
+    Lado derecho vectorizado y jacobiano disperso de una red. Se llama
+    como sistema_dinamico(t, variables, a), con variables de forma
+    (N*d,) o (N*d, k), y tiene los mismos atributos que
+    equation_compiler.SistemaCompilado (var_names, vectorized, sparsity,
+    disperso, jac).
+    """
+    vectorized = True
+
+    def __init__(self, red, var_nodo, expresiones):
+        self.red = red
+        self.n_nodos = n = int(red["nodos"])
+        self.componentes = tuple(componente(v) for v in var_nodo)
+        self.d = d = len(var_nodo)
+        self.var_names = [f"{c}{i + 1}" for i in range(n) for c in self.componentes]
+        self.expresiones = [ast.unparse(e) for e in expresiones]
+
+        acopladas = [c.strip() for c in str(red["acoplamiento"]).split(",") if c.strip()]
+        for c in acopladas:
+            if c not in self.componentes:
+                raise ValueError(f"Componente de acoplamiento desconocida: {c}")
+        self.acopladas = [self.componentes.index(c) for c in acopladas]
+
+        self.A = adyacencia(red)
+        self.L = laplaciano(self.A, bool(red["normalizar"]))
+        H = sparse.diags([1.0 if c in self.acopladas else 0.0 for c in range(d)])
+        self.K = sparse.csc_matrix(sparse.kron(self.L, H))
+
+        cabecera = ["def {nombre}(t, variables, a):",
+                    "    " + ", ".join(var_nodo) + (" = variables" if d > 1 else ", = variables")]
+        codigo_rhs = "\n".join(cabecera).format(nombre="rhs") + \
+            "\n    return [" + ", ".join(self.expresiones) + "]"
+        self._entorno = {"np": np}
+        exec(codigo_rhs, self._entorno)
+        self._rhs = self._entorno["rhs"]
+
+        # Jacobiano de un nodo: (fila, columna, expresión) de las entradas no nulas
+        filas, columnas = [], []
+        for fi, expr in enumerate(expresiones):
+            usadas = nombres_usados(expr)
+            for fj, var in enumerate(var_nodo):
+                if var in usadas:
+                    filas.append(fi)
+                    columnas.append(fj)
+        bloque = sparse.csr_matrix((np.ones(len(filas)), (filas, columnas)), shape=(d, d))
+        patron = sparse.kron(sparse.eye(n), bloque) + abs(self.K)
+        self.sparsity = sparse.csc_matrix((patron != 0).astype(float))
+        self.disperso = n * d >= N_MIN_DISPERSO
+
+        self.jac = None
+        try:
+            entradas = []
+            for fi, fj in zip(filas, columnas):
+                dexpr = ast.unparse(derivar(expresiones[fi], var_nodo[fj]))
+                if dexpr != "0":
+                    entradas.append((fi, fj, dexpr))
+        except NoDiferenciable:
+            return
+        base = np.arange(n) * d
+        self.jac_filas = np.concatenate([base + fi for fi, _, _ in entradas]) if entradas \
+            else np.zeros(0, dtype=int)
+        self.jac_columnas = np.concatenate([base + fj for _, fj, _ in entradas]) if entradas \
+            else np.zeros(0, dtype=int)
+        codigo_jac = "\n".join(cabecera).format(nombre="jac") + \
+            "\n    return [" + ", ".join(e[2] for e in entradas) + "]"
+        exec(codigo_jac, self._entorno)
+        self._jac = self._entorno["jac"]
+        self.jac = self.jacobiano
+
+    def _por_componente(self, variables):
+        # (N*d, ...) -> (d, N, ...): cada componente como array de todos los nodos
+        variables = np.asarray(variables, dtype=float)
+        return variables.reshape((self.n_nodos, self.d) + variables.shape[1:]).swapaxes(0, 1)
+
+    def __call__(self, t, variables, a):
+        V = self._por_componente(variables)
+        forma = V.shape[1:]
+        dV = np.stack([np.broadcast_to(np.asarray(v, dtype=float), forma)
+                       for v in self._rhs(t, V, a)])
+        for c in self.acopladas:
+            # a puede ser un array (un valor por miembro del lote del ensemble)
+            dV[c] = dV[c] - np.asarray(a) * (self.L @ V[c])
+        return dV.swapaxes(0, 1).reshape(np.shape(variables))
+
+    def jacobiano(self, t, y, a):
+        n = self.n_nodos * self.d
+        V = self._por_componente(y)
+        valores = [np.broadcast_to(np.asarray(v, dtype=float), (self.n_nodos,))
+                   for v in self._jac(t, V, a)]
+        valores = np.concatenate(valores) if valores else np.zeros(0)
+        J = sparse.csc_matrix((valores, (self.jac_filas, self.jac_columnas)), shape=(n, n)) \
+            - a * self.K
+        return sparse.csc_matrix(J) if self.disperso else J.toarray()
+
+
+def compilar_red(eq_code):
+    """
+    RedCompilada de un eq_code de red, o None si eq_code no lo es.
+    """
+    partes = leer_red(eq_code)
+    if partes is None:
+        return None
+    red, nodo_code = partes
+    nodo = parse_eq_code(nodo_code)
+    if nodo is None:
+        raise ValueError("El sistema de los nodos no tiene la forma "
+                         "def sistema_dinamico(t, variables, a): ... return [...]")
+    return RedCompilada(red, *nodo)
+
+
+def condiciones_iniciales(red, n_componentes, dadas):
+    """
+    Vector (N*d,) de condiciones iniciales: las de dadas (dict
+    (nodo, componente) -> valor, ambos desde 0) y, para el resto, 0.0 o
+    valores aleatorios reproducibles si la red tiene ci_semilla.
+    """
+    n = int(red["nodos"])
+    if "ci_semilla" in red:
+        escala = float(red.get("ci_escala", 1.0))
+        valores = np.random.default_rng(int(red["ci_semilla"])).uniform(
+            -escala, escala, n * n_componentes)
+    else:
+        valores = np.zeros(n * n_componentes)
+    for (nodo, c), valor in dadas.items():
+        if nodo < n and c < n_componentes:
+            valores[nodo * n_componentes + c] = valor
+    return valores.tolist()
+
+
+def escribir_info(subdir, resta, a_start, a_stop, a_step, nodo_code, red, init_values=None):
+    """
+    Escribe el info.txt de una resta sobre una red (init_values: las
+    condiciones iniciales de los primeros nodos, nodo a nodo).
+    """
+    os.makedirs(subdir, exist_ok=True)
+    nodo = parse_eq_code(nodo_code)
+    comps = [componente(v) for v in nodo[0]] if nodo else list(COMPONENTES)
+    with open(os.path.join(subdir, "info.txt"), "w", encoding="utf-8") as f:
+        f.write(f"Resta: {resta}\n")
+        f.write(f"a_start = {a_start}\n")
+        f.write(f"a_stop = {a_stop}\n")
+        f.write(f"a_step = {a_step}\n\n")
+        f.write("Red:\n")
+        for clave, valor in sorted(red.items()):
+            f.write(f"{clave} = {valor}\n")
+        f.write("\nEcuaciones:\n")
+        f.write(nodo_code.strip() + "\n\n")
+        f.write("CondicionesIniciales:\n")
+        for i, valor in enumerate(init_values or []):
+            f.write(f"{comps[i % len(comps)]}{i // len(comps) + 1} = {valor}\n")
@@ -1,81 +1,307 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog
 from matplotlib.figure import Figure
+import os
 import numpy as np
 
+from clases import sweep2d
+
+# Gráficas en vivo con pyqtgraph: las curvas se crean una vez y después sólo
+# se actualizan con setData (con submuestreo automático y recorte a la vista
+# para trayectorias largas). matplotlib queda para exportar figuras y como
+# respaldo si pyqtgraph (o su parte OpenGL, para la vista 3D) no está.
+try:
+    import pyqtgraph as pg
+except ImportError:
+    pg = None
+
+try:
+    import pyqtgraph.opengl as gl
+except Exception:
+    gl = None
+
+# En redes de muchos nodos sólo se dibujan las primeras variables
+MAX_SERIES = 12
+
+
+def figura_matplotlib(results, figsize=(10, 4)):
+    """
+    Figura de matplotlib (evolución temporal y espacio de fases 3D) con las
+    soluciones de results, para exportar.
+    """
+    fig = Figure(figsize=figsize)
+    ax_2d = fig.add_subplot(1, 2, 1)
+    ax_3d = fig.add_subplot(1, 2, 2, projection='3d')
+    dibujar_matplotlib(ax_2d, ax_3d, results)
+    fig.tight_layout()
+    return fig
+
+
+def dibujar_matplotlib(ax_2d, ax_3d, results):
+    ax_2d.clear()
+    ax_3d.clear()
+    for sol in results:
+        if sol and sol.success:
+            t = sol.t
+            y = sol.y
+
+            # Gráfica 2D
+            for i in range(min(y.shape[0], MAX_SERIES)):
+                ax_2d.plot(t, y[i], label=f'y_{i+1}(t)')
+
+            # Gráfica 3D
+            if y.shape[0] >= 3:
+                ax_3d.plot(y[0], y[1], y[2])
+
+    ax_2d.set_xlabel("Tiempo")
+    ax_2d.set_ylabel("Valor")
+    ax_2d.set_title("Evolución de las Variables")
+    if ax_2d.lines:
+        ax_2d.legend()
+    ax_2d.grid(True)
+
+    ax_3d.set_xlabel("X")
+    ax_3d.set_ylabel("Y")
+    ax_3d.set_zlabel("Z")
+    ax_3d.set_title("Espacio de Fases 3D")
+
+
 class PanelGraficas(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.layout = QVBoxLayout(self)
-        
+        # Últimas soluciones dibujadas (para exportar)
+        self.results = []
+        # Mapa de calor del barrido 2d y curva de la MSF (se crean la
+        # primera vez que se usan)
+        self.mapa = None
+        self.grafica_msf = None
+
+        if pg is not None:
+            self._crear_pyqtgraph()
+        else:
+            self._crear_matplotlib()
+
+        botones = QHBoxLayout()
+        botones.addStretch()
+        self.exportButton = QPushButton("Exportar figura...")
+        self.exportButton.clicked.connect(self.onExportar)
+        botones.addWidget(self.exportButton)
+        self.layout.addLayout(botones)
+
+    def _crear_pyqtgraph(self):
+        self.plot_2d = pg.PlotWidget(title="Evolución de las Variables")
+        self.plot_2d.setLabel("bottom", "Tiempo")
+        self.plot_2d.setLabel("left", "Valor")
+        self.plot_2d.showGrid(x=True, y=True)
+        self.plot_2d.addLegend()
+        self.curvas_2d = []
+        self.layout.addWidget(self.plot_2d)
+
+        if gl is not None:
+            self.view_3d = gl.GLViewWidget()
+            self.view_3d.setCameraPosition(distance=80)
+            axis = gl.GLAxisItem()
+            axis.setSize(10, 10, 10)
+            self.view_3d.addItem(axis)
+            self.curvas_3d = []
+            self.layout.addWidget(self.view_3d)
+        else:
+            # Sin OpenGL: proyección X-Y del espacio de fases
+            self.view_3d = None
+            self.plot_fases = pg.PlotWidget(title="Espacio de Fases (X, Y)")
+            self.plot_fases.setLabel("bottom", "X")
+            self.plot_fases.setLabel("left", "Y")
+            self.curvas_3d = []
+            self.layout.addWidget(self.plot_fases)
+
+    def _crear_matplotlib(self):
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+
         self.canvas_2d = FigureCanvas(Figure(figsize=(5, 4)))
         self.ax_2d = self.canvas_2d.figure.subplots()
-        self.ax_2d.set_xlabel("Tiempo")
-        self.ax_2d.set_ylabel("Valor")
-        self.ax_2d.set_title("Evolución de las Variables")
-        self.ax_2d.grid(True)
-        
         self.canvas_3d = FigureCanvas(Figure(figsize=(5, 4)))
         self.ax_3d = self.canvas_3d.figure.add_subplot(111, projection='3d')
-        self.ax_3d.set_xlabel("X")
-        self.ax_3d.set_ylabel("Y")
-        self.ax_3d.set_zlabel("Z")
-        self.ax_3d.set_title("Espacio de Fases 3D")
+        dibujar_matplotlib(self.ax_2d, self.ax_3d, [])
 
         self.layout.addWidget(self.canvas_2d)
         self.layout.addWidget(self.canvas_3d)
 
-    def plot_simulation_batch(self, results):
-        self.ax_2d.clear()
-        self.ax_3d.clear()
+    def _curva_2d(self, i, n):
+        while len(self.curvas_2d) <= i:
+            k = len(self.curvas_2d)
+            curva = self.plot_2d.plot(pen=pg.mkPen(pg.intColor(k, hues=max(n, 6)), width=1),
+                                      name=f'y_{k+1}(t)')
+            curva.setDownsampling(auto=True, method='peak')
+            curva.setClipToView(True)
+            self.curvas_2d.append(curva)
+        return self.curvas_2d[i]
+
+    def _curva_3d(self, i):
+        while len(self.curvas_3d) <= i:
+            if self.view_3d is not None:
+                curva = gl.GLLinePlotItem(pos=np.zeros((1, 3)), color=(1, 1, 1, 1),
+                                          width=1.0, antialias=True)
+                self.view_3d.addItem(curva)
+            else:
+                curva = self.plot_fases.plot(pen=pg.mkPen('w', width=1))
+                curva.setDownsampling(auto=True, method='peak')
+                curva.setClipToView(True)
+            self.curvas_3d.append(curva)
+        return self.curvas_3d[i]
 
+    def _vaciar(self, curva):
+        if isinstance(curva, pg.PlotDataItem):
+            curva.setData([], [])
+        else:
+            curva.setVisible(False)
+
+    def plot_simulation_batch(self, results):
         # results can be a single sol object or a list of sol objects
         if not isinstance(results, list):
             results = [results]
+        self.results = [sol for sol in results if sol and sol.success]
+
+        if pg is None:
+            dibujar_matplotlib(self.ax_2d, self.ax_3d, self.results)
+            self.canvas_2d.draw()
+            self.canvas_3d.draw()
+            return
+
+        n_2d = sum(min(sol.y.shape[0], MAX_SERIES) for sol in self.results)
+        i_2d = i_3d = 0
+        for sol in self.results:
+            t = np.asarray(sol.t)
+            y = np.asarray(sol.y)
+            for fila in y[:MAX_SERIES]:
+                self._curva_2d(i_2d, n_2d).setData(t, fila)
+                i_2d += 1
+            if y.shape[0] >= 3:
+                curva = self._curva_3d(i_3d)
+                if self.view_3d is not None:
+                    curva.setData(pos=np.ascontiguousarray(y[:3].T))
+                    curva.setVisible(True)
+                else:
+                    curva.setData(y[0], y[1])
+                i_3d += 1
+
+        # Curvas sobrantes de dibujos anteriores con más series
+        for curva in self.curvas_2d[i_2d:]:
+            self._vaciar(curva)
+        for curva in self.curvas_3d[i_3d:]:
+            self._vaciar(curva)
+
+    def plot_mapa_subcarpeta(self, subdir):
+        """
+        Dibuja el mapa2d.npy de una subcarpeta (sólo lee esa matriz, no
+        las ventanas del barrido).
+        """
+        datos = sweep2d.leer_mapa(subdir)
+        if datos is None:
+            return
+        a_values, p_values, nombre, matriz = datos
+        self.plot_mapa(a_values, p_values, matriz, nombre, os.path.basename(subdir))
+
+    def plot_mapa(self, a_values, p_values, matriz, nombre="p2", titulo=""):
+        """
+        Mapa de calor de log10 de la métrica (N_p2, N_a): 'a' en horizontal
+        y el segundo parámetro en vertical. Las celdas sin calcular (NaN)
+        quedan en blanco.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            valores = np.log10(np.asarray(matriz, dtype=float))
+        valores[~np.isfinite(valores)] = np.nan
+        finitos = valores[np.isfinite(valores)]
+        niveles = (finitos.min(), finitos.max()) if finitos.size else (0.0, 1.0)
+        # Extensión de las celdas: cada valor de la rejilla en el centro de la suya
+        da = a_values[1] - a_values[0] if len(a_values) > 1 else 1.0
+        dp = p_values[1] - p_values[0] if len(p_values) > 1 else 1.0
+        extension = (a_values[0] - da / 2, p_values[0] - dp / 2,
+                     da * len(a_values), dp * len(p_values))
+        titulo = f"log10 error de sincronización {titulo}".strip()
 
-        for sol in results:
-            if sol and sol.success:
-                t = sol.t
-                y = sol.y
-                
-                # Gráfica 2D
-                for i in range(y.shape[0]):
-                    self.ax_2d.plot(t, y[i], label=f'y_{i+1}(t)')
-
-                # Gráfica 3D
-                if y.shape[0] >= 3:
-                    self.ax_3d.plot(y[0], y[1], y[2])
-
-        self.ax_2d.legend()
-        self.ax_2d.grid(True)
-        self.canvas_2d.draw()
-
-        self.ax_3d.set_xlabel("X")
-        self.ax_3d.set_ylabel("Y")
-        self.ax_3d.set_zlabel("Z")
-        self.ax_3d.set_title("Espacio de Fases 3D")
-        self.canvas_3d.draw()
+        if pg is None:
+            self._mapa_matplotlib(valores, niveles, extension, nombre, titulo)
+            return
+        if self.mapa is None:
+            self.mapa = pg.PlotWidget()
+            self.mapa.setLabel("bottom", "a")
+            self.imagen_mapa = pg.ImageItem(axisOrder='row-major')
+            self.imagen_mapa.setColorMap(pg.colormap.get("viridis"))
+            self.mapa.addItem(self.imagen_mapa)
+            self.layout.insertWidget(self.layout.count() - 1, self.mapa)
+        self.mapa.setTitle(titulo)
+        self.mapa.setLabel("left", nombre)
+        self.imagen_mapa.setImage(valores, levels=niveles)
+        self.imagen_mapa.setRect(pg.QtCore.QRectF(*extension))
+
+    def _mapa_matplotlib(self, valores, niveles, extension, nombre, titulo):
+        from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+
+        if self.mapa is None:
+            self.mapa = FigureCanvas(Figure(figsize=(5, 4)))
+            self.layout.insertWidget(self.layout.count() - 1, self.mapa)
+        fig = self.mapa.figure
+        fig.clear()
+        ax = fig.subplots()
+        x0, y0, ancho, alto = extension
+        imagen = ax.imshow(valores, origin="lower", aspect="auto", vmin=niveles[0],
+                           vmax=niveles[1], extent=(x0, x0 + ancho, y0, y0 + alto))
+        fig.colorbar(imagen, ax=ax)
+        ax.set_xlabel("a")
+        ax.set_ylabel(nombre)
+        ax.set_title(titulo)
+        self.mapa.draw()
+
+    def plot_msf(self, alfas, lyapunov):
+        """
+        Función maestra de estabilidad: mayor exponente de Lyapunov
+        transversal frente a alfa, con la línea de estabilidad en 0.
+        """
+        alfas = np.asarray(alfas, dtype=float)
+        lyapunov = np.asarray(lyapunov, dtype=float)
+        if pg is None:
+            from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg as FigureCanvas
+
+            if self.grafica_msf is None:
+                self.grafica_msf = FigureCanvas(Figure(figsize=(5, 3)))
+                self.layout.insertWidget(self.layout.count() - 1, self.grafica_msf)
+            fig = self.grafica_msf.figure
+            fig.clear()
+            ax = fig.subplots()
+            ax.plot(alfas, lyapunov, marker=".")
+            ax.axhline(0.0, color="gray", linestyle="--")
+            ax.set_xlabel("alfa = a·lambda")
+            ax.set_ylabel("Lambda máx")
+            ax.set_title("Función maestra de estabilidad")
+            ax.grid(True)
+            self.grafica_msf.draw()
+            return
+
+        if self.grafica_msf is None:
+            self.grafica_msf = pg.PlotWidget(title="Función maestra de estabilidad")
+            self.grafica_msf.setLabel("bottom", "alfa = a·lambda")
+            self.grafica_msf.setLabel("left", "Lambda máx")
+            self.grafica_msf.showGrid(x=True, y=True)
+            self.grafica_msf.addLine(y=0.0, pen=pg.mkPen("gray", style=pg.QtCore.Qt.PenStyle.DashLine))
+            self.curva_msf = self.grafica_msf.plot(pen=pg.mkPen("y", width=2), symbol="o",
+                                                   symbolSize=4)
+            self.layout.insertWidget(self.layout.count() - 1, self.grafica_msf)
+        self.curva_msf.setData(alfas, lyapunov)
 
     def plot_simulation(self, sol):
         if sol and sol.success:
-            self.ax_2d.clear()
-            self.ax_3d.clear()
-            
-            t = sol.t
-            y = sol.y
+            self.plot_simulation_batch(sol)
 
-            # Gráfica 2D
-            for i in range(y.shape[0]):
-                self.ax_2d.plot(t, y[i], label=f'y_{i+1}(t)')
-            self.ax_2d.legend()
-            self.ax_2d.grid(True)
-            self.canvas_2d.draw()
+    def onExportar(self):
+        if not self.results:
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "Exportar figura", "",
+                                              "PNG (*.png);;PDF (*.pdf);;SVG (*.svg)")
+        if path:
+            self.exportar(path)
 
-            # Gráfica 3D
-            if y.shape[0] >= 3:
-                self.ax_3d.plot(y[0], y[1], y[2])
-                self.ax_3d.set_xlabel("X")
-                self.ax_3d.set_ylabel("Y")
-                self.ax_3d.set_zlabel("Z")
-                self.ax_3d.set_title("Espacio de Fases 3D")
-                self.canvas_3d.draw()
\ No newline at end of file
+    def exportar(self, path, dpi=300):
+        """
+        Guarda con matplotlib las últimas soluciones dibujadas.
+        """
+        figura_matplotlib(self.results).savefig(path, dpi=dpi)
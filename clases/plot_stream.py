@@ -0,0 +1,59 @@
+import threading
+import numpy as np
+
+# Canal de resultados hacia las gráficas durante un barrido. El hilo de
+# cálculo publica cada solución, pero sólo se conserva la última (las que
+# no llegan a dibujarse se descartan) y ya recortada a lo que se dibuja:
+# unos pocos miles de puntos de t e y, sin la salida densa ni el resto del
+# OdeResult. El hilo de la interfaz la recoge a su ritmo (ver BatchThread).
+
+MAX_PUNTOS = 2000
+REFRESCO_HZ = 10.0
+
+
+class MuestraGrafica:
+    """
+    Lo mínimo de una solución que necesita PanelGraficas: t, y, success.
+    """
+    def __init__(self, t, y, success=True, a=None):
+        self.t = t
+        self.y = y
+        self.success = success
+        self.a = a
+
+
+def decimar(sol, max_puntos=MAX_PUNTOS, a=None):
+    """
+    MuestraGrafica con, como mucho, max_puntos instantes de sol (siempre
+    incluye el primero y el último).
+    """
+    t = np.asarray(sol.t)
+    y = np.asarray(sol.y)
+    if len(t) > max_puntos:
+        idx = np.unique(np.linspace(0, len(t) - 1, max_puntos).round().astype(int))
+        t, y = t[idx], y[:, idx]
+    return MuestraGrafica(np.array(t), np.array(y), bool(sol.success), a)
+
+
+class CanalUltimoValor:
+    """
+    Buzón de un solo elemento, seguro entre hilos: publicar sustituye lo
+    que hubiera y tomar lo devuelve y lo vacía (None si no hay nada nuevo).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._valor = None
+        self.publicados = 0
+        self.descartados = 0
+
+    def publicar(self, valor):
+        with self._lock:
+            if self._valor is not None:
+                self.descartados += 1
+            self._valor = valor
+            self.publicados += 1
+
+    def tomar(self):
+        with self._lock:
+            valor, self._valor = self._valor, None
+            return valor
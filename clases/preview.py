@@ -0,0 +1,48 @@
+import time
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from clases.sweep_engine import compilar_sistema
+
+# Vista previa de las ecuaciones mientras se escriben: una integración corta
+# que se puede cancelar (cuando llega un texto más nuevo) y que tiene un
+# presupuesto de tiempo, para que una ecuación rígida o a medio escribir no
+# deje el hilo ocupado. solve_ivp no se puede interrumpir desde fuera, así
+# que la comprobación se hace en cada evaluación del lado derecho.
+
+T_SPAN_PREVIEW = (0, 5)
+N_PUNTOS_PREVIEW = 200
+PRESUPUESTO_PREVIEW = 2.0   # segundos
+DEBOUNCE_MS = 300
+
+
+class PreviewCancelado(Exception):
+    pass
+
+
+class PresupuestoAgotado(PreviewCancelado):
+    pass
+
+
+def simular_preview(eq_code, init_values, a_param=0.0, t_span=T_SPAN_PREVIEW,
+                    n_puntos=N_PUNTOS_PREVIEW, presupuesto=PRESUPUESTO_PREVIEW,
+                    cancelado=None):
+    """
+    Integra eq_code en t_span con a=a_param y devuelve el OdeResult.
+    cancelado() se consulta en cada evaluación; si devuelve True se lanza
+    PreviewCancelado, y si se superan presupuesto segundos,
+    PresupuestoAgotado. Los errores de las ecuaciones se propagan.
+    """
+    limite = time.monotonic() + presupuesto
+    sistema_dinamico = compilar_sistema(eq_code)
+
+    def vigilado(t, variables, a):
+        if cancelado is not None and cancelado():
+            raise PreviewCancelado()
+        if time.monotonic() > limite:
+            raise PresupuestoAgotado(f"la simulación superó {presupuesto:g} s")
+        return sistema_dinamico(t, variables, a)
+
+    t_eval = np.linspace(t_span[0], t_span[1], n_puntos)
+    with np.errstate(all='ignore'):
+        return solve_ivp(vigilado, t_span, init_values, t_eval=t_eval, args=(a_param,))
@@ -0,0 +1,37 @@
+import threading
+from PyQt6 import QtCore
+from clases.preview import simular_preview, PreviewCancelado, PresupuestoAgotado
+
+class PreviewThread(QtCore.QThread):
+    """
+    Ejecuta simular_preview fuera del hilo de la interfaz. generacion
+    identifica la petición, para que quien la lanzó descarte los resultados
+    de textos que ya se han sustituido.
+    """
+    result_signal = QtCore.pyqtSignal(int, object)
+    error_signal = QtCore.pyqtSignal(int, str)
+
+    def __init__(self, generacion, eq_code, init_values, a_param=0.0, parent=None):
+        super().__init__(parent)
+        self.generacion = generacion
+        self.eq_code = eq_code
+        self.init_values = init_values
+        self.a_param = a_param
+        self._cancelado = threading.Event()
+
+    def cancel(self):
+        self._cancelado.set()
+
+    def run(self):
+        try:
+            sol = simular_preview(self.eq_code, self.init_values, self.a_param,
+                                  cancelado=self._cancelado.is_set)
+        except PresupuestoAgotado as e:
+            self.error_signal.emit(self.generacion, f"Vista previa interrumpida: {e}")
+            return
+        except PreviewCancelado:
+            return
+        except Exception as e:
+            self.error_signal.emit(self.generacion, f"Error en la vista previa: {e}")
+            return
+        self.result_signal.emit(self.generacion, sol)
@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Tiempo acumulado por etapa del barrido. Mientras haya un TiemposEtapas
+# activo (activar/desactivar), cada "with etapa(nombre):" del motor suma su
+# duración; si no hay ninguno, etapa() no hace nada. Los workers miden con
+# su propio TiemposEtapas y lo devuelven junto con el bloque.
+#
+# Con eventos=True además se guarda un registro por cada etapa medida, con
+# su inicio, duración, proceso y los datos que le pase el motor ('a',
+# resta, nfev/njev/nlu, pasos del solver...). exportar_jsonl y
+# exportar_chrome los vuelcan a disco (el segundo en el formato de trazas
+# de Chrome, que abren chrome://tracing y Perfetto) y resumen() da las
+# líneas que se muestran al terminar un barrido.
+#
+# El TiemposEtapas activo es de cada hilo: lo que midan otros hilos (p. ej.
+# la vista previa o el MSF de la interfaz mientras un BatchThread perfila
+# su barrido) no entra en el perfil del barrido ni ve su contexto.
+
+ETAPAS = ("lectura", "compilacion", "integracion", "extraccion", "escritura")
+
+
+class TiemposEtapas:
+    def __init__(self, eventos=False):
+        self.segundos = {}
+        self.llamadas = {}
+        self.eventos = [] if eventos else None
+        # Datos que se añaden a todos los eventos (ver contexto())
+        self.contexto = {}
+
+    def sumar(self, nombre, segundos, llamadas=1):
+        self.segundos[nombre] = self.segundos.get(nombre, 0.0) + segundos
+        self.llamadas[nombre] = self.llamadas.get(nombre, 0) + llamadas
+
+    def registrar(self, nombre, inicio, segundos, datos):
+        if self.eventos is None:
+            return
+        evento = {"etapa": nombre, "inicio": inicio, "segundos": segundos, "pid": os.getpid()}
+        evento.update(self.contexto)
+        evento.update(datos)
+        self.eventos.append(evento)
+
+    def combinar(self, otro, **extra):
+        """
+        Suma otro TiemposEtapas (o su como_dict(), sin eventos). Los eventos
+        del otro se añaden con los campos de extra.
+        """
+        if isinstance(otro, TiemposEtapas):
+            if self.eventos is not None and otro.eventos:
+                for evento in otro.eventos:
+                    evento = dict(evento)
+                    evento.update(self.contexto)
+                    evento.update(extra)
+                    self.eventos.append(evento)
+            otro = otro.como_dict()
+        for nombre, datos in otro.items():
+            self.sumar(nombre, datos["segundos"], datos["llamadas"])
+
+    def como_dict(self):
+        return {nombre: {"segundos": self.segundos[nombre], "llamadas": self.llamadas[nombre]}
+                for nombre in self.segundos}
+
+
+_hilo = threading.local()
+
+
+def activar(tiempos=None):
+    _hilo.activo = tiempos if tiempos is not None else TiemposEtapas()
+    return _hilo.activo
+
+
+def desactivar():
+    tiempos, _hilo.activo = activo(), None
+    return tiempos
+
+
+def activo():
+    return getattr(_hilo, "activo", None)
+
+
+def registrando():
+    """
+    True si hay un TiemposEtapas activo que guarda eventos.
+    """
+    tiempos = activo()
+    return tiempos is not None and tiempos.eventos is not None
+
+
+@contextmanager
+def etapa(nombre, **datos):
+    """
+    Mide el bloque como la etapa nombre. Devuelve el dict datos, al que se
+    le pueden añadir campos dentro del bloque (p. ej. nfev tras integrar).
+    """
+    tiempos = activo()
+    if tiempos is None:
+        yield datos
+        return
+    inicio = time.time()
+    t0 = time.perf_counter()
+    try:
+        yield datos
+    finally:
+        segundos = time.perf_counter() - t0
+        tiempos.sumar(nombre, segundos)
+        tiempos.registrar(nombre, inicio, segundos, datos)
+
+
+@contextmanager
+def contexto(**datos):
+    """
+    Añade datos (p. ej. el grupo de restas) a los eventos que se registren
+    dentro del bloque.
+    """
+    tiempos = activo()
+    if tiempos is None:
+        yield
+        return
+    previo = tiempos.contexto
+    tiempos.contexto = dict(previo, **datos)
+    try:
+        yield
+    finally:
+        tiempos.contexto = previo
+
+
+def _json(valor):
+    # Los 'a' y contadores llegan como tipos de NumPy
+    if hasattr(valor, "item"):
+        return valor.item()
+    return str(valor)
+
+
+def exportar_jsonl(tiempos, path):
+    """
+    Un evento por línea, en el orden en que se registraron.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        for evento in tiempos.eventos or []:
+            f.write(json.dumps(evento, default=_json, ensure_ascii=False) + "\n")
+    return path
+
+
+def exportar_chrome(tiempos, path):
+    """
+    Eventos en el formato de trazas de Chrome (un evento "X" por etapa, con
+    los tiempos en microsegundos desde el primero y una fila por proceso).
+    """
+    eventos = tiempos.eventos or []
+    t0 = min((e["inicio"] for e in eventos), default=0.0)
+    traza = []
+    for e in eventos:
+        args = {k: v for k, v in e.items() if k not in ("etapa", "inicio", "segundos", "pid")}
+        nombre = e["etapa"]
+        if "a" in e:
+            nombre += f" a={e['a']:.4g}"
+        elif "carpeta" in e:
+            nombre += f" {e['carpeta']}"
+        traza.append({"name": nombre, "cat": e["etapa"], "ph": "X",
+                      "ts": (e["inicio"] - t0) * 1e6, "dur": e["segundos"] * 1e6,
+                      "pid": e["pid"], "tid": e["pid"], "args": args})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": traza, "displayTimeUnit": "ms"}, f,
+                  default=_json, ensure_ascii=False)
+    return path
+
+
+def resumen(tiempos, n=5):
+    """
+    Líneas de texto con el tiempo por etapa y, si hay eventos, los 'a' y
+    los grupos de restas que más tiempo de integración se llevaron.
+    """
+    total = sum(tiempos.segundos.values())
+    if total <= 0:
+        return []
+    lineas = ["Perfil del barrido (tiempo por etapa sumado entre procesos):"]
+    for nombre in sorted(tiempos.segundos, key=tiempos.segundos.get, reverse=True):
+        seg = tiempos.segundos[nombre]
+        lineas.append(f"  {nombre}: {seg:.2f}s ({100 * seg / total:.0f}%, "
+                      f"{tiempos.llamadas[nombre]} llamadas)")
+
+    integraciones = [e for e in tiempos.eventos or [] if e["etapa"] == "integracion"]
+    por_a = [e for e in integraciones if "a" in e]
+    if por_a:
+        lineas.append("  'a' más costosos:")
+        for e in sorted(por_a, key=lambda e: e["segundos"], reverse=True)[:n]:
+            contadores = ", ".join(f"{k}={e[k]}" for k in ("nfev", "njev", "pasos")
+                                   if e.get(k) is not None)
+            grupo = f" [{e['restas']}]" if "restas" in e else ""
+            lineas.append(f"    a={e['a']:.4g}{grupo}: {e['segundos']:.2f}s ({contadores})")
+
+    if integraciones:
+        por_grupo = {}
+        for e in integraciones:
+            clave = e.get("restas", "?")
+            por_grupo[clave] = por_grupo.get(clave, 0.0) + e["segundos"]
+        if len(por_grupo) > 1:
+            lineas.append("  Integración por grupo de restas:")
+            for clave, seg in sorted(por_grupo.items(), key=lambda x: x[1], reverse=True)[:n]:
+                lineas.append(f"    {clave}: {seg:.2f}s")
+    return lineas
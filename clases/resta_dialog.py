@@ -1,12 +1,15 @@
 import os
 from PyQt6 import QtWidgets, QtCore, QtGui
+from clases import network
 
 class RestaDialog(QtWidgets.QDialog):
-    def __init__(self, var_list, eq_code, init_values, parent=None):
+    def __init__(self, var_list, eq_code, init_values, parent=None, nodo_code=None):
         """
         var_list: ["x1","y1","z1","x2","y2","z2"] (o más)
         eq_code: string con la def sistema_dinamico(t, variables, a): ...
         init_values: [x1_0, y1_0, z1_0, x2_0, y2_0, z2_0]
+        nodo_code: sistema de un solo nodo, para crear restas sobre una red
+            de N nodos iguales (ver network.py)
         """
         super().__init__(parent)
         self.setWindowTitle("Crear Restas y Parámetros de 'a'")
@@ -15,9 +18,39 @@ class RestaDialog(QtWidgets.QDialog):
         self.var_list = var_list
         self.eq_code = eq_code
         self.init_values = init_values
+        self.nodo_code = nodo_code
 
         layout = QtWidgets.QVBoxLayout(self)
 
+        # Red de N nodos con el sistema 1 como nodo
+        self.redGroup = QtWidgets.QGroupBox("Red de N nodos (sistema 1 como nodo)")
+        self.redGroup.setCheckable(True)
+        self.redGroup.setChecked(False)
+        redLayout = QtWidgets.QFormLayout(self.redGroup)
+        self.nodosSpin = QtWidgets.QSpinBox()
+        self.nodosSpin.setRange(2, 100000)
+        self.nodosSpin.setValue(100)
+        self.topologiaCombo = QtWidgets.QComboBox()
+        self.topologiaCombo.addItems(network.TOPOLOGIAS)
+        self.kSpin = QtWidgets.QSpinBox()
+        self.kSpin.setRange(1, 1000)
+        self.pEdit = QtWidgets.QLineEdit("0.05")
+        self.semillaSpin = QtWidgets.QSpinBox()
+        self.semillaSpin.setRange(0, 2**31 - 1)
+        self.archivoEdit = QtWidgets.QLineEdit("")
+        self.acoplamientoEdit = QtWidgets.QLineEdit("x")
+        self.normalizarCheck = QtWidgets.QCheckBox("Dividir por el grado")
+        redLayout.addRow("Nodos:", self.nodosSpin)
+        redLayout.addRow("Topología:", self.topologiaCombo)
+        redLayout.addRow("Vecinos por lado (anillo):", self.kSpin)
+        redLayout.addRow("Probabilidad de arista (aleatoria):", self.pEdit)
+        redLayout.addRow("Semilla:", self.semillaSpin)
+        redLayout.addRow("Matriz de adyacencia (archivo):", self.archivoEdit)
+        redLayout.addRow("Componentes acopladas:", self.acoplamientoEdit)
+        redLayout.addRow("", self.normalizarCheck)
+        self.redGroup.setVisible(nodo_code is not None)
+        layout.addWidget(self.redGroup)
+
         self.allCombinationsCheck = QtWidgets.QCheckBox("Todas las combinaciones posibles")
         layout.addWidget(self.allCombinationsCheck)
 
@@ -25,11 +58,7 @@ class RestaDialog(QtWidgets.QDialog):
         self.restaListWidget.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.MultiSelection)
         layout.addWidget(self.restaListWidget)
 
-        for i in range(len(var_list)):
-            for j in range(i+1, len(var_list)):
-                item_text = f"{var_list[i]} - {var_list[j]}"
-                item = QtWidgets.QListWidgetItem(item_text)
-                self.restaListWidget.addItem(item)
+        self.llenarRestas()
 
         paramGroup = QtWidgets.QGroupBox("Parámetros de 'a'")
         paramLayout = QtWidgets.QFormLayout(paramGroup)
@@ -61,9 +90,43 @@ class RestaDialog(QtWidgets.QDialog):
         self.createButton.clicked.connect(self.onCreate)
         self.cancelButton.clicked.connect(self.reject)
         self.allCombinationsCheck.stateChanged.connect(self.onAllCombinationsToggled)
+        self.redGroup.toggled.connect(self.llenarRestas)
 
         self.setLayout(layout)
 
+    def llenarRestas(self):
+        self.restaListWidget.clear()
+        if self.redGroup.isChecked():
+            # Error de toda la red y, como ejemplo, los dos primeros nodos
+            restas = [f"global {c}" for c in network.COMPONENTES] + ["global xyz"]
+            restas += [f"{c}1 - {c}2" for c in network.COMPONENTES]
+        else:
+            restas = [f"{self.var_list[i]} - {self.var_list[j]}"
+                      for i in range(len(self.var_list))
+                      for j in range(i+1, len(self.var_list))]
+        for item_text in restas:
+            self.restaListWidget.addItem(QtWidgets.QListWidgetItem(item_text))
+        if self.allCombinationsCheck.isChecked():
+            self.onAllCombinationsToggled(None)
+
+    def red(self):
+        """
+        Descripción de la red (ver network.py) con los valores del diálogo.
+        """
+        red = dict(network.RED_DEFECTO,
+                   nodos=self.nodosSpin.value(),
+                   topologia=self.topologiaCombo.currentText(),
+                   k=self.kSpin.value(),
+                   p=float(self.pEdit.text()),
+                   semilla=self.semillaSpin.value(),
+                   acoplamiento=self.acoplamientoEdit.text().strip() or "x",
+                   normalizar=self.normalizarCheck.isChecked(),
+                   # Los nodos sin condición inicial propia parten de valores aleatorios
+                   ci_semilla=self.semillaSpin.value())
+        if red["topologia"] == "archivo":
+            red["archivo"] = self.archivoEdit.text().strip()
+        return red
+
     def selectFolder(self):
         folder = QtWidgets.QFileDialog.getExistingDirectory(self, "Seleccionar Carpeta", "")
         if folder:
@@ -109,6 +172,26 @@ class RestaDialog(QtWidgets.QDialog):
         # eq_code => def sistema_dinamico(t, variables, a): ...
         # init_values => [x1_0, y1_0, z1_0, x2_0, y2_0, z2_0]
 
+        if self.redGroup.isChecked():
+            try:
+                red = self.red()
+            except ValueError:
+                QtWidgets.QMessageBox.warning(self, "Error", "La probabilidad de arista debe ser numérica.")
+                return
+            for resta in selected_restas:
+                subdir = os.path.join(self.selectedFolder, resta.replace(" ", ""))
+                # El nodo 1 parte de las condiciones iniciales del sistema 1
+                network.escribir_info(subdir, resta, a_start, a_stop, a_step,
+                                      self.nodo_code, red, self.init_values[:3])
+            QtWidgets.QMessageBox.information(
+                self,
+                "Listo",
+                f"Se han creado {len(selected_restas)} restas sobre una red de "
+                f"{red['nodos']} nodos en:\n{self.selectedFolder}"
+            )
+            self.accept()
+            return
+
         for resta in selected_restas:
             subdir_name = resta.replace(" ", "")
             subdir = os.path.join(self.selectedFolder, subdir_name)
@@ -0,0 +1,158 @@
+import json
+import os
+import numpy as np
+
+from clases.adaptive_sweep import indice_de_a
+from clases.checkpoint import CABECERA_DIARIO, leer_lineas_completas, ruta_diario
+
+# Almacén binario de resultados, alternativa compacta a log.csv:
+#
+#   resultados.npy:  matriz float64 (N_a, N_ventanas) en formato .npy, que
+#                    se abre como memmap; la fila k es a = a_start + k*a_step
+#                    y las filas aún no calculadas valen NaN.
+#   resultados.json: cabecera con la rejilla, las ventanas y las opciones.
+#
+# Se escribe fila a fila (flush del memmap antes de apuntar el 'a' en el
+# diario completados_npy.csv de checkpoint.py, que sigue siendo quien dice
+# qué filas están completas) y se lee sin cargar el archivo entero.
+# csv_a_npy y npy_a_csv convierten entre este formato y el log.csv de
+# siempre. Una subcarpeta que ya tiene resultados.npy sigue usándolo.
+
+FORMATOS = ("csv", "npy")
+
+
+def rutas(subdir, sufijo=""):
+    return (os.path.join(subdir, f"resultados{sufijo}.npy"),
+            os.path.join(subdir, f"resultados{sufijo}.json"))
+
+
+def existe(subdir, sufijo=""):
+    return os.path.exists(rutas(subdir, sufijo)[0])
+
+
+class AlmacenResultados:
+    """
+    Matriz de resultados de una subcarpeta abierta como memmap.
+    """
+    def __init__(self, subdir, sufijo="", modo="r+"):
+        self.npy_path, self.json_path = rutas(subdir, sufijo)
+        with open(self.json_path, "r", encoding="utf-8") as f:
+            self.cabecera = json.load(f)
+        self.a_start = self.cabecera["a_start"]
+        self.a_step = self.cabecera["a_step"]
+        self.matriz = np.load(self.npy_path, mmap_mode=modo)
+
+    @classmethod
+    def crear(cls, subdir, a_start, a_stop, a_step, n_ventanas, sufijo="", extra=None):
+        npy_path, json_path = rutas(subdir, sufijo)
+        n_a = len(np.arange(a_start, a_stop, a_step))
+        cabecera = {"a_start": a_start, "a_stop": a_stop, "a_step": a_step,
+                    "n_a": n_a, "n_ventanas": n_ventanas, "columnas": "ventanas"}
+        cabecera.update(extra or {})
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(cabecera, f, indent=4)
+        matriz = np.lib.format.open_memmap(npy_path, mode="w+", dtype=np.float64,
+                                           shape=(n_a, n_ventanas))
+        matriz[:] = np.nan
+        matriz.flush()
+        del matriz
+        return cls(subdir, sufijo)
+
+    def a_values(self):
+        return self.a_start + np.arange(self.matriz.shape[0]) * self.a_step
+
+    def escribir(self, a_val, valores):
+        k = indice_de_a(a_val, self.a_start, self.a_step)
+        self.matriz[k, :len(valores)] = valores
+        self.matriz[k, len(valores):] = np.nan
+
+    def flush(self):
+        self.matriz.flush()
+
+
+def leer(subdir, sufijo=""):
+    """
+    Devuelve (a_values, matriz, completos): matriz es un memmap de sólo
+    lectura y completos la máscara de filas apuntadas en el diario.
+    """
+    almacen = AlmacenResultados(subdir, sufijo, modo="r")
+    lineas, _ = leer_lineas_completas(ruta_diario(subdir, sufijo, "npy"))
+    completos = np.zeros(almacen.matriz.shape[0], dtype=bool)
+    for linea in lineas[1:]:
+        try:
+            k = int(linea.split(",")[0])
+        except ValueError:
+            break
+        if 0 <= k < len(completos):
+            completos[k] = True
+    return almacen.a_values(), almacen.matriz, completos
+
+
+def metricas(subdir, sufijo, a_start, a_step):
+    """
+    dict k -> media de max_value de las filas completas (como
+    adaptive_sweep.metricas_guardadas para log.csv).
+    """
+    _, matriz, completos = leer(subdir, sufijo)
+    salida = {}
+    for k in np.nonzero(completos)[0]:
+        fila = np.asarray(matriz[k])
+        if np.any(np.isfinite(fila)):
+            salida[int(k)] = float(np.nanmean(fila))
+    return salida
+
+
+def csv_a_npy(subdir, a_start, a_stop, a_step, n_ventanas, sufijo=""):
+    """
+    Crea resultados.npy (y su diario) a partir de log.csv. Como log.csv
+    no guarda las ventanas que dieron NaN, los valores de cada 'a' se
+    colocan en orden desde la primera ventana.
+    """
+    log_path = os.path.join(subdir, f"log{sufijo}.csv")
+    almacen = AlmacenResultados.crear(subdir, a_start, a_stop, a_step, n_ventanas, sufijo,
+                                      {"origen": os.path.basename(log_path)})
+    lineas, _ = leer_lineas_completas(log_path)
+    filas = {}
+    for linea in lineas[1:]:
+        try:
+            a_txt, valor = linea.split(",")
+            k = indice_de_a(float(a_txt), a_start, a_step)
+            filas.setdefault(k, []).append(float(valor))
+        except ValueError:
+            continue
+    validos = [k for k in filas if 0 <= k < almacen.matriz.shape[0]]
+    for k in validos:
+        valores = filas[k][:n_ventanas]
+        almacen.matriz[k, :len(valores)] = valores
+    almacen.flush()
+
+    eventos_path = os.path.join(subdir, f"eventos{sufijo}.csv")
+    _, ev_bytes = leer_lineas_completas(eventos_path)
+    with open(ruta_diario(subdir, sufijo, "npy"), "w", encoding="utf-8", newline="") as f:
+        f.write(CABECERA_DIARIO)
+        for k in validos:
+            f.write(f"{k},{repr(float(a_start + k * a_step))},0,{ev_bytes}\n")
+    return almacen
+
+
+def npy_a_csv(subdir, destino=None, sufijo=""):
+    """
+    Escribe un log.csv (a,max_value) con las filas completas de
+    resultados.npy, omitiendo los NaN como hace el barrido. Si se
+    sobrescribe el log.csv de la subcarpeta se borra su diario, que se
+    regenera desde el nuevo archivo al reanudar en formato csv.
+    """
+    a_values, matriz, completos = leer(subdir, sufijo)
+    canonico = os.path.join(subdir, f"log{sufijo}.csv")
+    destino = destino or canonico
+    if os.path.abspath(destino) == os.path.abspath(canonico):
+        diario = ruta_diario(subdir, sufijo)
+        if os.path.exists(diario):
+            os.remove(diario)
+    with open(destino, "w", encoding="utf-8", newline="") as f:
+        f.write("a,max_value\n")
+        for k in np.nonzero(completos)[0]:
+            a_txt = repr(float(a_values[k]))
+            fila = np.asarray(matriz[k])
+            f.write("".join(f"{a_txt},{repr(float(v))}\n" for v in fila if not np.isnan(v)))
+    return destino
@@ -0,0 +1,148 @@
+import json
+import os
+from scipy.integrate import solve_ivp, RK45
+
+from clases import checkpoint
+
+# Elección automática del método de solve_ivp por 'a' (method = "auto").
+#
+# Con acoplamientos grandes el sistema acoplado se vuelve rígido: RK45
+# tiene que dar pasos cada vez más cortos para ser estable (el paso cae
+# como 1/a) y unos pocos 'a' pueden costar más que todo el resto. Antes de
+# cada integración se hace una sonda corta de "auto_sonda" unidades con
+# RK45:
+#
+#   - Si su ritmo de evaluaciones (nfev por unidad de tiempo, que crece al
+#     colapsar el paso) no pasa de "auto_umbral", se usa RK45.
+#   - Si lo pasa (la sonda se corta ahí) o RK45 falla, se repite la sonda
+#     con el método rígido "auto_rigido" (LSODA, Radau o BDF) y se usa el
+#     que necesite menos evaluaciones equivalentes en la sonda (las de
+#     RK45, extrapoladas si se cortó; en el rígido, nfev más n por cada
+#     jacobiano y cada factorización LU, con n el número de variables).
+#
+# La elección sólo depende de contadores del solver, nunca del tiempo de
+# reloj: el mismo 'a' elige el mismo método en cualquier equipo y carga.
+#
+# Lo elegido para cada 'a' va a metodos.csv en cada subcarpeta, una línea
+# por 'a' (ver checkpoint.anexar_lineas):
+#
+#     a,metodo,nfev_sonda
+#
+# Un proyecto (carpeta de restas) puede fijar su método con metodo.json en
+# la carpeta base, p. ej. {"method": "BDF", "rtol": 1e-6}: esas opciones
+# sustituyen a las del barrido (también a "auto").
+
+EXPLICITO = "RK45"
+METODOS_EXPLICITOS = {"RK45": RK45}
+RIGIDOS = ("LSODA", "Radau", "BDF")
+CABECERA = "a,metodo,nfev_sonda\n"
+NOMBRE_FIJADO = "metodo.json"
+# Opciones que se pueden fijar por proyecto
+FIJABLES = ("method", "rtol", "atol")
+
+
+def sondear(fun, t0, y0, args, kwargs_explicito, kwargs_rigido, t_sonda, umbral):
+    """
+    Sonda de [t0, t0 + t_sonda] y devuelve (metodo, nfev por unidad de
+    tiempo de la sonda explícita). kwargs_* son los argumentos de solve_ivp
+    de cada método (con "method"). La sonda explícita se corta en cuanto
+    pasa de umbral * t_sonda evaluaciones (su coste se extrapola a toda
+    la sonda), para que en los 'a' rígidos no cueste lo que se quiere
+    evitar.
+    """
+    opciones = {k: v for k, v in kwargs_explicito.items() if k != "method"}
+    solver = METODOS_EXPLICITOS[kwargs_explicito["method"]](
+        lambda t, y: fun(t, y, *args), t0, y0, t0 + t_sonda, **opciones)
+    limite = umbral * t_sonda
+    while solver.status == "running" and solver.nfev <= limite:
+        solver.step()
+    avance = solver.t - t0
+    ritmo = solver.nfev / avance if avance > 0 else float("inf")
+    if solver.status == "finished" and ritmo <= umbral:
+        return kwargs_explicito["method"], ritmo
+
+    coste_explicito = float("inf") if solver.status == "failed" else ritmo * t_sonda
+    rigido = solve_ivp(fun, (t0, t0 + t_sonda), y0, args=args, **kwargs_rigido)
+    if rigido.success and coste_rigido(rigido, len(y0)) < coste_explicito:
+        return kwargs_rigido["method"], ritmo
+    return kwargs_explicito["method"], ritmo
+
+
+def coste_rigido(sol, n):
+    """
+    Evaluaciones equivalentes de una solución de un método implícito.
+    """
+    return sol.nfev + n * (sol.njev + sol.nlu)
+
+
+def ruta(subdir, sufijo=""):
+    return os.path.join(subdir, f"metodos{sufijo}.csv")
+
+
+def anexar(path, filas):
+    """
+    Añade (con fsync) las filas (a_val, metodo, nfev_sonda) de una resta.
+    """
+    checkpoint.anexar_lineas(path, [f"{float(a_val)!r},{metodo},{float(ritmo)!r}\n"
+                                    for a_val, metodo, ritmo in filas], CABECERA)
+
+
+def leer(path):
+    """
+    dict a -> (metodo, nfev_sonda) (la última línea de cada 'a').
+    """
+    filas = {}
+    if not os.path.exists(path):
+        return filas
+    with open(path, "r", encoding="utf-8") as f:
+        next(f, None)
+        for linea in f:
+            partes = linea.strip().split(",")
+            if len(partes) != 3:
+                continue
+            try:
+                filas[float(partes[0])] = (partes[1], float(partes[2]))
+            except ValueError:
+                continue
+    return filas
+
+
+def ruta_fijado(base_folder):
+    return os.path.join(base_folder, NOMBRE_FIJADO)
+
+
+def leer_fijado(base_folder):
+    """
+    Opciones fijadas por el proyecto (dict, vacío si no hay metodo.json).
+    Lanza ValueError si el archivo no es válido.
+    """
+    path = ruta_fijado(base_folder)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"No se pudo leer {path}: {e}")
+    if not isinstance(datos, dict) or "method" not in datos:
+        raise ValueError(f"{path} debe ser un objeto JSON con \"method\"")
+    desconocidas = set(datos) - set(FIJABLES)
+    if desconocidas:
+        raise ValueError(f"Opciones no fijables en {path}: {', '.join(sorted(desconocidas))}")
+    return datos
+
+
+def fijar(base_folder, metodo, **tolerancias):
+    """
+    Escribe metodo.json; con metodo None lo borra.
+    """
+    path = ruta_fijado(base_folder)
+    if metodo is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return path
+    datos = {"method": metodo}
+    datos.update({k: v for k, v in tolerancias.items() if k in FIJABLES and v is not None})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=4)
+    return path
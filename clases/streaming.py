@@ -0,0 +1,127 @@
+import json
+import os
+import numpy as np
+
+from clases import checkpoint
+
+# Reductores en línea para la integración por tramos con memoria acotada
+# (opción "streaming" del motor). Cada tramo de solve_ivp se muestrea con
+# su salida densa y las diferencias |x_A - x_B| de las muestras pasan por
+# los reductores, que sólo guardan un resumen de tamaño fijo; el tramo se
+# descarta antes de integrar el siguiente. Así la memoria no depende del
+# horizonte (t = 1e5 ocupa lo mismo que t = 310).
+#
+# Todos tienen la misma interfaz: actualizar(t, d) con t (T,) los instantes
+# de las muestras y d (P, T) las diferencias en valor absoluto de cada
+# resta, y resultado().
+#
+# El resultado de RMSEnLinea e Histograma de cada 'a' se guarda en
+# estadisticas.jsonl, una línea por 'a' (ver checkpoint.anexar_lineas).
+
+# Histograma de log10 |x_A - x_B|: HIST_BINS intervalos entre HIST_LOG10;
+# los valores fuera van al primer o al último intervalo
+HIST_LOG10 = (-12.0, 4.0)
+HIST_BINS = 64
+
+
+class MaximoPorVentana:
+    """
+    Máximo de cada resta en cada ventana [bordes[w], bordes[w+1]); NaN en
+    las ventanas sin muestras.
+    """
+    def __init__(self, bordes, n_pares):
+        self.bordes = np.asarray(bordes, dtype=float)
+        self.maximos = np.full((n_pares, len(self.bordes) - 1), -np.inf)
+
+    def actualizar(self, t, d):
+        w = np.searchsorted(self.bordes, t, side="right") - 1
+        # El último borde cuenta en la última ventana
+        w[t == self.bordes[-1]] = len(self.bordes) - 2
+        dentro = (w >= 0) & (w < self.maximos.shape[1])
+        for p in range(self.maximos.shape[0]):
+            np.maximum.at(self.maximos[p], w[dentro], d[p, dentro])
+
+    def marcar_desde(self, t, valor):
+        """
+        Rellena con valor las ventanas que terminan después de t (p. ej.
+        inf tras una divergencia).
+        """
+        self.maximos[:, self.bordes[1:] > t] = valor
+
+    def resultado(self):
+        return np.where(np.isneginf(self.maximos), np.nan, self.maximos)
+
+
+class RMSEnLinea:
+    """
+    Raíz de la media de d^2 de cada resta (muestras equiespaciadas).
+    """
+    def __init__(self, n_pares):
+        self.suma = np.zeros(n_pares)
+        self.n = 0
+
+    def actualizar(self, t, d):
+        finitos = np.where(np.isfinite(d), d, 0.0)
+        self.suma += np.sum(finitos ** 2, axis=1)
+        self.n += d.shape[1]
+
+    def resultado(self):
+        if self.n == 0:
+            return np.full(len(self.suma), np.nan)
+        return np.sqrt(self.suma / self.n)
+
+
+class Histograma:
+    """
+    Cuentas de log10 d por intervalo (HIST_BINS entre HIST_LOG10).
+    """
+    def __init__(self, n_pares, limites=HIST_LOG10, bins=HIST_BINS):
+        self.limites = limites
+        self.bins = bins
+        self.cuentas = np.zeros((n_pares, bins), dtype=np.int64)
+
+    def actualizar(self, t, d):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lg = np.log10(d)
+        lo, hi = self.limites
+        i = np.floor((np.nan_to_num(lg, nan=hi, posinf=hi, neginf=lo) - lo)
+                     / (hi - lo) * self.bins).astype(int)
+        i = np.clip(i, 0, self.bins - 1)
+        for p in range(self.cuentas.shape[0]):
+            self.cuentas[p] += np.bincount(i[p], minlength=self.bins)
+
+    def resultado(self):
+        return self.cuentas
+
+
+def ruta_estadisticas(subdir, sufijo=""):
+    return os.path.join(subdir, f"estadisticas{sufijo}.jsonl")
+
+
+def anexar_estadisticas(path, filas):
+    """
+    Añade (con fsync) las filas (a_val, rms, cuentas) de una resta.
+    """
+    lineas = []
+    for a_val, rms, cuentas in filas:
+        linea = {"a": float(a_val), "rms": float(rms), "hist": [int(c) for c in cuentas],
+                 "log10": list(HIST_LOG10)}
+        lineas.append(json.dumps(linea) + "\n")
+    checkpoint.anexar_lineas(path, lineas)
+
+
+def leer_estadisticas(path):
+    """
+    dict a -> {"rms", "hist", "log10"} (la última línea de cada 'a').
+    """
+    estadisticas = {}
+    if not os.path.exists(path):
+        return estadisticas
+    with open(path, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                datos = json.loads(linea)
+            except ValueError:
+                continue
+            estadisticas[datos.pop("a")] = datos
+    return estadisticas
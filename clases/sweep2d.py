@@ -0,0 +1,182 @@
+import ast
+import json
+import os
+import numpy as np
+
+from clases.checkpoint import leer_lineas_completas, sincronizar
+
+# Barrido en dos parámetros: el acoplamiento 'a' y un parámetro interno de
+# las ecuaciones (p. ej. "b" en "0.2 + z1*(x1 - b)"). Para cada valor del
+# segundo parámetro se sustituye su nombre por el número en eq_code (cada
+# valor es un sistema de siempre, con su jacobiano y su entrada en la caché)
+# y se barre 'a' como en el barrido uniforme.
+#
+# La rejilla (N_p2, N_a) se reparte en teselas que se evalúan en paralelo.
+# Cada resta guarda en su subcarpeta:
+#
+#   mapa2d.npy:         matriz float64 (N_p2, N_a) como memmap, con la media
+#                       sobre las ventanas del máximo de |x_A - x_B| (la
+#                       misma métrica que el barrido adaptativo); NaN = sin
+#                       calcular.
+#   mapa2d.json:        las dos rejillas y el nombre del parámetro.
+#   mapa2d_teselas.csv: diario de teselas terminadas (p0,p1,a0,a1 en
+#                       índices), que se apunta tras el flush del memmap.
+#
+# Al reanudar sólo se evalúan las teselas con alguna celda fuera del diario,
+# aunque se cambie el tamaño de tesela. Un mapa de otras rejillas no se
+# sobrescribe: el barrido de esa resta se detiene con un error. El mapa de calor de la interfaz lee
+# sólo esta matriz, nunca las ventanas.
+
+CABECERA_TESELAS = "p0,p1,a0,a1\n"
+
+
+def rutas(subdir):
+    return (os.path.join(subdir, "mapa2d.npy"), os.path.join(subdir, "mapa2d.json"),
+            os.path.join(subdir, "mapa2d_teselas.csv"))
+
+
+def sustituir_parametro(eq_code, nombre, valor):
+    """
+    eq_code con cada uso de nombre cambiado por el número valor.
+    Lanza ValueError si nombre no aparece en eq_code.
+    """
+    arbol = ast.parse(eq_code)
+    usos = [n for n in ast.walk(arbol) if isinstance(n, ast.Name) and n.id == nombre]
+    if not usos:
+        raise ValueError(f"El parámetro {nombre} no aparece en las ecuaciones")
+
+    class Sustituir(ast.NodeTransformer):
+        def visit_Name(self, nodo):
+            if nodo.id == nombre and isinstance(nodo.ctx, ast.Load):
+                return ast.copy_location(ast.Constant(value=float(valor)), nodo)
+            return nodo
+
+    return ast.unparse(ast.fix_missing_locations(Sustituir().visit(arbol)))
+
+
+def rejilla(inicio, fin, paso):
+    return np.arange(inicio, fin, paso)
+
+
+def metrica(maximos):
+    """
+    Media sobre las ventanas de los máximos (P, W) de un 'a', ignorando
+    las ventanas NaN; NaN para las restas sin ninguna ventana válida.
+    """
+    validos = np.isfinite(maximos)
+    n = validos.sum(axis=1)
+    suma = np.where(validos, maximos, 0.0).sum(axis=1)
+    return np.where(n > 0, suma / np.maximum(n, 1), np.nan)
+
+
+def teselas(n_p, n_a, tam_p, tam_a):
+    """
+    Lista de (p0, p1, a0, a1) que cubre la rejilla (n_p, n_a).
+    """
+    return [(p0, min(p0 + tam_p, n_p), a0, min(a0 + tam_a, n_a))
+            for p0 in range(0, n_p, tam_p) for a0 in range(0, n_a, tam_a)]
+
+
+def _describir(valores):
+    if len(valores) == 0:
+        return "vacía"
+    return f"{len(valores)} valores en [{min(valores):g}, {max(valores):g}]"
+
+
+class Mapa2D:
+    """
+    Matriz (N_p2, N_a) de una resta, abierta como memmap, y su diario de
+    teselas.
+    """
+    def __init__(self, subdir, modo="r+"):
+        self.npy_path, self.json_path, self.diario = rutas(subdir)
+        with open(self.json_path, "r", encoding="utf-8") as f:
+            self.cabecera = json.load(f)
+        self.matriz = np.load(self.npy_path, mmap_mode=modo)
+
+    @classmethod
+    def crear(cls, subdir, a_values, p_values, nombre):
+        npy_path, json_path, diario = rutas(subdir)
+        cabecera = {"a": [float(a) for a in a_values], "p2": [float(p) for p in p_values],
+                    "p2_nombre": nombre, "metrica": "media de max_value por ventana"}
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(cabecera, f)
+        matriz = np.lib.format.open_memmap(npy_path, mode="w+", dtype=np.float64,
+                                           shape=(len(p_values), len(a_values)))
+        matriz[:] = np.nan
+        matriz.flush()
+        del matriz
+        if os.path.exists(diario):
+            os.remove(diario)
+        return cls(subdir)
+
+    @classmethod
+    def abrir_o_crear(cls, subdir, a_values, p_values, nombre):
+        """
+        Abre el mapa de subdir, o crea uno nuevo si no hay. Si el que hay es
+        de otras rejillas u otro parámetro (o no se puede leer) lanza
+        ValueError: nunca se sobrescriben teselas ya calculadas.
+        """
+        npy_path, json_path, _ = rutas(subdir)
+        if not os.path.exists(npy_path):
+            # Sin matriz no hay teselas que perder (p. ej. un corte en crear)
+            return cls.crear(subdir, a_values, p_values, nombre)
+        try:
+            mapa = cls(subdir)
+            c = mapa.cabecera
+            diferencias = []
+            if c.get("p2_nombre") != nombre:
+                diferencias.append(f"parámetro {c.get('p2_nombre')} en lugar de {nombre}")
+            for clave, valores in (("a", a_values), ("p2", p_values)):
+                if len(c[clave]) != len(valores) or not np.allclose(c[clave], valores):
+                    diferencias.append(f"rejilla de {clave}: {_describir(c[clave])} en lugar "
+                                       f"de {_describir(valores)}")
+        except (OSError, ValueError, KeyError) as e:
+            raise ValueError(f"No se pudo leer el mapa 2d de {subdir}: {e}. "
+                             f"Bórrelo (mapa2d.*) para empezar de nuevo.")
+        if diferencias:
+            raise ValueError(f"El mapa 2d de {subdir} es de otro barrido ("
+                             + "; ".join(diferencias)
+                             + "). Use las mismas rejillas o borre mapa2d.* para empezar de nuevo.")
+        return mapa
+
+    def hechas(self):
+        """
+        Máscara (N_p2, N_a) de las celdas de teselas apuntadas en el diario.
+        """
+        mascara = np.zeros(self.matriz.shape, dtype=bool)
+        lineas, n_bytes = leer_lineas_completas(self.diario)
+        for linea in lineas[1:]:
+            try:
+                p0, p1, a0, a1 = (int(v) for v in linea.split(","))
+            except ValueError:
+                break
+            mascara[p0:p1, a0:a1] = True
+        # Una última línea a medio escribir se descarta
+        if os.path.exists(self.diario) and os.path.getsize(self.diario) > n_bytes:
+            with open(self.diario, "r+b") as f:
+                f.truncate(n_bytes)
+        return mascara
+
+    def escribir(self, tesela, valores):
+        p0, p1, a0, a1 = tesela
+        self.matriz[p0:p1, a0:a1] = valores
+        self.matriz.flush()
+        with open(self.diario, "ab") as f:
+            if f.tell() == 0:
+                f.write(CABECERA_TESELAS.encode("utf-8"))
+            f.write(f"{p0},{p1},{a0},{a1}\n".encode("utf-8"))
+            sincronizar(f)
+
+
+def leer_mapa(subdir):
+    """
+    (a_values, p_values, nombre, matriz) de una subcarpeta, con matriz un
+    memmap de sólo lectura (N_p2, N_a); None si no hay mapa.
+    """
+    npy_path, json_path, _ = rutas(subdir)
+    if not (os.path.exists(npy_path) and os.path.exists(json_path)):
+        return None
+    mapa = Mapa2D(subdir, modo="r")
+    c = mapa.cabecera
+    return np.array(c["a"]), np.array(c["p2"]), c["p2_nombre"], mapa.matriz
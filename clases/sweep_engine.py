@@ -0,0 +1,1793 @@
+import os
+import json
+import time
+import multiprocessing
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+from scipy.integrate import solve_ivp
+from scipy.optimize import OptimizeResult
+
+from clases.utils import parse_info_file, parse_resta_name
+from clases.error_extraction import (VENTANAS, diferencias, lista_pares, maximos_por_ventana,
+                                     maximos_malla, malla_ventanas,
+                                     salida_densa_vectorizada)
+from clases.ensemble import integrar_lote
+from clases.equation_compiler import compilar_ecuaciones
+from clases import network
+from clases.equation_cache import CACHE
+from clases import profiling
+from clases.profiling import etapa
+from clases import adaptive_sweep
+from clases import continuation
+from clases import checkpoint
+from clases import result_store
+from clases import sweep2d
+from clases import streaming
+from clases import cuenca
+from clases import arriendos
+from clases import coste
+from clases import rigidez
+
+# Motor de barrido sin dependencias de Qt. BatchThread (GUI) lo envuelve
+# conectando los callbacks a sus señales.
+
+T_SPAN = (0, 310)
+T_EVAL = np.linspace(0, 310, 1000)
+
+# Opciones del barrido que se pasan tal cual a cada integración
+# (también a los procesos worker). Ver clases/error_extraction.py y
+# clases/ensemble.py.
+OPCIONES_DEFECTO = {
+    "error_mode": "denso",
+    "error_tol": 1e-4,
+    "rtol": 1e-3,
+    "atol": 1e-6,
+    # Método de solve_ivp; con los implícitos se usa el jacobiano analítico
+    # de equation_compiler si "jacobiano" es True
+    "method": "RK45",
+    "jacobiano": True,
+    # method = "auto" (ver rigidez.py): sonda de "auto_sonda" unidades con
+    # RK45 en cada 'a'; si pasa de "auto_umbral" evaluaciones por unidad de
+    # tiempo se compara con "auto_rigido" y se usa el que necesite menos
+    # evaluaciones
+    "auto_sonda": 10.0,
+    "auto_umbral": 1000.0,
+    "auto_rigido": "LSODA",
+    # Parada temprana (motor solve_ivp): se integra por tramos de
+    # "parada_tramo" y se corta cuando todas las restas del grupo llevan
+    # "sync_dwell" unidades de tiempo por debajo de "sync_tol", o cuando la
+    # trayectoria supera "div_umbral" (o deja de ser finita)
+    "parada_temprana": False,
+    "sync_tol": 1e-6,
+    "sync_dwell": 20.0,
+    "div_umbral": 1e6,
+    "parada_tramo": 10.0,
+    # Integración por tramos con memoria acotada (motor solve_ivp, ver
+    # streaming.py): se integra hasta "stream_t_final" en tramos de
+    # "stream_tramo", muestreando cada uno "stream_densidad" veces por
+    # unidad de tiempo. Las len(VENTANAS) ventanas de log.csv reparten
+    # [stream_t_medida, stream_t_final]; el RMS y el histograma de cada
+    # resta van a estadisticas.jsonl, y para las gráficas sólo se guardan
+    # "stream_muestras" puntos de la trayectoria. Sustituye a la parada
+    # temprana.
+    "streaming": False,
+    "stream_t_final": 10000.0,
+    "stream_t_medida": 200.0,
+    "stream_tramo": 100.0,
+    "stream_densidad": 20.0,
+    "stream_muestras": 1000,
+    # Estabilidad de cuenca (ver cuenca.py): con "cuenca_muestras" = K > 1
+    # cada 'a' se integra desde K condiciones iniciales (la de info.txt y
+    # K-1 de la caja init ± "cuenca_radio", muestreo "aleatorio" o "lhs"
+    # con semilla "cuenca_semilla") en lotes del integrador ensemble. La
+    # fracción que sincroniza (métrica < "cuenca_sync") y los cuantiles del
+    # error van a cuenca.csv; log.csv sigue siendo el de la condición de
+    # info.txt.
+    "cuenca_muestras": 0,
+    "cuenca_muestreo": "aleatorio",
+    "cuenca_radio": 5.0,
+    "cuenca_semilla": 0,
+    "cuenca_sync": 1e-3,
+    # "solve_ivp": un solve_ivp por 'a'; "ensemble": lotes de 'a' a la vez
+    "engine": "solve_ivp",
+    "ensemble_method": "rk45",
+    "ensemble_h": 0.01,
+    "ensemble_lote": 64,
+    # Puntos por ventana con los que el ensemble muestrea el modo "denso"
+    "ensemble_muestras": 64,
+    # "uniforme": toda la rejilla a_start:a_stop:a_step; "adaptativo": rejilla
+    # gruesa de "adapt_puntos" que se biseca donde la métrica salta más de
+    # "adapt_umbral" décadas, hasta "adapt_resolucion" (0 = a_step). El 'a'
+    # crítico de cada resta (métrica < "adapt_sync") va a critico.json.
+    "barrido": "uniforme",
+    "adapt_puntos": 11,
+    "adapt_umbral": 1.0,
+    "adapt_sync": 1e-3,
+    "adapt_resolucion": 0.0,
+    # "2d": además de 'a', el parámetro "p2_nombre" de las ecuaciones recorre
+    # p2_start:p2_stop:p2_step; la rejilla se evalúa por teselas de
+    # "tesela_p2" x "tesela_a" celdas y cada resta guarda un mapa2d.npy con
+    # la media por ventana de max_value (ver sweep2d.py)
+    "p2_nombre": "b",
+    "p2_start": 0.0,
+    "p2_stop": 1.0,
+    "p2_step": 0.1,
+    "tesela_p2": 4,
+    "tesela_a": 8,
+    # Continuación: cada 'a' parte del estado final del anterior y sólo
+    # integra "cont_transitorio" unidades antes de la ventana de medida.
+    # Con "cont_reverso" se repite el barrido de a_stop hacia a_start y se
+    # marcan como histéresis los 'a' donde las ramas difieren más de
+    # "hist_umbral" décadas.
+    "continuacion": False,
+    "cont_transitorio": 50.0,
+    "cont_reverso": False,
+    "hist_umbral": 1.0,
+    # "csv": log.csv de siempre; "npy": resultados.npy + resultados.json
+    # (ver result_store.py). Las subcarpetas con resultados.npy siguen en npy.
+    "formato": "csv",
+    # Carpeta compartida entre varios procesos o equipos (ver arriendos.py):
+    # cada grupo de restas se procesa sólo con el arriendo de todas sus
+    # subcarpetas, renovado cada "arriendo_latido" segundos; los que pasan
+    # "arriendo_duracion" sin renovar se recogen como abandonados
+    "compartida": False,
+    "arriendo_duracion": 120.0,
+    "arriendo_latido": 20.0,
+    # Con workers > 1, tras unos bloques de sondeo repartidos por la rejilla
+    # de cada grupo, lanzar primero los bloques de mayor coste estimado
+    # (ver coste.py), para que los 'a' lentos no queden para el final
+    "orden_coste": True,
+    # Perfil por etapa, 'a' y resta (ver profiling.py): perfil.jsonl y
+    # perfil_trace.json en la carpeta base y resumen al terminar
+    "perfil": True,
+}
+
+BARRIDOS = ("uniforme", "adaptativo", "2d")
+ENGINES = ("solve_ivp", "ensemble")
+METHODS = ("RK45", "RK23", "DOP853", "Radau", "BDF", "LSODA", "auto")
+METODOS_IMPLICITOS = ("Radau", "BDF", "LSODA")
+
+
+def opciones_barrido(opciones=None):
+    completas = dict(OPCIONES_DEFECTO)
+    if opciones:
+        completas.update(opciones)
+    return completas
+
+
+def compilar_sistema(eq_code):
+    """
+    Devuelve la función sistema_dinamico(t, variables, a) de eq_code. Si
+    eq_code tiene la forma de buildSystemFunction se devuelve la versión
+    compilada (vectorizada y con jacobiano, ver equation_compiler.py), y si
+    describe una red, su network.RedCompilada; si no, simplemente se
+    ejecuta eq_code. El resultado se guarda en la caché de
+    ecuaciones del proceso (equation_cache.CACHE).
+    """
+    with etapa("compilacion"):
+        return CACHE.obtener(eq_code, _compilar_sistema)
+
+
+def _compilar_sistema(eq_code):
+    if network.es_red(eq_code):
+        return network.compilar_red(eq_code)
+    sistema = compilar_ecuaciones(eq_code)
+    if sistema is not None:
+        return sistema
+    local_vars = {}
+    exec(eq_code, {"np": np}, local_vars)
+    return local_vars['sistema_dinamico']
+
+
+class TareaResta:
+    """
+    Una subcarpeta (una resta) dentro de un grupo de barrido.
+
+    sufijo distingue los archivos de un barrido inverso (log_reverso.csv...),
+    que recorre 'a' de mayor a menor (sentido = -1).
+
+    Los resultados se escriben 'a' a 'a' con checkpoint.anexar; al crear la
+    tarea se reparan los archivos tras un posible corte y se leen los índices
+    de 'a' ya completados. Con formato "npy" un log.csv previo se convierte
+    a resultados.npy la primera vez.
+    """
+    def __init__(self, idx, folder_name, subdir, resta_name, par, a_start, a_stop, a_step,
+                 sufijo="", sentido=1, formato="csv"):
+        self.idx = idx
+        self.folder_name = folder_name
+        self.subdir = subdir
+        self.resta_name = resta_name
+        self.par = par
+        self.a_start = a_start
+        self.a_stop = a_stop
+        self.a_step = a_step
+        self.sufijo = sufijo
+        self.sentido = sentido
+        self.log_path = os.path.join(subdir, f"log{sufijo}.csv")
+        # Sincronización/divergencia por 'a' (sólo con parada temprana)
+        self.eventos_path = os.path.join(subdir, f"eventos{sufijo}.csv")
+        # (a, max_values, eventos) calculados y aún sin escribir
+        self.bloques = []
+        # RMS e histograma por 'a' del modo streaming, aún sin escribir
+        self.estadisticas_path = streaming.ruta_estadisticas(subdir, sufijo)
+        self.estadisticas = []
+        # Resumen por 'a' del modo cuenca, aún sin escribir
+        self.cuenca_path = cuenca.ruta(subdir, sufijo)
+        self.cuencas = []
+        # Método elegido por 'a' con method = "auto", aún sin escribir
+        self.metodos_path = rigidez.ruta(subdir, sufijo)
+        self.metodos = []
+
+        self.almacen = None
+        if formato == "npy" or result_store.existe(subdir, sufijo):
+            self.formato = "npy"
+            self.diario = checkpoint.ruta_diario(subdir, sufijo, "npy")
+            if not result_store.existe(subdir, sufijo):
+                if os.path.exists(self.log_path):
+                    checkpoint.reparar(checkpoint.ruta_diario(subdir, sufijo), self.log_path,
+                                       self.eventos_path, a_start, a_step)
+                    result_store.csv_a_npy(subdir, a_start, a_stop, a_step, len(VENTANAS), sufijo)
+                else:
+                    result_store.AlmacenResultados.crear(subdir, a_start, a_stop, a_step,
+                                                         len(VENTANAS), sufijo)
+            self.almacen = result_store.AlmacenResultados(subdir, sufijo)
+            self.completados = checkpoint.reparar(self.diario, None, self.eventos_path,
+                                                  a_start, a_step)
+        else:
+            self.formato = "csv"
+            self.diario = checkpoint.ruta_diario(subdir, sufijo)
+            self.completados = checkpoint.reparar(self.diario, self.log_path, self.eventos_path,
+                                                  a_start, a_step)
+
+    def pendiente(self, a_val):
+        return adaptive_sweep.indice_de_a(a_val, self.a_start, self.a_step) not in self.completados
+
+    def metricas(self):
+        """
+        dict k -> media de max_value de los 'a' guardados.
+        """
+        if self.almacen is not None:
+            return result_store.metricas(self.subdir, self.sufijo, self.a_start, self.a_step)
+        return adaptive_sweep.metricas_guardadas(self.log_path, self.a_start, self.a_step)
+
+    def reverso(self):
+        """
+        La misma resta para el barrido inverso (log_reverso.csv).
+        """
+        return TareaResta(self.idx, self.folder_name, self.subdir, self.resta_name,
+                          self.par, self.a_start, self.a_stop, self.a_step,
+                          sufijo=continuation.SUFIJO_REVERSO, sentido=-1,
+                          formato=self.formato)
+
+
+class GrupoBarrido:
+    """
+    Subcarpetas que comparten ecuaciones, condiciones iniciales y rejilla
+    de 'a': el sistema se integra una sola vez por 'a' para todas ellas.
+    """
+    def __init__(self, eq_code, init_values, a_start, a_stop, a_step):
+        self.eq_code = eq_code
+        self.init_values = init_values
+        self.a_start = a_start
+        self.a_stop = a_stop
+        self.a_step = a_step
+        self.tareas = []
+
+    @staticmethod
+    def clave(eq_code, init_values, a_start, a_stop, a_step):
+        return (eq_code.strip(), tuple(init_values), a_start, a_stop, a_step)
+
+    def a_values(self):
+        """
+        Valores de 'a' que aún le faltan a alguna de las restas del grupo.
+        """
+        grid = np.arange(self.a_start, self.a_stop, self.a_step)
+        if len(grid) == 0:
+            return grid
+        mask = np.zeros(len(grid), dtype=bool)
+        for tarea in self.tareas:
+            mask |= np.array([tarea.pendiente(a) for a in grid])
+        return grid[mask]
+
+    def pares(self):
+        return [tarea.par for tarea in self.tareas]
+
+
+def nombres_restas(grupo):
+    return ", ".join(tarea.resta_name for tarea in grupo.tareas)
+
+
+def guardar_metadatos(grupo, opciones):
+    """
+    Escribe barrido.json en cada subcarpeta del grupo con la configuración
+    del último barrido (rejilla de 'a', motor, modo, continuación...), para
+    poder reproducir los resultados.
+    """
+    if opciones["streaming"]:
+        t_span = [T_SPAN[0], opciones["stream_t_final"]]
+        ventanas = [opciones["stream_t_medida"], opciones["stream_t_final"]]
+    else:
+        t_span = list(T_SPAN)
+        ventanas = [int(VENTANAS[0]), int(VENTANAS[-1]) + 1]
+    datos = {
+        "a_start": grupo.a_start,
+        "a_stop": grupo.a_stop,
+        "a_step": grupo.a_step,
+        "t_span": t_span,
+        "ventanas": ventanas,
+        "opciones": opciones,
+        "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    for tarea in grupo.tareas:
+        with open(os.path.join(tarea.subdir, "barrido.json"), "w", encoding="utf-8") as f:
+            json.dump(datos, f, indent=4)
+
+
+def agrupar_subcarpetas(base_folder, subfolders, formato="csv"):
+    """
+    Lee el info.txt de cada subcarpeta y agrupa las que comparten
+    (ecuaciones, condiciones iniciales, rejilla de 'a'). formato es el de
+    los resultados de las subcarpetas que aún no tienen ninguno.
+
+    Devuelve (grupos, omitidas), donde omitidas es una lista de
+    (idx, mensaje) con las subcarpetas que no se pueden procesar.
+    """
+    grupos = {}
+    omitidas = []
+    for idx, folder_name in enumerate(subfolders):
+        subdir = os.path.join(base_folder, folder_name)
+        info_path = os.path.join(subdir, "info.txt")
+        if not os.path.exists(info_path):
+            omitidas.append((idx, f"No existe info.txt en {folder_name}, se omite."))
+            continue
+
+        with etapa("lectura", carpeta=folder_name):
+            try:
+                resta_name, a_start, a_stop, a_step, eq_code, init_values = parse_info_file(info_path)
+            except Exception as e:
+                omitidas.append((idx, f"Error parseando info.txt: {e}"))
+                continue
+
+            try:
+                par = parse_resta_name(resta_name, network.componentes(eq_code))
+                tarea = TareaResta(idx, folder_name, subdir, resta_name, par,
+                                   a_start, a_stop, a_step, formato=formato)
+            except Exception as e:
+                omitidas.append((idx, f"Error leyendo log.csv en {folder_name}: {e}"))
+                continue
+
+        clave = GrupoBarrido.clave(eq_code, init_values, a_start, a_stop, a_step)
+        if clave not in grupos:
+            grupos[clave] = GrupoBarrido(eq_code, init_values, a_start, a_stop, a_step)
+        grupos[clave].tareas.append(tarea)
+
+    return list(grupos.values()), omitidas
+
+
+def evaluar_a(sistema_dinamico, init_values, a_val, pares, on_error=None, opciones=None,
+              t_inicio=None):
+    """
+    Integra el sistema para un 'a' y calcula los máximos por ventana de
+    todas las restas pedidas a partir de la misma trayectoria.
+
+    t_inicio permite empezar más tarde que T_SPAN[0] (transitorio más
+    corto, p. ej. al continuar desde el estado final de otro 'a').
+
+    Con method = "auto" se elige antes el método (elegir_metodo) y sol
+    lleva sol["metodo"] = (metodo, nfev por unidad de tiempo de la sonda).
+    """
+    opciones = opciones_barrido(opciones)
+    if opciones["method"] == "auto":
+        metodo, ritmo = elegir_metodo(sistema_dinamico, init_values, a_val, opciones, t_inicio)
+        sol, maximos = evaluar_a(sistema_dinamico, init_values, a_val, pares, on_error,
+                                 dict(opciones, method=metodo), t_inicio)
+        sol["metodo"] = (metodo, ritmo)
+        return sol, maximos
+    if opciones["streaming"]:
+        return evaluar_a_en_flujo(sistema_dinamico, init_values, a_val, pares,
+                                  opciones, t_inicio)
+    if opciones["parada_temprana"]:
+        return evaluar_a_con_parada(sistema_dinamico, init_values, a_val, pares,
+                                    on_error, opciones, t_inicio)
+    error_mode = opciones["error_mode"]
+    t_span, t_eval = intervalo_integracion(t_inicio)
+    kwargs = argumentos_solver(sistema_dinamico, opciones)
+    with etapa("integracion", a=a_val, metodo=kwargs["method"]) as datos:
+        sol = solve_ivp(sistema_dinamico, t_span, init_values, args=(a_val,), t_eval=t_eval,
+                        dense_output=(error_mode == "denso"), **kwargs)
+        datos.update(contadores_solver(sol))
+    with etapa("extraccion", a=a_val):
+        maximos = maximos_por_ventana(sol, pares, error_mode, opciones["error_tol"], on_error)
+    # La salida densa no hace falta fuera de aquí y pesa al enviarla entre procesos
+    sol.sol = None
+    return sol, maximos
+
+
+class SolucionPorTramos:
+    """
+    Salida densa continua formada por las de varios tramos consecutivos
+    de solve_ivp.
+    """
+    def __init__(self, tramos):
+        self.inicios = np.array([tramo.t[0] for tramo in tramos])
+        self.densas = [salida_densa_vectorizada(tramo.sol) for tramo in tramos]
+
+    def __call__(self, t):
+        t = np.atleast_1d(np.asarray(t, dtype=float))
+        idx = np.clip(np.searchsorted(self.inicios, t, side='right') - 1, 0, len(self.densas) - 1)
+        y = None
+        for i in np.unique(idx):
+            sel = idx == i
+            y_i = self.densas[i](t[sel])
+            if y is None:
+                y = np.empty((y_i.shape[0], len(t)))
+            y[:, sel] = y_i
+        return y
+
+
+def intervalo_integracion(t_inicio=None):
+    """
+    (t_span, t_eval) para integrar desde t_inicio (por defecto T_SPAN[0])
+    hasta el final de la ventana de medida.
+    """
+    if t_inicio is None or t_inicio <= T_SPAN[0]:
+        return T_SPAN, T_EVAL
+    return (t_inicio, T_SPAN[1]), T_EVAL[T_EVAL >= t_inicio]
+
+
+def contadores_solver(sol, tramos=None):
+    """
+    Evaluaciones de la función y del jacobiano, factorizaciones LU y pasos
+    aceptados de una (o varias, por tramos) soluciones de solve_ivp. Los
+    pasos sólo se conocen con salida densa.
+    """
+    tramos = tramos if tramos is not None else [sol]
+    pasos = None
+    if all(getattr(tr, "sol", None) is not None for tr in tramos):
+        pasos = sum(len(tr.sol.ts) - 1 for tr in tramos)
+    return {"nfev": int(sum(tr.nfev for tr in tramos)), "njev": int(sum(tr.njev for tr in tramos)),
+            "nlu": int(sum(tr.nlu for tr in tramos)), "pasos": pasos}
+
+
+def evaluar_a_con_parada(sistema_dinamico, init_values, a_val, pares, on_error, opciones,
+                         t_inicio=None):
+    """
+    Como evaluar_a, pero integrando por tramos y parando en cuanto el
+    sistema se sincroniza (todas las restas por debajo de sync_tol durante
+    sync_dwell) o diverge.
+
+    Las ventanas de medida que quedan más allá del corte se rellenan:
+    al sincronizar, con el máximo de cada resta durante el tiempo de
+    permanencia (cota del error restante); al divergir, con inf.
+    En sol se añaden estado_sync ("sincronizado", "divergente" o
+    "completo") y t_evento (instante de sincronización o de divergencia).
+    """
+    error_mode = opciones["error_mode"]
+    tol = opciones["sync_tol"]
+    dwell = opciones["sync_dwell"]
+    umbral = opciones["div_umbral"]
+    kwargs = argumentos_solver(sistema_dinamico, opciones)
+    (t_0, t_final), _ = intervalo_integracion(t_inicio)
+
+    with etapa("integracion", a=a_val, metodo=kwargs["method"]) as datos:
+        tramos = []
+        t, y = t_0, np.asarray(init_values, dtype=float)
+        estado, t_evento = "completo", None
+        debajo_desde = None
+        while t < t_final:
+            t_fin = min(t + opciones["parada_tramo"], t_final)
+            tramo = solve_ivp(sistema_dinamico, (t, t_fin), y, args=(a_val,),
+                              dense_output=True, **kwargs)
+            tramos.append(tramo)
+
+            # Muestreo fino del tramo para vigilar error y divergencia (también si
+            # el solver falló: suele ser porque la trayectoria explota)
+            t_m = np.linspace(t, tramo.t[-1], max(2, int(20 * (tramo.t[-1] - t)) + 1))
+            with np.errstate(all='ignore'):
+                y_m = salida_densa_vectorizada(tramo.sol)(t_m)
+                fuera = ~np.all(np.isfinite(y_m), axis=0) | (np.max(np.abs(y_m), axis=0) > umbral)
+            if np.any(fuera):
+                estado, t_evento = "divergente", float(t_m[np.argmax(fuera)])
+                break
+            if not tramo.success:
+                break
+
+            error = np.max(np.abs(diferencias(y_m, pares)), axis=0)
+            encima = np.nonzero(error > tol)[0]
+            if len(encima):
+                ultimo = encima[-1]
+                debajo_desde = float(t_m[ultimo + 1]) if ultimo + 1 < len(t_m) else None
+            elif debajo_desde is None:
+                debajo_desde = float(t_m[0])
+            if debajo_desde is not None and tramo.t[-1] - debajo_desde >= dwell:
+                estado, t_evento = "sincronizado", debajo_desde
+                break
+
+            t, y = tramo.t[-1], tramo.y[:, -1]
+        datos.update(contadores_solver(None, tramos), tramos=len(tramos), estado=estado)
+
+    densa = SolucionPorTramos(tramos)
+    t_alcanzado = tramos[-1].t[-1]
+    t_eval = T_EVAL[(T_EVAL >= t_0) & (T_EVAL <= t_alcanzado)]
+    sol = OptimizeResult(
+        t=t_eval, y=densa(t_eval) if len(t_eval) else np.empty((len(init_values), 0)),
+        sol=densa, success=all(tr.success for tr in tramos),
+        status=tramos[-1].status, message=tramos[-1].message,
+        nfev=sum(tr.nfev for tr in tramos), njev=sum(tr.njev for tr in tramos),
+        nlu=sum(tr.nlu for tr in tramos),
+        estado_sync=estado, t_evento=t_evento,
+    )
+
+    with etapa("extraccion", a=a_val):
+        maximos = maximos_por_ventana(sol, pares, error_mode, opciones["error_tol"], on_error)
+        cubiertas = VENTANAS + 1 <= t_alcanzado
+        if estado == "sincronizado":
+            t_dwell = np.linspace(t_evento, t_alcanzado, max(2, int(20 * (t_alcanzado - t_evento)) + 1))
+            relleno = np.max(np.abs(diferencias(densa(t_dwell), pares)), axis=1)
+            maximos[:, ~cubiertas] = relleno[:, None]
+        elif estado == "divergente":
+            maximos[:, ~cubiertas] = np.inf
+            maximos[~np.isfinite(maximos)] = np.inf
+    sol.sol = None
+    return sol, maximos
+
+
+def evaluar_a_en_flujo(sistema_dinamico, init_values, a_val, pares, opciones, t_inicio=None):
+    """
+    Como evaluar_a, pero integrando por tramos de stream_tramo hasta
+    stream_t_final sin guardar la trayectoria: cada tramo se muestrea con
+    su salida densa, pasa por los reductores de streaming.py y se descarta.
+    Los máximos son los de las len(VENTANAS) ventanas iguales de
+    [stream_t_medida, stream_t_final] (inf desde una divergencia). En sol
+    van las muestras diezmadas para graficar (stream_muestras puntos),
+    estado_sync ("divergente" o "completo"), t_evento y estadisticas
+    ({"rms": (P,), "hist": (P, HIST_BINS)}).
+
+    Reducir las muestras forma parte de la etapa de integración: medirlo
+    por tramo llenaría el perfil de eventos en horizontes largos.
+    """
+    kwargs = argumentos_solver(sistema_dinamico, opciones)
+    t_0 = T_SPAN[0] if t_inicio is None else max(T_SPAN[0], t_inicio)
+    t_final = float(opciones["stream_t_final"])
+    t_medida = max(t_0, float(opciones["stream_t_medida"]))
+    densidad = float(opciones["stream_densidad"])
+    umbral = opciones["div_umbral"]
+    n_pares = len(lista_pares(pares))
+
+    ventanas = streaming.MaximoPorVentana(np.linspace(t_medida, t_final, len(VENTANAS) + 1),
+                                          n_pares)
+    rms = streaming.RMSEnLinea(n_pares)
+    histograma = streaming.Histograma(n_pares)
+    t_graf = np.linspace(t_0, t_final, int(opciones["stream_muestras"]))
+    y_graf = np.full((len(init_values), len(t_graf)), np.nan)
+
+    with etapa("integracion", a=a_val, metodo=kwargs["method"]) as datos:
+        contadores = {"nfev": 0, "njev": 0, "nlu": 0, "pasos": 0}
+        t, y = t_0, np.asarray(init_values, dtype=float)
+        estado, t_evento, tramo = "completo", None, None
+        n_tramos = 0
+        while t < t_final:
+            t_fin = min(t + opciones["stream_tramo"], t_final)
+            tramo = solve_ivp(sistema_dinamico, (t, t_fin), y, args=(a_val,),
+                              dense_output=True, **kwargs)
+            n_tramos += 1
+            for clave, valor in contadores_solver(tramo).items():
+                contadores[clave] += valor or 0
+            densa = salida_densa_vectorizada(tramo.sol)
+            t_alcanzado = tramo.t[-1]
+
+            sel = (t_graf >= t) & (t_graf <= t_alcanzado)
+            if np.any(sel):
+                with np.errstate(all='ignore'):
+                    y_graf[:, sel] = densa(t_graf[sel])
+
+            inicio = max(t, t_medida)
+            if t_alcanzado > inicio:
+                t_m = np.linspace(inicio, t_alcanzado,
+                                  max(2, int(densidad * (t_alcanzado - inicio)) + 1))
+                with np.errstate(all='ignore'):
+                    y_m = densa(t_m)
+                    fuera = ~np.all(np.isfinite(y_m), axis=0) | (np.max(np.abs(y_m), axis=0) > umbral)
+                    d = np.abs(diferencias(y_m, pares))
+                if np.any(fuera):
+                    corte = np.argmax(fuera)
+                    estado, t_evento = "divergente", float(t_m[corte])
+                    for reductor in (ventanas, rms, histograma):
+                        reductor.actualizar(t_m[:corte], d[:, :corte])
+                    break
+                for reductor in (ventanas, rms, histograma):
+                    reductor.actualizar(t_m, d)
+            elif not np.all(np.isfinite(tramo.y[:, -1])):
+                estado, t_evento = "divergente", float(t_alcanzado)
+                break
+            if not tramo.success:
+                break
+            t, y = t_alcanzado, tramo.y[:, -1]
+        datos.update(contadores, tramos=n_tramos, estado=estado)
+
+    if estado == "divergente":
+        ventanas.marcar_desde(t_evento, np.inf)
+    maximos = ventanas.resultado()
+    validos = np.all(np.isfinite(y_graf), axis=0)
+    sol = OptimizeResult(
+        t=t_graf[validos], y=y_graf[:, validos],
+        sol=None, success=tramo is not None and tramo.success and estado != "divergente",
+        status=tramo.status if tramo is not None else -1,
+        message=tramo.message if tramo is not None else "Intervalo vacío",
+        nfev=contadores["nfev"], njev=contadores["njev"], nlu=contadores["nlu"],
+        estado_sync=estado, t_evento=t_evento,
+        estadisticas={"rms": rms.resultado(), "hist": histograma.resultado()},
+    )
+    return sol, maximos
+
+
+def elegir_metodo(sistema_dinamico, init_values, a_val, opciones, t_inicio=None):
+    """
+    Método para integrar un 'a' con method = "auto" (ver rigidez.py).
+    Devuelve (metodo, nfev por unidad de tiempo de la sonda con RK45).
+    """
+    (t_0, t_final), _ = intervalo_integracion(t_inicio)
+    if opciones["auto_rigido"] not in rigidez.RIGIDOS:
+        raise ValueError(f"auto_rigido debe ser uno de {', '.join(rigidez.RIGIDOS)}")
+    t_sonda = min(opciones["auto_sonda"], t_final - t_0)
+    with etapa("integracion", a=a_val, metodo="sondeo") as datos:
+        metodo, ritmo = rigidez.sondear(
+            sistema_dinamico, t_0, np.asarray(init_values, dtype=float), (a_val,),
+            argumentos_solver(sistema_dinamico, dict(opciones, method=rigidez.EXPLICITO)),
+            argumentos_solver(sistema_dinamico, dict(opciones, method=opciones["auto_rigido"])),
+            t_sonda, opciones["auto_umbral"])
+        datos.update(elegido=metodo, nfev_sonda=ritmo)
+    return metodo, ritmo
+
+
+def argumentos_solver(sistema_dinamico, opciones):
+    """
+    Argumentos de solve_ivp según el método elegido: a los implícitos se
+    les pasa el jacobiano analítico (o al menos su patrón de dispersión) si
+    sistema_dinamico es un SistemaCompilado.
+    """
+    metodo = opciones["method"]
+    kwargs = {"method": metodo, "rtol": opciones["rtol"], "atol": opciones["atol"]}
+    if metodo not in METODOS_IMPLICITOS:
+        return kwargs
+
+    # Sólo hace falta (y sólo es seguro) con el lado derecho vectorizado y
+    # cuando solve_ivp estima el jacobiano por diferencias
+    jac = getattr(sistema_dinamico, "jac", None) if opciones["jacobiano"] else None
+    if getattr(sistema_dinamico, "vectorized", False) and metodo != "LSODA" and jac is None:
+        kwargs["vectorized"] = True
+    if jac is not None:
+        if metodo == "LSODA" and sistema_dinamico.disperso:
+            # LSODA sólo acepta jacobianos densos
+            kwargs["jac"] = lambda t, y, a: jac(t, y, a).toarray()
+        else:
+            kwargs["jac"] = jac
+    elif metodo != "LSODA" and getattr(sistema_dinamico, "disperso", False):
+        kwargs["jac_sparsity"] = sistema_dinamico.sparsity
+    return kwargs
+
+
+def evaluar_lote(sistema_dinamico, init_values, a_values, pares, on_error=None, opciones=None):
+    """
+    Igual que evaluar_a pero para varios 'a' integrados juntos con el
+    integrador ensemble. Devuelve una lista de (sol, maximos), uno por 'a';
+    sol imita al OdeResult de solve_ivp (t, y, success, message, nfev).
+    init_values puede ser un array (n_vars, len(a_values)) con una
+    condición inicial por miembro del lote.
+    """
+    opciones = opciones_barrido(opciones)
+    error_mode = opciones["error_mode"]
+
+    # Se muestrea a la vez en T_EVAL (gráficas, modos interp/minimize) y en
+    # la malla de ventanas (modo denso)
+    t_malla = malla_ventanas(opciones["ensemble_muestras"])
+    t_todos = np.concatenate([T_EVAL, t_malla])
+    orden = np.argsort(t_todos, kind='stable')
+    with etapa("integracion", a_inicio=a_values[0], a_fin=a_values[-1], lote=len(a_values),
+               metodo=f"ensemble-{opciones['ensemble_method']}") as datos:
+        Y_ordenado, info = integrar_lote(
+            sistema_dinamico, T_SPAN, init_values, a_values, t_todos[orden],
+            method=opciones["ensemble_method"], h=opciones["ensemble_h"],
+            rtol=opciones["rtol"], atol=opciones["atol"])
+        datos.update(nfev=info["nfev"], pasos=info["n_pasos"], rechazados=info["rechazados"])
+    Y = np.empty_like(Y_ordenado)
+    Y[..., orden] = Y_ordenado
+    Y_eval = Y[..., :len(T_EVAL)]
+    Y_malla = Y[..., len(T_EVAL):]
+
+    resultados = []
+    for j in range(len(a_values)):
+        vivo = bool(info["vivos"][j])
+        sol = OptimizeResult(
+            t=T_EVAL, y=Y_eval[:, j, :], success=vivo,
+            status=0 if vivo else -1,
+            message="Ensemble: integración completada." if vivo
+                    else "Ensemble: la trayectoria divergió.",
+            nfev=info["nfev"], njev=0, nlu=0,
+        )
+        with etapa("extraccion", a=a_values[j]):
+            if error_mode == "denso":
+                maximos = maximos_malla(Y_malla[:, j, :], pares)
+            else:
+                maximos = maximos_por_ventana(sol, pares, error_mode, opciones["error_tol"], on_error)
+        resultados.append((sol, maximos))
+    return resultados
+
+
+def evaluar_cuenca(sistema_dinamico, init_values, a_val, pares, on_error=None, opciones=None):
+    """
+    Integra un 'a' desde cuenca_muestras condiciones iniciales (ver
+    cuenca.py) en lotes de ensemble_lote con evaluar_lote. Devuelve el
+    (sol, maximos) de la primera (la de info.txt), con sol["cuenca"] =
+    {"k", "fraccion": (P,), "cuantiles": (P, len(CUANTILES))}.
+    """
+    Y0 = cuenca.muestras(init_values, int(opciones["cuenca_muestras"]),
+                         opciones["cuenca_muestreo"], opciones["cuenca_radio"],
+                         opciones["cuenca_semilla"])
+    k = Y0.shape[1]
+    n_lote = max(1, int(opciones["ensemble_lote"]))
+    metricas = np.empty((k, len(lista_pares(pares))))
+    primero = None
+    for inicio in range(0, k, n_lote):
+        Y_lote = Y0[:, inicio:inicio + n_lote]
+        resultados = evaluar_lote(sistema_dinamico, Y_lote, np.full(Y_lote.shape[1], a_val),
+                                  pares, on_error, opciones)
+        for j, (sol, maximos) in enumerate(resultados):
+            metricas[inicio + j] = sweep2d.metrica(maximos) if sol.success else np.inf
+        if primero is None:
+            primero = resultados[0]
+    fraccion, cuantiles = cuenca.resumen(metricas, opciones["cuenca_sync"])
+    sol, maximos = primero
+    sol["cuenca"] = {"k": k, "fraccion": fraccion, "cuantiles": cuantiles}
+    return sol, maximos
+
+
+def evaluar_bloque(sistema_dinamico, init_values, a_values, pares, on_error=None, opciones=None):
+    """
+    Evalúa un bloque de valores de 'a' con el motor elegido en opciones.
+    Devuelve una lista de (sol, maximos) en el mismo orden que a_values.
+    Cada sol lleva en sol["segundos"] lo que costó su 'a' (con ensemble, la
+    parte del lote que le toca), para el modelo de coste (coste.py).
+    """
+    opciones = opciones_barrido(opciones)
+    if int(opciones["cuenca_muestras"]) > 1:
+        evaluar = evaluar_cuenca
+    elif opciones["engine"] == "ensemble" and not opciones["streaming"]:
+        # El modo por tramos (streaming) sólo existe con solve_ivp
+        t0 = time.perf_counter()
+        resultados = evaluar_lote(sistema_dinamico, init_values, a_values, pares,
+                                  on_error, opciones)
+        segundos = (time.perf_counter() - t0) / max(1, len(resultados))
+        for sol, _ in resultados:
+            sol["segundos"] = segundos
+        return resultados
+    elif opciones["engine"] in ENGINES:
+        evaluar = evaluar_a
+    else:
+        raise ValueError(f"Motor desconocido: {opciones['engine']}")
+    resultados = []
+    for a_val in a_values:
+        t0 = time.perf_counter()
+        sol, maximos = evaluar(sistema_dinamico, init_values, a_val, pares, on_error, opciones)
+        sol["segundos"] = time.perf_counter() - t0
+        resultados.append((sol, maximos))
+    return resultados
+
+
+def tam_bloque(opciones):
+    # Con cuenca_muestras cada 'a' ya es un lote de condiciones iniciales
+    if int(opciones["cuenca_muestras"]) > 1:
+        return 1
+    if opciones["engine"] == "ensemble" and not opciones["streaming"]:
+        return max(1, int(opciones["ensemble_lote"]))
+    return 1
+
+
+# Los workers no pueden recibir la función compilada (la generada con exec
+# no se puede serializar): cada proceso la reconstruye a partir de eq_code
+# la primera vez y la reutiliza desde su propia caché (compilar_sistema).
+
+
+def evaluar_bloque_worker(eq_code, init_values, a_values, pares, opciones=None, eventos=False):
+    """
+    Versión de evaluar_bloque para ProcessPoolExecutor. Devuelve
+    (resultados, errores, tiempos), con errores como lista de mensajes y
+    tiempos el profiling.TiemposEtapas del bloque (con sus eventos si se
+    piden).
+    """
+    tiempos = profiling.activar(profiling.TiemposEtapas(eventos))
+    try:
+        sistema_dinamico = compilar_sistema(eq_code)
+
+        errores = []
+
+        def on_error(p, i_time, e):
+            errores.append((p, i_time, str(e)))
+
+        resultados = evaluar_bloque(sistema_dinamico, init_values, a_values, pares,
+                                    on_error, opciones)
+    finally:
+        profiling.desactivar()
+    return resultados, errores, tiempos
+
+
+def evaluar_tesela(eq_code, nombre, p_values, a_values, init_values, pares,
+                   on_error=None, opciones=None):
+    """
+    Evalúa una tesela del barrido 2d: para cada valor p del parámetro
+    nombre, compila eq_code con p sustituido y barre a_values por bloques.
+    Devuelve la métrica (P, len(p_values), len(a_values)); NaN donde la
+    integración no dio ningún máximo.
+    """
+    opciones = opciones_barrido(opciones)
+    n_bloque = tam_bloque(opciones)
+    valores = np.full((len(pares), len(p_values), len(a_values)), np.nan)
+    for i, p_val in enumerate(p_values):
+        sistema_dinamico = compilar_sistema(sweep2d.sustituir_parametro(eq_code, nombre, p_val))
+        with profiling.contexto(p2=float(p_val)):
+            for inicio in range(0, len(a_values), n_bloque):
+                bloque = a_values[inicio:inicio + n_bloque]
+                resultados = evaluar_bloque(sistema_dinamico, init_values, bloque, pares,
+                                            on_error, opciones)
+                for j, (_, maximos) in enumerate(resultados):
+                    valores[:, i, inicio + j] = sweep2d.metrica(maximos)
+    return valores
+
+
+def evaluar_tesela_worker(eq_code, nombre, p_values, a_values, init_values, pares,
+                          opciones=None, eventos=False):
+    """
+    Versión de evaluar_tesela para ProcessPoolExecutor; devuelve
+    (valores, errores, tiempos) como evaluar_bloque_worker.
+    """
+    tiempos = profiling.activar(profiling.TiemposEtapas(eventos))
+    try:
+        errores = []
+
+        def on_error(p, i_time, e):
+            errores.append((p, i_time, str(e)))
+
+        valores = evaluar_tesela(eq_code, nombre, p_values, a_values, init_values, pares,
+                                 on_error, opciones)
+    finally:
+        profiling.desactivar()
+    return valores, errores, tiempos
+
+
+class SweepRunner:
+    """
+    Recorre las subcarpetas de base_folder y escribe el log.csv de cada una.
+
+    Los callbacks (todos opcionales) permiten a quien lo use (p. ej. BatchThread)
+    enterarse del avance:
+        on_progress(str), on_folder_done(idx), on_result(sol), on_mapa(subdir),
+        on_error(str)
+
+    on_error recibe los errores (los mismos de self.errores) y los avisos
+    que no deben perderse aunque no se muestre el avance (p. ej. cli.py con
+    --quiet). Sin on_error van también por on_progress.
+
+    on_mapa sólo se usa en el barrido "2d": se llama tras escribir cada
+    tesela con la subcarpeta cuyo mapa2d.npy ha cambiado.
+
+    Con workers > 1 los valores de 'a' de todos los grupos se reparten en un
+    ProcessPoolExecutor y los resultados se reordenan por 'a' antes de escribir.
+
+    opciones: dict con las claves de OPCIONES_DEFECTO que se quieran cambiar.
+    """
+    def __init__(self, base_folder, subfolders,
+                 on_progress=None, on_folder_done=None, on_result=None,
+                 workers=1, opciones=None, on_mapa=None, on_error=None):
+        self.base_folder = base_folder
+        self.subfolders = subfolders
+        self.workers = max(1, int(workers))
+        self.opciones = opciones_barrido(opciones)
+        self.on_progress = on_progress
+        self.on_folder_done = on_folder_done
+        self.on_result = on_result
+        self.on_mapa = on_mapa
+        self.on_error = on_error
+        self.stop_requested = False
+        # Mensajes de error del último run (subcarpetas omitidas, fallos de
+        # compilación o de integración)
+        self.errores = []
+        # profiling.TiemposEtapas del último run (con "perfil")
+        self.perfil = None
+        # Con "compartida" cada proceso guarda su propio perfil
+        self.nombre_perfil = "perfil"
+
+        # Para ETA
+        self.total_iterations = 0
+        self.done_iterations = 0
+        # coste.EstimadorETA del run en curso (sólo cuando se conoce de
+        # antemano todo lo pendiente: barrido uniforme sin continuación)
+        self.estimador = None
+
+    def request_stop(self):
+        self.stop_requested = True
+
+    def _progress(self, msg):
+        if self.on_progress:
+            self.on_progress(msg)
+
+    def _aviso(self, msg):
+        if self.on_error:
+            self.on_error(msg)
+        else:
+            self._progress(msg)
+
+    def _error(self, msg):
+        self.errores.append(msg)
+        self._aviso(msg)
+
+    def _sumar_tiempos(self, tiempos, grupo):
+        # Tiempos por etapa (y eventos) medidos en un worker
+        if profiling.activo() is not None:
+            profiling.activo().combinar(tiempos, restas=nombres_restas(grupo))
+
+    def _folder_done(self, idx):
+        if self.on_folder_done:
+            self.on_folder_done(idx)
+
+    def countTotalIterations(self, grupos=None):
+        """
+        Número de integraciones pendientes (una por 'a' y grupo), para el ETA.
+        Sin grupos sólo se leen info.txt y los diarios, sin reparar ni
+        convertir nada (un log.csv antiguo sin diario cuenta como pendiente).
+        """
+        if self.opciones["barrido"] in ("adaptativo", "2d") or self.opciones["continuacion"]:
+            # Adaptativo: sólo se conoce la rejilla gruesa; cada ronda de
+            # refinado suma sus puntos. Continuación: cada pasada (directa o
+            # inversa) suma los suyos al empezar. 2d: se cuentan las celdas
+            # de las teselas pendientes al abrir los mapas.
+            return 0
+        if grupos is not None:
+            return sum(len(g.a_values()) for g in grupos)
+        pendientes = {}
+        for folder_name in self.subfolders:
+            subdir = os.path.join(self.base_folder, folder_name)
+            try:
+                resta_name, a_start, a_stop, a_step, eq_code, init_values = parse_info_file(
+                    os.path.join(subdir, "info.txt"))
+            except Exception:
+                continue
+            formato = "npy" if result_store.existe(subdir) else "csv"
+            hechos = checkpoint.completados(checkpoint.ruta_diario(subdir, formato=formato))
+            clave = GrupoBarrido.clave(eq_code, init_values, a_start, a_stop, a_step)
+            n = len(np.arange(a_start, a_stop, a_step))
+            pendientes.setdefault(clave, set()).update(set(range(n)) - hechos)
+        return sum(len(p) for p in pendientes.values())
+
+    def run(self):
+        self.errores = []
+        try:
+            fijado = rigidez.leer_fijado(self.base_folder)
+        except ValueError as e:
+            self._error(str(e))
+            return
+        if fijado:
+            if fijado["method"] not in METHODS:
+                self._error(f"Método desconocido en {rigidez.NOMBRE_FIJADO}: {fijado['method']}")
+                return
+            self.opciones.update(fijado)
+            self._progress(f"Opciones fijadas por el proyecto ({rigidez.NOMBRE_FIJADO}): "
+                           + ", ".join(f"{k}={v}" for k, v in fijado.items()))
+        # Si ya hay un perfil activo (p. ej. el de benchmarks/) se suma a él
+        propio = self.opciones["perfil"] and profiling.activo() is None
+        if propio:
+            profiling.activar(profiling.TiemposEtapas(eventos=True))
+        try:
+            if self.opciones["compartida"]:
+                self._run_compartida()
+            else:
+                self._run()
+        finally:
+            if self.opciones["perfil"]:
+                self.perfil = profiling.activo()
+                self._exportar_perfil()
+            if propio:
+                profiling.desactivar()
+
+    def _run(self, subfolders=None):
+        if subfolders is None:
+            subfolders = self.subfolders
+        grupos, omitidas = agrupar_subcarpetas(self.base_folder, subfolders,
+                                               self.opciones["formato"])
+        if subfolders is not self.subfolders:
+            # on_folder_done recibe siempre índices de self.subfolders
+            omitidas = [(self.subfolders.index(subfolders[idx]), msg) for idx, msg in omitidas]
+            for grupo in grupos:
+                for tarea in grupo.tareas:
+                    tarea.idx = self.subfolders.index(tarea.folder_name)
+        for idx, msg in omitidas:
+            self._error(msg)
+            self._folder_done(idx)
+
+        self.total_iterations = self.countTotalIterations(grupos)
+        self.done_iterations = 0
+        self.start_time = time.time()
+        self.estimador = None
+        if self.total_iterations:
+            self.estimador = coste.EstimadorETA()
+            for grupo in grupos:
+                self.estimador.planificar(grupo, grupo.a_values())
+
+        for grupo in grupos:
+            try:
+                guardar_metadatos(grupo, self.opciones)
+            except OSError as e:
+                self._aviso(f"No se pudo escribir barrido.json: {e}")
+
+        try:
+            if self.opciones["barrido"] == "2d":
+                self.run_2d(grupos)
+            elif self.opciones["continuacion"]:
+                self.run_continuacion(grupos)
+            elif self.opciones["barrido"] == "adaptativo":
+                self.run_adaptativo(grupos)
+            elif self.workers > 1:
+                self.run_paralelo(grupos)
+            else:
+                self.run_serie(grupos)
+        finally:
+            self._progress(CACHE.resumen())
+
+    def _run_compartida(self):
+        """
+        Procesa las subcarpetas de grupo en grupo, cada uno con el arriendo
+        de todas sus subcarpetas (ver arriendos.py). Los grupos que tiene
+        otro proceso se vuelven a intentar cada latido hasta que se liberan
+        (ya terminados, y entonces no queda nada que hacer) o caducan (el
+        otro proceso cayó, y se reanudan aquí).
+        """
+        gestor = arriendos.GestorArriendos(self.base_folder, self.opciones["arriendo_duracion"],
+                                           self.opciones["arriendo_latido"],
+                                           on_perdido=self._arriendo_perdido)
+        self.nombre_perfil = "perfil_" + gestor.propietario.replace(":", "_")
+        self._progress(f"Carpeta compartida: este proceso es {gestor.propietario}")
+        restantes = self._grupos_info(self.subfolders)
+        gestor.iniciar()
+        hechas = 0
+        try:
+            esperando = False
+            while restantes and not self.stop_requested:
+                lote = next((g for g in restantes if gestor.reclamar_todas(g)), None)
+                if lote is None:
+                    if not esperando:
+                        n = sum(len(g) for g in restantes)
+                        self._progress(f"{n} subcarpetas en manos de otros procesos; esperando...")
+                        esperando = True
+                    fin = time.time() + self.opciones["arriendo_latido"]
+                    while time.time() < fin and not self.stop_requested:
+                        time.sleep(0.25)
+                    continue
+                esperando = False
+                restantes.remove(lote)
+                self._progress(f"Arriendo tomado: {', '.join(lote)}")
+                try:
+                    self._run(lote)
+                finally:
+                    hechas += self.done_iterations
+                    for subfolder in lote:
+                        gestor.liberar(subfolder)
+        finally:
+            gestor.detener()
+            self.done_iterations = hechas
+
+    def _grupos_info(self, subfolders):
+        """
+        Subcarpetas agrupadas como en agrupar_subcarpetas pero leyendo sólo
+        info.txt (sin tocar logs ni diarios, que pueden ser de otro proceso).
+        """
+        grupos = {}
+        for folder_name in subfolders:
+            try:
+                resta_name, a_start, a_stop, a_step, eq_code, init_values = parse_info_file(
+                    os.path.join(self.base_folder, folder_name, "info.txt"))
+                clave = GrupoBarrido.clave(eq_code, init_values, a_start, a_stop, a_step)
+            except Exception:
+                # _run la dará como omitida
+                clave = ("omitida", folder_name)
+            grupos.setdefault(clave, []).append(folder_name)
+        return list(grupos.values())
+
+    def _arriendo_perdido(self, subfolder):
+        self._error(f"Se perdió el arriendo de {subfolder} (otro proceso lo dio por "
+                    f"abandonado); se detiene este proceso.")
+        self.request_stop()
+
+    def _exportar_perfil(self):
+        """
+        Guarda los eventos del perfil en perfil.jsonl y perfil_trace.json
+        (formato de trazas de Chrome) y envía el resumen por on_progress.
+        """
+        if self.perfil is None:
+            return
+        for linea in profiling.resumen(self.perfil):
+            self._progress(linea)
+        if not self.perfil.eventos:
+            return
+        try:
+            base = os.path.join(self.base_folder, self.nombre_perfil)
+            profiling.exportar_jsonl(self.perfil, base + ".jsonl")
+            traza = profiling.exportar_chrome(self.perfil, base + "_trace.json")
+        except OSError as e:
+            self._aviso(f"No se pudo guardar el perfil: {e}")
+        else:
+            self._progress(f"Perfil guardado en {traza}")
+
+    def run_serie(self, grupos):
+        total_grupos = len(grupos)
+        for g_idx, grupo in enumerate(grupos):
+            if self.stop_requested:
+                self._progress("Proceso detenido por el usuario.")
+                break
+
+            nombres = ", ".join(t.folder_name for t in grupo.tareas)
+            self._progress(f"[{g_idx+1}/{total_grupos}] Procesando grupo de "
+                           f"{len(grupo.tareas)} restas: {nombres}")
+            with profiling.contexto(restas=nombres_restas(grupo)):
+                self.run_grupo(grupo)
+
+            for tarea in grupo.tareas:
+                self._folder_done(tarea.idx)
+
+    def run_grupo(self, grupo):
+        try:
+            sistema_dinamico = compilar_sistema(grupo.eq_code)
+        except Exception as e:
+            self._error(f"Error generando ecuación en {grupo.tareas[0].folder_name}: {e}")
+            return
+
+        a_values = grupo.a_values()
+        if len(a_values) == 0:
+            self._progress("Grupo ya completo o sin rango.")
+            return
+
+        pares = grupo.pares()
+        n_bloque = tam_bloque(self.opciones)
+
+        def on_error(p, i_time, e):
+            self._error(f"Error optimizando i={i_time} a={a_val} "
+                           f"en {grupo.tareas[p].folder_name}: {e}")
+
+        for inicio in range(0, len(a_values), n_bloque):
+            if self.stop_requested:
+                self._progress("Proceso detenido en mitad de iteración.")
+                break
+
+            bloque = a_values[inicio:inicio + n_bloque]
+            a_val = bloque[0]
+            try:
+                resultados = evaluar_bloque(sistema_dinamico, grupo.init_values,
+                                            bloque, pares, on_error, self.opciones)
+            except Exception as e:
+                self._error(f"Error solve_ivp a={a_val}: {e}")
+                break
+
+            self.add_results(grupo, bloque, resultados)
+            self.write_logs(grupo)
+
+    def add_results(self, grupo, bloque, resultados):
+        """
+        Guarda las filas de un bloque ya evaluado y avisa del avance. De cada
+        bloque sólo se envía a on_result la última solución correcta.
+        """
+        ultima = None
+        for a_val, (sol, maximos) in zip(bloque, resultados):
+            self.add_rows(grupo, a_val, maximos, sol)
+            self._report_iteration(grupo, a_val, sol)
+            if sol.success:
+                ultima = sol
+        if ultima is not None and self.on_result:
+            self.on_result(ultima)
+
+    def run_paralelo(self, grupos):
+        """
+        Reparte todos los bloques (grupo, a...) pendientes entre self.workers
+        procesos. Se mantienen pocos trabajos en vuelo para que request_stop
+        pueda cancelar el resto. Los bloques llegan en cualquier orden (más
+        aún con "orden_coste"), así que cada grupo guarda los terminados y
+        escribe en cuanto puede los que siguen en orden de 'a': log.csv
+        queda ordenado por 'a' como en el barrido en serie. Al detener se
+        escriben también los que esperaban (el diario admite huecos) y un
+        log.csv que acaba desordenado tras reanudar se ordena al completar
+        el grupo (checkpoint.ordenar_log).
+        """
+        n_bloque = tam_bloque(self.opciones)
+        trabajos = []
+        restantes = {}
+        # Por grupo: primer 'a' de los bloques aún sin escribir, en orden, y
+        # bloques terminados que esperan a los anteriores
+        por_escribir = {}
+        terminados = {}
+        for g_idx, grupo in enumerate(grupos):
+            try:
+                compilar_sistema(grupo.eq_code)
+            except Exception as e:
+                self._error(f"Error generando ecuación en {grupo.tareas[0].folder_name}: {e}")
+                for tarea in grupo.tareas:
+                    self._folder_done(tarea.idx)
+                continue
+
+            a_values = grupo.a_values()
+            if len(a_values) == 0:
+                self._progress("Grupo ya completo o sin rango.")
+                for tarea in grupo.tareas:
+                    self._folder_done(tarea.idx)
+                continue
+
+            restantes[g_idx] = 0
+            por_escribir[g_idx] = deque()
+            terminados[g_idx] = {}
+            for inicio in range(0, len(a_values), n_bloque):
+                trabajos.append((g_idx, a_values[inicio:inicio + n_bloque]))
+                por_escribir[g_idx].append(a_values[inicio])
+                restantes[g_idx] += 1
+
+        if not trabajos:
+            return
+
+        self._progress(f"Repartiendo {len(trabajos)} bloques de integraciones "
+                       f"en {self.workers} procesos...")
+
+        # Orden de lanzamiento: con "orden_coste", primero unos bloques de
+        # sondeo repartidos por la rejilla de cada grupo y después el resto
+        # de mayor a menor coste estimado, reordenado cada vez que el modelo
+        # aprende algo (longest-first: los 'a' lentos no quedan al final
+        # con los demás procesos parados)
+        sondeo = list(trabajos)
+        resto = []
+        orden = {"version": None}
+        if self.opciones["orden_coste"] and self.estimador is not None:
+            n_sondeo = max(3, self.workers)
+            sondeo = []
+            for g_idx in restantes:
+                propios = [t for t in trabajos if t[0] == g_idx]
+                elegidos = set(coste.indices_sondeo(len(propios), n_sondeo))
+                for i, trabajo in enumerate(propios):
+                    (sondeo if i in elegidos else resto).append(trabajo)
+        sondeo.reverse()
+
+        def siguiente():
+            if sondeo:
+                return sondeo.pop()
+            if not resto:
+                return None
+            modelo = self.estimador.modelo
+            if orden["version"] != modelo.version:
+                resto[:] = coste.ordenar(resto, modelo, lambda g_idx: grupos[g_idx])
+                orden["version"] = modelo.version
+            return resto.pop()
+
+        # 'spawn' evita heredar el estado de Qt de un proceso con hilos
+        ctx = multiprocessing.get_context("spawn")
+        en_vuelo = {}
+
+        def escribir(g_idx, todos=False):
+            # Los bloques terminados que siguen en orden de 'a' (con todos,
+            # también los que quedan tras un hueco)
+            grupo = grupos[g_idx]
+            cola, listos = por_escribir[g_idx], terminados[g_idx]
+            escritos = False
+            while cola and (cola[0] in listos or todos):
+                entrada = listos.pop(cola.popleft(), None)
+                if entrada is None:
+                    continue
+                for a_val, (sol, maximos) in zip(*entrada):
+                    self.add_rows(grupo, a_val, maximos, sol)
+                    escritos = True
+            if escritos:
+                self.write_logs(grupo)
+
+        def finalizar(g_idx, completo=True):
+            escribir(g_idx, todos=True)
+            for tarea in grupos[g_idx].tareas:
+                if completo and tarea.almacen is None and not tarea.bloques:
+                    checkpoint.ordenar_log(tarea.log_path)
+                self._folder_done(tarea.idx)
+            del restantes[g_idx]
+
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx) as executor:
+            def rellenar():
+                while len(en_vuelo) < 2 * self.workers:
+                    trabajo = siguiente()
+                    if trabajo is None:
+                        return
+                    g_idx, bloque = trabajo
+                    grupo = grupos[g_idx]
+                    fut = executor.submit(evaluar_bloque_worker, grupo.eq_code,
+                                          grupo.init_values, bloque, grupo.pares(),
+                                          self.opciones, profiling.registrando())
+                    en_vuelo[fut] = trabajo
+
+            rellenar()
+            while en_vuelo:
+                if self.stop_requested:
+                    self._progress("Proceso detenido en mitad de iteración.")
+                    for fut in en_vuelo:
+                        fut.cancel()
+                    break
+
+                hechos, _ = wait(list(en_vuelo), timeout=0.25, return_when=FIRST_COMPLETED)
+                for fut in hechos:
+                    g_idx, bloque = en_vuelo.pop(fut)
+                    grupo = grupos[g_idx]
+                    try:
+                        bloque_res, errores, tiempos = fut.result()
+                    except Exception as e:
+                        self._error(f"Error solve_ivp a={bloque[0]}: {e}")
+                        # Hueco: no retiene a los bloques siguientes
+                        terminados[g_idx][bloque[0]] = ([], [])
+                    else:
+                        self._sumar_tiempos(tiempos, grupo)
+                        for p, i_time, e in errores:
+                            self._error(f"Error optimizando i={i_time} "
+                                           f"en {grupo.tareas[p].folder_name}: {e}")
+                        terminados[g_idx][bloque[0]] = (bloque, bloque_res)
+                        for a_val, (sol, _) in zip(bloque, bloque_res):
+                            self._report_iteration(grupo, a_val, sol)
+                        correctas = [sol for sol, _ in bloque_res if sol.success]
+                        if correctas and self.on_result:
+                            self.on_result(correctas[-1])
+                    escribir(g_idx)
+
+                    restantes[g_idx] -= 1
+                    if restantes[g_idx] == 0:
+                        finalizar(g_idx)
+                rellenar()
+
+        # Grupos a medio hacer (detención): se escribe lo terminado
+        for g_idx in list(restantes):
+            finalizar(g_idx, completo=False)
+
+    def run_continuacion(self, grupos):
+        """
+        Barridos por continuación (ver continuation.py). Cada cadena de 'a' es
+        secuencial, así que los grupos se procesan uno tras otro en este
+        proceso y con el motor solve_ivp.
+        """
+        total_grupos = len(grupos)
+        for g_idx, grupo in enumerate(grupos):
+            if self.stop_requested:
+                self._progress("Proceso detenido por el usuario.")
+                break
+            nombres = ", ".join(t.folder_name for t in grupo.tareas)
+            self._progress(f"[{g_idx+1}/{total_grupos}] Continuación en el grupo de "
+                           f"{len(grupo.tareas)} restas: {nombres}")
+            with profiling.contexto(restas=nombres_restas(grupo)):
+                self.run_grupo_continuacion(grupo)
+
+            if self.opciones["cont_reverso"] and not self.stop_requested:
+                inverso = GrupoBarrido(grupo.eq_code, grupo.init_values,
+                                       grupo.a_start, grupo.a_stop, grupo.a_step)
+                inverso.tareas = [t.reverso() for t in grupo.tareas]
+                self._progress("Barrido inverso...")
+                with profiling.contexto(restas=nombres_restas(grupo), sentido="inverso"):
+                    self.run_grupo_continuacion(inverso)
+
+                if not self.stop_requested:
+                    for tarea, inversa in zip(grupo.tareas, inverso.tareas):
+                        a_hist = continuation.detectar_histeresis(
+                            tarea.subdir, tarea.metricas(), inversa.metricas(),
+                            grupo.a_start, grupo.a_step,
+                            self.opciones["hist_umbral"], self.opciones["sync_tol"])
+                        if a_hist:
+                            self._progress(f"{tarea.resta_name}: histéresis en "
+                                           f"a ∈ [{min(a_hist):.4g}, {max(a_hist):.4g}] "
+                                           f"({len(a_hist)} valores)")
+                        else:
+                            self._progress(f"{tarea.resta_name}: sin histéresis")
+
+            for tarea in grupo.tareas:
+                self._folder_done(tarea.idx)
+
+    def run_grupo_continuacion(self, grupo):
+        try:
+            sistema_dinamico = compilar_sistema(grupo.eq_code)
+        except Exception as e:
+            self._error(f"Error generando ecuación en {grupo.tareas[0].folder_name}: {e}")
+            return
+
+        sentido = grupo.tareas[0].sentido
+        sufijo = grupo.tareas[0].sufijo
+        grid = np.arange(grupo.a_start, grupo.a_stop, grupo.a_step)
+        if sentido < 0:
+            grid = grid[::-1]
+        pendientes = [k for k, a in enumerate(grid)
+                      if any(t.pendiente(a) for t in grupo.tareas)]
+        if not pendientes:
+            self._progress("Grupo ya completo o sin rango.")
+            return
+        k0 = pendientes[0]
+        self.total_iterations += len(grid) - k0
+
+        # Semilla: el estado guardado del 'a' anterior de la cadena o, al
+        # empezar el barrido inverso, el final del barrido directo
+        estado = None
+        if k0 > 0:
+            a_previo = grid[k0 - 1]
+            for tarea in grupo.tareas:
+                a_guardado, y = continuation.leer_estado(continuation.ruta_estado(tarea.subdir, sufijo))
+                if a_guardado is not None and abs(a_guardado - a_previo) < grupo.a_step / 2:
+                    estado = y
+                    break
+        elif sentido < 0:
+            for tarea in grupo.tareas:
+                a_guardado, y = continuation.leer_estado(continuation.ruta_estado(tarea.subdir))
+                if a_guardado is not None and abs(a_guardado - grid[0]) < grupo.a_step / 2:
+                    estado = y
+                    break
+
+        pares = grupo.pares()
+        t_corto = VENTANAS[0] - self.opciones["cont_transitorio"]
+
+        def on_error(p, i_time, e):
+            self._error(f"Error optimizando i={i_time} a={a_val} "
+                           f"en {grupo.tareas[p].folder_name}: {e}")
+
+        for a_val in grid[k0:]:
+            if self.stop_requested:
+                self._progress("Proceso detenido en mitad de iteración.")
+                break
+
+            # Sin semilla válida (inicio o divergencia) se hace el transitorio completo
+            if estado is None or not np.all(np.isfinite(estado)):
+                y0, t_inicio = grupo.init_values, None
+            else:
+                y0, t_inicio = estado, t_corto
+            try:
+                sol, maximos = evaluar_a(sistema_dinamico, y0, a_val, pares,
+                                         on_error, self.opciones, t_inicio)
+            except Exception as e:
+                self._error(f"Error solve_ivp a={a_val}: {e}")
+                break
+
+            estado = sol.y[:, -1] if sol.y.shape[1] else None
+            self.add_results(grupo, [a_val], [(sol, maximos)])
+            self.write_logs(grupo)
+            if estado is not None:
+                for tarea in grupo.tareas:
+                    continuation.guardar_estado(
+                        continuation.ruta_estado(tarea.subdir, sufijo), a_val, estado)
+
+    def run_adaptativo(self, grupos):
+        """
+        Barrido adaptativo (ver adaptive_sweep.py), grupo a grupo. Con
+        workers > 1 los puntos de cada ronda se reparten en un pool.
+        """
+        if self.workers > 1:
+            ctx = multiprocessing.get_context("spawn")
+            pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+        else:
+            pool = nullcontext()
+
+        with pool as executor:
+            total_grupos = len(grupos)
+            for g_idx, grupo in enumerate(grupos):
+                if self.stop_requested:
+                    self._progress("Proceso detenido por el usuario.")
+                    break
+                nombres = ", ".join(t.folder_name for t in grupo.tareas)
+                self._progress(f"[{g_idx+1}/{total_grupos}] Barrido adaptativo del grupo "
+                               f"de {len(grupo.tareas)} restas: {nombres}")
+                with profiling.contexto(restas=nombres_restas(grupo)):
+                    self.run_grupo_adaptativo(grupo, executor)
+                for tarea in grupo.tareas:
+                    self._folder_done(tarea.idx)
+
+    def _evaluar_puntos(self, grupo, sistema_dinamico, a_list, executor):
+        """
+        Evalúa los 'a' de a_list por bloques, en este proceso o en executor.
+        Va devolviendo (generador) una lista de (a_val, sol, maximos) por
+        bloque; los bloques que fallan se avisan por on_progress y dan sol
+        None y maximos NaN.
+        """
+        n_bloque = tam_bloque(self.opciones)
+        bloques = [a_list[i:i + n_bloque] for i in range(0, len(a_list), n_bloque)]
+        pares = grupo.pares()
+        fallo = np.full((len(pares), len(VENTANAS)), np.nan)
+
+        if executor is not None:
+            futuros = [executor.submit(evaluar_bloque_worker, grupo.eq_code,
+                                       grupo.init_values, bloque, pares, self.opciones,
+                                       profiling.registrando())
+                       for bloque in bloques]
+
+        for i, bloque in enumerate(bloques):
+            if self.stop_requested:
+                if executor is not None:
+                    for fut in futuros[i:]:
+                        fut.cancel()
+                break
+            try:
+                if executor is None:
+                    resultados = evaluar_bloque(sistema_dinamico, grupo.init_values,
+                                                bloque, pares, None, self.opciones)
+                else:
+                    resultados, _, tiempos = futuros[i].result()
+                    self._sumar_tiempos(tiempos, grupo)
+            except Exception as e:
+                self._error(f"Error solve_ivp a={bloque[0]}: {e}")
+                resultados = [(None, fallo) for _ in bloque]
+            yield [(a_val, sol, maximos) for a_val, (sol, maximos) in zip(bloque, resultados)]
+
+    def run_grupo_adaptativo(self, grupo, executor=None):
+        try:
+            sistema_dinamico = compilar_sistema(grupo.eq_code)
+        except Exception as e:
+            self._error(f"Error generando ecuación en {grupo.tareas[0].folder_name}: {e}")
+            return
+
+        grid = np.arange(grupo.a_start, grupo.a_stop, grupo.a_step)
+        if len(grid) == 0:
+            self._progress("Grupo sin rango.")
+            return
+        resolucion = max(self.opciones["adapt_resolucion"], grupo.a_step)
+        paso_min = max(1, int(round(resolucion / grupo.a_step)))
+        piso = self.opciones["sync_tol"]
+
+        # Reanudación: un 'a' cuenta como evaluado si todas las restas lo tienen
+        guardadas = [t.metricas() for t in grupo.tareas]
+        comunes = set.intersection(*(set(g) for g in guardadas))
+        metricas = {k: np.array([g[k] for g in guardadas]) for k in comunes}
+
+        candidatos = adaptive_sweep.indices_iniciales(len(grid), self.opciones["adapt_puntos"], paso_min)
+        ronda = 0
+        while candidatos and not self.stop_requested:
+            pendientes = [k for k in sorted(set(candidatos)) if k not in metricas]
+            ronda += 1
+            if pendientes:
+                self.total_iterations += len(pendientes)
+                self._progress(f"Ronda {ronda}: {len(pendientes)} valores de 'a' nuevos")
+                ultima = None
+                for evaluados in self._evaluar_puntos(grupo, sistema_dinamico,
+                                                      grid[pendientes], executor):
+                    for a_val, sol, maximos in evaluados:
+                        k = adaptive_sweep.indice_de_a(a_val, grupo.a_start, grupo.a_step)
+                        metricas[k] = np.nanmean(maximos, axis=1) if np.any(np.isfinite(maximos)) \
+                            else np.full(len(grupo.tareas), np.nan)
+                        self.add_rows(grupo, a_val, maximos, sol, filtrar=False)
+                        self._report_iteration(grupo, a_val)
+                        if sol is not None and sol.success:
+                            ultima = sol
+                    self.write_logs(grupo)
+                if ultima is not None and self.on_result:
+                    self.on_result(ultima)
+            candidatos = adaptive_sweep.indices_a_refinar(
+                metricas, self.opciones["adapt_umbral"], paso_min, piso)
+
+        if self.stop_requested:
+            self._progress("Proceso detenido en mitad de iteración.")
+            return
+
+        for p, tarea in enumerate(grupo.tareas):
+            critico = adaptive_sweep.estimar_critico(grid, metricas, p, self.opciones["adapt_sync"])
+            adaptive_sweep.guardar_critico(os.path.join(tarea.subdir, "critico.json"),
+                                           critico, len(metricas), self.opciones)
+            if critico:
+                self._progress(f"{tarea.resta_name}: a crítico ≈ {critico['a_critico']:.4g} "
+                               f"en [{critico['intervalo'][0]:.4g}, {critico['intervalo'][1]:.4g}] "
+                               f"({len(metricas)} de {len(grid)} valores de 'a' integrados)")
+            else:
+                self._progress(f"{tarea.resta_name}: no se encontró transición a la sincronización")
+
+    def run_2d(self, grupos):
+        """
+        Barrido en 'a' y en el parámetro opciones["p2_nombre"] (ver
+        sweep2d.py). Las teselas pendientes de todos los grupos se evalúan
+        en este proceso o, con workers > 1, en un pool con pocas en vuelo
+        (como run_paralelo). Cada tesela se escribe en el mapa de todas las
+        restas de su grupo en cuanto llega.
+        """
+        nombre = self.opciones["p2_nombre"]
+        p_values = sweep2d.rejilla(self.opciones["p2_start"], self.opciones["p2_stop"],
+                                   self.opciones["p2_step"])
+        if len(p_values) == 0:
+            self._error(f"Rejilla vacía para el parámetro {nombre}.")
+            return
+
+        trabajos = []
+        mapas = {}
+        restantes = {}
+        for g_idx, grupo in enumerate(grupos):
+            a_values = np.arange(grupo.a_start, grupo.a_stop, grupo.a_step)
+            try:
+                sweep2d.sustituir_parametro(grupo.eq_code, nombre, p_values[0])
+                mapas[g_idx] = [sweep2d.Mapa2D.abrir_o_crear(t.subdir, a_values, p_values, nombre)
+                                for t in grupo.tareas]
+            except Exception as e:
+                self._error(f"Error preparando el mapa 2d en {grupo.tareas[0].folder_name}: {e}")
+                for tarea in grupo.tareas:
+                    self._folder_done(tarea.idx)
+                continue
+
+            hechas = np.logical_and.reduce([m.hechas() for m in mapas[g_idx]])
+            pendientes = [t for t in sweep2d.teselas(len(p_values), len(a_values),
+                                                     int(self.opciones["tesela_p2"]),
+                                                     int(self.opciones["tesela_a"]))
+                          if not hechas[t[0]:t[1], t[2]:t[3]].all()]
+            if not pendientes:
+                self._progress("Mapa ya completo o sin rango.")
+                for tarea in grupo.tareas:
+                    self._folder_done(tarea.idx)
+                continue
+            restantes[g_idx] = len(pendientes)
+            for tesela in pendientes:
+                trabajos.append((g_idx, tesela))
+                self.total_iterations += (tesela[1] - tesela[0]) * (tesela[3] - tesela[2])
+
+        if not trabajos:
+            return
+        self._progress(f"Barrido 2d en {nombre} ({len(p_values)} valores) y 'a': "
+                       f"{len(trabajos)} teselas, {self.total_iterations} celdas pendientes")
+
+        def argumentos(g_idx, tesela):
+            grupo = grupos[g_idx]
+            p0, p1, a0, a1 = tesela
+            a_values = np.arange(grupo.a_start, grupo.a_stop, grupo.a_step)
+            return (grupo.eq_code, nombre, p_values[p0:p1], a_values[a0:a1],
+                    grupo.init_values, grupo.pares())
+
+        def terminar(g_idx, tesela, resultado):
+            grupo = grupos[g_idx]
+            valores, errores, tiempos = resultado
+            if tiempos is not None:
+                self._sumar_tiempos(tiempos, grupo)
+            for p, i_time, e in errores:
+                self._error(f"Error optimizando i={i_time} en {grupo.tareas[p].folder_name}: {e}")
+            for p, (tarea, mapa) in enumerate(zip(grupo.tareas, mapas[g_idx])):
+                with etapa("escritura", carpeta=tarea.folder_name, resta=tarea.resta_name,
+                           n_a=valores[p].size):
+                    mapa.escribir(tesela, valores[p])
+                if self.on_mapa:
+                    self.on_mapa(tarea.subdir)
+            self._report_tesela(grupo, tesela, p_values)
+
+        def fallo(g_idx, tesela, e):
+            p0, p1, a0, a1 = tesela
+            self._error(f"Error en la tesela {nombre}[{p0}:{p1}], a[{a0}:{a1}]: {e}")
+
+        def finalizar(g_idx):
+            restantes[g_idx] -= 1
+            if restantes[g_idx] == 0:
+                for tarea in grupos[g_idx].tareas:
+                    self._folder_done(tarea.idx)
+                del restantes[g_idx]
+
+        if self.workers <= 1:
+            for g_idx, tesela in trabajos:
+                if self.stop_requested:
+                    self._progress("Proceso detenido en mitad de iteración.")
+                    break
+                grupo = grupos[g_idx]
+                errores = []
+                try:
+                    with profiling.contexto(restas=nombres_restas(grupo)):
+                        valores = evaluar_tesela(*argumentos(g_idx, tesela),
+                                                 lambda p, i, e: errores.append((p, i, str(e))),
+                                                 self.opciones)
+                except Exception as e:
+                    fallo(g_idx, tesela, e)
+                else:
+                    terminar(g_idx, tesela, (valores, errores, None))
+                finalizar(g_idx)
+        else:
+            ctx = multiprocessing.get_context("spawn")
+            cola = iter(trabajos)
+            en_vuelo = {}
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx) as executor:
+                def rellenar():
+                    while len(en_vuelo) < 2 * self.workers:
+                        trabajo = next(cola, None)
+                        if trabajo is None:
+                            return
+                        fut = executor.submit(evaluar_tesela_worker, *argumentos(*trabajo),
+                                              self.opciones, profiling.registrando())
+                        en_vuelo[fut] = trabajo
+
+                rellenar()
+                while en_vuelo:
+                    if self.stop_requested:
+                        self._progress("Proceso detenido en mitad de iteración.")
+                        for fut in en_vuelo:
+                            fut.cancel()
+                        break
+                    hechos, _ = wait(list(en_vuelo), timeout=0.25, return_when=FIRST_COMPLETED)
+                    for fut in hechos:
+                        g_idx, tesela = en_vuelo.pop(fut)
+                        try:
+                            resultado = fut.result()
+                        except Exception as e:
+                            fallo(g_idx, tesela, e)
+                        else:
+                            terminar(g_idx, tesela, resultado)
+                        finalizar(g_idx)
+                    rellenar()
+
+        # Grupos a medio hacer (detención): las teselas escritas ya están en disco
+        for g_idx in list(restantes):
+            for tarea in grupos[g_idx].tareas:
+                self._folder_done(tarea.idx)
+
+    def _report_tesela(self, grupo, tesela, p_values):
+        p0, p1, a0, a1 = tesela
+        self.done_iterations += (p1 - p0) * (a1 - a0)
+        elapsed = time.time() - self.start_time
+        speed = self.done_iterations / elapsed if elapsed > 0 else 0
+        remaining = self.total_iterations - self.done_iterations
+        eta = remaining / speed if speed > 0 else 0
+
+        restas = ", ".join(t.resta_name for t in grupo.tareas)
+        self._progress(
+            f"Restas={restas}, {self.opciones['p2_nombre']}="
+            f"[{p_values[p0]:.3f}, {p_values[p1 - 1]:.3f}], a[{a0}:{a1}], "
+            f"Celdas={self.done_iterations}/{self.total_iterations}, "
+            f"ETA={eta:.1f}s"
+        )
+
+    def add_rows(self, grupo, a_val, maximos, sol=None, filtrar=True):
+        """
+        Añade las filas de un 'a' a cada resta del grupo. Con filtrar, se
+        omiten las restas que ya tenían ese 'a' guardado (reanudación).
+        """
+        estado = sol.get("estado_sync") if sol is not None else None
+        estadisticas = sol.get("estadisticas") if sol is not None else None
+        conjunto = sol.get("cuenca") if sol is not None else None
+        metodo = sol.get("metodo") if sol is not None else None
+        for p, tarea in enumerate(grupo.tareas):
+            if filtrar and not tarea.pendiente(a_val):
+                continue
+            eventos = [(estado, sol.get("t_evento"))] if estado is not None else []
+            tarea.bloques.append((a_val, maximos[p], eventos))
+            if estadisticas is not None:
+                tarea.estadisticas.append((a_val, estadisticas["rms"][p], estadisticas["hist"][p]))
+            if conjunto is not None:
+                tarea.cuencas.append((a_val, conjunto["k"], conjunto["fraccion"][p],
+                                      conjunto["cuantiles"][p]))
+            if metodo is not None:
+                tarea.metodos.append((a_val,) + tuple(metodo))
+
+    def _report_iteration(self, grupo, a_val, sol=None):
+        self.done_iterations += 1
+        if self.estimador is not None:
+            if sol is not None and "segundos" in sol:
+                self.estimador.completar(grupo, a_val, sol["segundos"], sol.get("nfev"))
+            texto = coste.texto_eta(*self.estimador.estimar())
+        else:
+            elapsed = time.time() - self.start_time
+            speed = self.done_iterations / elapsed if elapsed > 0 else 0
+            remaining = self.total_iterations - self.done_iterations
+            texto = f"ETA={remaining / speed if speed > 0 else 0:.1f}s"
+
+        restas = ", ".join(t.resta_name for t in grupo.tareas)
+        self._progress(
+            f"Restas={restas}, a={a_val:.3f}, "
+            f"Iter={self.done_iterations}/{self.total_iterations}, "
+            f"{texto}"
+        )
+
+    def write_logs(self, grupo):
+        """
+        Escribe (con fsync) los 'a' calculados desde la última llamada y los
+        marca como completados.
+        """
+        for tarea in grupo.tareas:
+            if not tarea.bloques:
+                continue
+            with etapa("escritura", carpeta=tarea.folder_name, resta=tarea.resta_name,
+                       n_a=len(tarea.bloques)):
+                # Antes que el diario: un 'a' apuntado siempre tiene sus estadísticas
+                streaming.anexar_estadisticas(tarea.estadisticas_path, tarea.estadisticas)
+                cuenca.anexar(tarea.cuenca_path, tarea.cuencas)
+                rigidez.anexar(tarea.metodos_path, tarea.metodos)
+                tarea.estadisticas = []
+                tarea.cuencas = []
+                tarea.metodos = []
+                escritos = checkpoint.anexar(tarea.diario, tarea.log_path, tarea.eventos_path,
+                                             tarea.bloques, tarea.a_start, tarea.a_step,
+                                             tarea.almacen)
+            tarea.completados.update(escritos)
+            tarea.bloques = []
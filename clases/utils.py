@@ -1,8 +1,28 @@
 import os
+import re
 import json
 import numpy as np
 import pandas as pd
 
+from clases import network
+from clases.error_extraction import ErrorGlobal
+
+# Variables de nodo en info.txt y en los nombres de resta: componente + número
+# de nodo (x1, y12, z300...)
+_VARIABLE = re.compile(r"^([A-Za-z_]+?)(\d+)$")
+
+
+def _valor_red(texto):
+    texto = texto.strip()
+    if texto.lower() in ("true", "false"):
+        return texto.lower() == "true"
+    for tipo in (int, float):
+        try:
+            return tipo(texto)
+        except ValueError:
+            pass
+    return texto
+
 def parse_info_file(info_path):
     with open(info_path, "r", encoding="utf-8") as f:
         lines = f.readlines()
@@ -14,9 +34,11 @@ def parse_info_file(info_path):
     a_step = None
     eq_code_lines = []
     init_dict = {}
+    red = None
 
     in_equations = False
     in_init = False
+    in_red = False
 
     for line in lines:
         if line.startswith("Resta:"):
@@ -31,13 +53,27 @@ def parse_info_file(info_path):
         elif line.lower().startswith("ecuaciones:"):
             in_equations = True
             in_init = False
+            in_red = False
             continue
         elif line.lower().startswith("condicionesiniciales:"):
             in_equations = False
             in_init = True
+            in_red = False
+            continue
+        elif line.lower().startswith("red:"):
+            in_equations = False
+            in_init = False
+            in_red = True
+            red = {}
             continue
         else:
-            if in_equations:
+            if in_red:
+                if "=" in line:
+                    clave, valor = line.split("=", 1)
+                    red[clave.strip()] = _valor_red(valor)
+                elif not line.strip():
+                    in_red = False
+            elif in_equations:
                 eq_code_lines.append(line)
             elif in_init:
                 parts = line.split("=")
@@ -47,23 +83,49 @@ def parse_info_file(info_path):
                     init_dict[var_name] = val
 
     eq_code = "\n".join(eq_code_lines)
-    init_values = [
-        init_dict.get("x1",0.0),
-        init_dict.get("y1",0.0),
-        init_dict.get("z1",0.0),
-        init_dict.get("x2",0.0),
-        init_dict.get("y2",0.0),
-        init_dict.get("z2",0.0)
-    ]
+    if red is None:
+        # Par de sistemas de siempre: x1, y1, z1, x2, y2, z2
+        init_values = [init_dict.get(v, 0.0) for v in ("x1", "y1", "z1", "x2", "y2", "z2")]
+        return resta_name, a_start, a_stop, a_step, eq_code, init_values
+
+    # Red de N nodos (ver network.py)
+    red = dict(network.RED_DEFECTO, **red)
+    if "archivo" in red and not os.path.isabs(red["archivo"]):
+        red["archivo"] = os.path.join(os.path.dirname(os.path.abspath(info_path)), red["archivo"])
+    eq_code = network.codigo_red(red, eq_code)
+    comps = network.componentes(eq_code)
+    dadas = {}
+    for var_name, val in init_dict.items():
+        m = _VARIABLE.match(var_name)
+        if m and m.group(1) in comps:
+            dadas[(int(m.group(2)) - 1, comps.index(m.group(1)))] = val
+    init_values = network.condiciones_iniciales(red, len(comps), dadas)
 
     return resta_name, a_start, a_stop, a_step, eq_code, init_values
 
-def parse_resta_name(resta_name):
-    mapping = {"x1":0,"y1":1,"z1":2,"x2":3,"y2":4,"z2":5}
+def parse_resta_name(resta_name, componentes=network.COMPONENTES):
+    """
+    Índices de la resta en el vector de estado (nodo a nodo, con las
+    componentes dadas por nodo): "x1 - x2" -> (0, 3), "y12 - y40" -> ...
+    "global x" (o "global x,y", o "global") da el error de sincronización
+    de toda la red (error_extraction.ErrorGlobal).
+    """
+    d = len(componentes)
     r = resta_name.replace(" ","")
+    if r.lower().startswith("global"):
+        pedidas = [c for c in r[len("global"):].split(",") if c] or list(componentes)
+        if len(pedidas) == 1 and pedidas[0] not in componentes:
+            # "global xyz"
+            pedidas = list(pedidas[0])
+        return ErrorGlobal([componentes.index(c) for c in pedidas if c in componentes] or [0], d)
     if "-" not in r:
-        return (0,3)
+        return (0,d)
+
+    def indice(var_name, defecto):
+        m = _VARIABLE.match(var_name)
+        if not m or m.group(1) not in componentes:
+            return defecto
+        return (int(m.group(2)) - 1) * d + componentes.index(m.group(1))
+
     varA, varB = r.split("-",1)
-    idxA = mapping.get(varA, 0)
-    idxB = mapping.get(varB, 3)
-    return (idxA, idxB)
+    return (indice(varA, 0), indice(varB, d))
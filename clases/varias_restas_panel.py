@@ -1,10 +1,18 @@
 import os
 from PyQt6 import QtWidgets, QtCore
 from clases.batch_thread import BatchThread
+from clases.error_extraction import ERROR_MODES
+from clases.sweep_engine import ENGINES, METHODS, BARRIDOS, OPCIONES_DEFECTO
+from clases.result_store import FORMATOS
+from clases.plot_stream import REFRESCO_HZ
+from clases.cuenca import MUESTREOS
+from clases import rigidez
 
 class VariasRestasPanel(QtWidgets.QGroupBox):
     progress_message_signal = QtCore.pyqtSignal(str)
     plot_batch_results = QtCore.pyqtSignal(object) # New signal
+    # Barrido 2d: ruta de la subcarpeta cuyo mapa hay que redibujar
+    plot_mapa = QtCore.pyqtSignal(str)
 
     def __init__(self, title="Varias restas", parent=None):
         super().__init__(title, parent)
@@ -16,6 +24,136 @@ class VariasRestasPanel(QtWidgets.QGroupBox):
         self.restaList = QtWidgets.QListWidget()
         layout.addWidget(self.restaList)
 
+        # Procesos para repartir los valores de 'a' (1 = en serie)
+        workersLayout = QtWidgets.QHBoxLayout()
+        workersLayout.addWidget(QtWidgets.QLabel("Procesos:"))
+        self.workersSpin = QtWidgets.QSpinBox()
+        self.workersSpin.setRange(1, max(1, os.cpu_count() or 1))
+        self.workersSpin.setValue(1)
+        workersLayout.addWidget(self.workersSpin)
+
+        # Cómo se extrae el máximo por ventana (ver error_extraction.py)
+        workersLayout.addWidget(QtWidgets.QLabel("Error:"))
+        self.errorModeCombo = QtWidgets.QComboBox()
+        self.errorModeCombo.addItems(ERROR_MODES)
+        workersLayout.addWidget(self.errorModeCombo)
+
+        # solve_ivp por 'a' o integrador ensemble por lotes de 'a'
+        workersLayout.addWidget(QtWidgets.QLabel("Motor:"))
+        self.engineCombo = QtWidgets.QComboBox()
+        self.engineCombo.addItems(ENGINES)
+        workersLayout.addWidget(self.engineCombo)
+
+        # Método de solve_ivp (los implícitos usan el jacobiano analítico;
+        # "auto" lo elige por 'a' según la rigidez, ver rigidez.py)
+        workersLayout.addWidget(QtWidgets.QLabel("Método:"))
+        self.methodCombo = QtWidgets.QComboBox()
+        self.methodCombo.addItems(METHODS)
+        workersLayout.addWidget(self.methodCombo)
+        layout.addLayout(workersLayout)
+
+        # Método fijado por la carpeta (metodo.json), que manda sobre el combo
+        self.fijarMetodoCheck = QtWidgets.QCheckBox("Fijar el método en esta carpeta")
+        layout.addWidget(self.fijarMetodoCheck)
+
+        # Rejilla uniforme de 'a' o refinado adaptativo alrededor de la transición
+        barridoLayout = QtWidgets.QHBoxLayout()
+        barridoLayout.addWidget(QtWidgets.QLabel("Barrido:"))
+        self.barridoCombo = QtWidgets.QComboBox()
+        self.barridoCombo.addItems(BARRIDOS)
+        barridoLayout.addWidget(self.barridoCombo)
+        # Continuación: cada 'a' parte del estado final del anterior
+        self.continuacionCheck = QtWidgets.QCheckBox("Continuación")
+        barridoLayout.addWidget(self.continuacionCheck)
+        self.reversoCheck = QtWidgets.QCheckBox("Barrido inverso (histéresis)")
+        self.reversoCheck.setEnabled(False)
+        self.continuacionCheck.toggled.connect(self.reversoCheck.setEnabled)
+        barridoLayout.addWidget(self.reversoCheck)
+        barridoLayout.addWidget(QtWidgets.QLabel("Formato:"))
+        self.formatoCombo = QtWidgets.QComboBox()
+        self.formatoCombo.addItems(FORMATOS)
+        barridoLayout.addWidget(self.formatoCombo)
+        layout.addLayout(barridoLayout)
+
+        # Barrido 2d: segundo parámetro de las ecuaciones y tamaño de tesela
+        self.p2Group = QtWidgets.QWidget()
+        p2Layout = QtWidgets.QHBoxLayout(self.p2Group)
+        p2Layout.setContentsMargins(0, 0, 0, 0)
+        p2Layout.addWidget(QtWidgets.QLabel("Parámetro:"))
+        self.p2NombreEdit = QtWidgets.QLineEdit(OPCIONES_DEFECTO["p2_nombre"])
+        self.p2NombreEdit.setMaximumWidth(60)
+        p2Layout.addWidget(self.p2NombreEdit)
+        self.p2StartSpin, self.p2StopSpin, self.p2StepSpin = (
+            self._spin_p2(p2Layout, etiqueta, OPCIONES_DEFECTO[clave])
+            for etiqueta, clave in (("desde", "p2_start"), ("hasta", "p2_stop"),
+                                    ("paso", "p2_step")))
+        p2Layout.addWidget(QtWidgets.QLabel("Tesela:"))
+        self.teselaP2Spin = QtWidgets.QSpinBox()
+        self.teselaP2Spin.setRange(1, 1000)
+        self.teselaP2Spin.setValue(OPCIONES_DEFECTO["tesela_p2"])
+        p2Layout.addWidget(self.teselaP2Spin)
+        p2Layout.addWidget(QtWidgets.QLabel("x"))
+        self.teselaASpin = QtWidgets.QSpinBox()
+        self.teselaASpin.setRange(1, 1000)
+        self.teselaASpin.setValue(OPCIONES_DEFECTO["tesela_a"])
+        p2Layout.addWidget(self.teselaASpin)
+        layout.addWidget(self.p2Group)
+        self.barridoCombo.currentTextChanged.connect(self.onBarridoChanged)
+        self.onBarridoChanged(self.barridoCombo.currentText())
+
+        # Gráficas en vivo: como mucho refrescoSpin veces por segundo, sólo
+        # la última solución; desactivarlas no frena el barrido
+        graficaLayout = QtWidgets.QHBoxLayout()
+        self.graficarCheck = QtWidgets.QCheckBox("Graficar en vivo")
+        self.graficarCheck.setChecked(True)
+        self.graficarCheck.toggled.connect(self.onGraficarToggled)
+        graficaLayout.addWidget(self.graficarCheck)
+        graficaLayout.addWidget(QtWidgets.QLabel("Refresco (Hz):"))
+        self.refrescoSpin = QtWidgets.QDoubleSpinBox()
+        self.refrescoSpin.setRange(0.5, 60.0)
+        self.refrescoSpin.setValue(REFRESCO_HZ)
+        graficaLayout.addWidget(self.refrescoSpin)
+        layout.addLayout(graficaLayout)
+
+        # Cortar cada integración al sincronizar o divergir (eventos.csv)
+        self.earlyStopCheck = QtWidgets.QCheckBox("Parada temprana (sincronización/divergencia)")
+        layout.addWidget(self.earlyStopCheck)
+
+        # Horizontes largos: integración por tramos con memoria acotada
+        streamLayout = QtWidgets.QHBoxLayout()
+        self.streamingCheck = QtWidgets.QCheckBox("Por tramos hasta t =")
+        streamLayout.addWidget(self.streamingCheck)
+        self.tFinalSpin = QtWidgets.QDoubleSpinBox()
+        self.tFinalSpin.setRange(310.0, 1e7)
+        self.tFinalSpin.setDecimals(0)
+        self.tFinalSpin.setValue(OPCIONES_DEFECTO["stream_t_final"])
+        self.tFinalSpin.setEnabled(False)
+        self.streamingCheck.toggled.connect(self.tFinalSpin.setEnabled)
+        self.streamingCheck.toggled.connect(lambda on: self.earlyStopCheck.setEnabled(not on))
+        streamLayout.addWidget(self.tFinalSpin)
+        layout.addLayout(streamLayout)
+
+        # Estabilidad de cuenca: condiciones iniciales por 'a' (0 = sólo la de info.txt)
+        cuencaLayout = QtWidgets.QHBoxLayout()
+        cuencaLayout.addWidget(QtWidgets.QLabel("Cuenca (condiciones iniciales):"))
+        self.cuencaSpin = QtWidgets.QSpinBox()
+        self.cuencaSpin.setRange(0, 100000)
+        self.cuencaSpin.setValue(OPCIONES_DEFECTO["cuenca_muestras"])
+        cuencaLayout.addWidget(self.cuencaSpin)
+        self.cuencaMuestreoCombo = QtWidgets.QComboBox()
+        self.cuencaMuestreoCombo.addItems(MUESTREOS)
+        cuencaLayout.addWidget(self.cuencaMuestreoCombo)
+        cuencaLayout.addWidget(QtWidgets.QLabel("radio:"))
+        self.cuencaRadioSpin = QtWidgets.QDoubleSpinBox()
+        self.cuencaRadioSpin.setRange(0.0, 1e6)
+        self.cuencaRadioSpin.setValue(OPCIONES_DEFECTO["cuenca_radio"])
+        cuencaLayout.addWidget(self.cuencaRadioSpin)
+        layout.addLayout(cuencaLayout)
+
+        # Reparto de la carpeta con otros procesos o equipos (arriendos.py)
+        self.compartidaCheck = QtWidgets.QCheckBox("Carpeta compartida (varios procesos/equipos)")
+        layout.addWidget(self.compartidaCheck)
+
         btnLayout = QtWidgets.QHBoxLayout()
         self.startButton = QtWidgets.QPushButton("Iniciar")
         self.stopButton = QtWidgets.QPushButton("Detener")
@@ -33,6 +171,7 @@ class VariasRestasPanel(QtWidgets.QGroupBox):
 
         self.batchThread = None
         self.base_folder = None
+        self.folders_done = 0
 
         # eq_code e init_values no se usan para el batch, pero se mantienen
         # para compatibilidad con la interfaz
@@ -41,10 +180,29 @@ class VariasRestasPanel(QtWidgets.QGroupBox):
 
         self.setLayout(layout)
 
+    def _spin_p2(self, layout, etiqueta, valor):
+        layout.addWidget(QtWidgets.QLabel(etiqueta))
+        spin = QtWidgets.QDoubleSpinBox()
+        spin.setRange(-1e6, 1e6)
+        spin.setDecimals(4)
+        spin.setValue(valor)
+        layout.addWidget(spin)
+        return spin
+
+    def onBarridoChanged(self, barrido):
+        self.p2Group.setEnabled(barrido == "2d")
+
     def onLoad(self):
         folder = QtWidgets.QFileDialog.getExistingDirectory(self, "Seleccionar Carpeta de Restas", "")
         if folder:
             self.base_folder = folder
+            try:
+                fijado = rigidez.leer_fijado(folder)
+            except ValueError:
+                fijado = {}
+            self.fijarMetodoCheck.setChecked(bool(fijado))
+            if fijado.get("method") in METHODS:
+                self.methodCombo.setCurrentText(fijado["method"])
             self.restaList.clear()
             for name in os.listdir(folder):
                 subdir = os.path.join(folder, name)
@@ -61,12 +219,56 @@ class VariasRestasPanel(QtWidgets.QGroupBox):
             return
 
         subfolders = [self.restaList.item(i).text() for i in range(count)]
-        self.batchThread = BatchThread(self.base_folder, subfolders)
+        try:
+            if self.fijarMetodoCheck.isChecked():
+                # Se conservan las tolerancias que ya tuviera fijadas
+                try:
+                    previo = rigidez.leer_fijado(self.base_folder)
+                except ValueError:
+                    previo = {}
+                rigidez.fijar(self.base_folder, self.methodCombo.currentText(),
+                              rtol=previo.get("rtol"), atol=previo.get("atol"))
+            else:
+                rigidez.fijar(self.base_folder, None)
+        except OSError as e:
+            QtWidgets.QMessageBox.warning(self, "Método", f"No se pudo escribir metodo.json: {e}")
+        opciones = {
+            "error_mode": self.errorModeCombo.currentText(),
+            "engine": self.engineCombo.currentText(),
+            "method": self.methodCombo.currentText(),
+            "parada_temprana": self.earlyStopCheck.isChecked(),
+            "barrido": self.barridoCombo.currentText(),
+            "continuacion": self.continuacionCheck.isChecked(),
+            "cont_reverso": self.continuacionCheck.isChecked() and self.reversoCheck.isChecked(),
+            "formato": self.formatoCombo.currentText(),
+            "streaming": self.streamingCheck.isChecked(),
+            "stream_t_final": self.tFinalSpin.value(),
+            "cuenca_muestras": self.cuencaSpin.value(),
+            "cuenca_muestreo": self.cuencaMuestreoCombo.currentText(),
+            "cuenca_radio": self.cuencaRadioSpin.value(),
+            "compartida": self.compartidaCheck.isChecked(),
+        }
+        if opciones["barrido"] == "2d":
+            opciones.update({
+                "p2_nombre": self.p2NombreEdit.text().strip(),
+                "p2_start": self.p2StartSpin.value(),
+                "p2_stop": self.p2StopSpin.value(),
+                "p2_step": self.p2StepSpin.value(),
+                "tesela_p2": self.teselaP2Spin.value(),
+                "tesela_a": self.teselaASpin.value(),
+            })
+        self.batchThread = BatchThread(self.base_folder, subfolders,
+                                       workers=self.workersSpin.value(),
+                                       opciones=opciones,
+                                       refresco_hz=self.refrescoSpin.value(),
+                                       graficar=self.graficarCheck.isChecked())
         self.batchThread.progress_signal.connect(self.onThreadProgress)
         self.batchThread.folder_done_signal.connect(self.onFolderDone)
         self.batchThread.all_done_signal.connect(self.onAllDone)
         self.batchThread.simulation_result_signal.connect(self.onSimulationResult) # New connection
+        self.batchThread.mapa_signal.connect(self.plot_mapa.emit)
 
+        self.folders_done = 0
         self.batchThread.start()
         self.progressBar.setValue(0)
 
@@ -75,12 +277,19 @@ class VariasRestasPanel(QtWidgets.QGroupBox):
             self.batchThread.request_stop()
             self.progress_message_signal.emit("Solicitud de detención enviada.")
 
+    def onGraficarToggled(self, checked):
+        if self.batchThread:
+            self.batchThread.set_graficar(checked)
+
     def onThreadProgress(self, msg):
         self.progress_message_signal.emit(msg)
 
     def onFolderDone(self, idx):
+        # Las restas que comparten sistema terminan juntas y no
+        # necesariamente en orden de idx, así que contamos las terminadas.
+        self.folders_done += 1
         total = self.restaList.count()
-        progress = int(((idx+1)/total)*100)
+        progress = int((self.folders_done/total)*100)
         self.progressBar.setValue(progress)
 
     def onAllDone(self):
@@ -0,0 +1,166 @@
+import argparse
+import os
+import signal
+import sys
+import time
+
+from clases.sweep_engine import (SweepRunner, OPCIONES_DEFECTO, ENGINES, METHODS, BARRIDOS,
+                                 opciones_barrido)
+from clases.error_extraction import ERROR_MODES
+from clases.result_store import FORMATOS
+from clases import rigidez
+
+# Barrido por lotes sin interfaz gráfica (para servidores y nodos de
+# cálculo): la misma lógica que el panel "Varias restas", sin importar PyQt6.
+#
+#   python cli.py carpeta_restas --workers 8 --engine ensemble --formato npy
+#
+# Códigos de salida: 0 si todo fue bien, 1 si hubo errores (subcarpetas
+# omitidas, ecuaciones que no compilan, integraciones fallidas), 2 por
+# argumentos incorrectos y 130 si se interrumpió con Ctrl+C.
+
+EXIT_OK = 0
+EXIT_ERRORES = 1
+EXIT_USO = 2
+EXIT_INTERRUMPIDO = 130
+
+
+def convertir_opcion(texto):
+    """
+    "clave=valor" -> (clave, valor) con el tipo del valor por defecto.
+    """
+    if "=" not in texto:
+        raise argparse.ArgumentTypeError(f"se esperaba clave=valor: {texto}")
+    clave, valor = texto.split("=", 1)
+    if clave not in OPCIONES_DEFECTO:
+        raise argparse.ArgumentTypeError(f"opción desconocida: {clave}")
+    defecto = OPCIONES_DEFECTO[clave]
+    try:
+        if isinstance(defecto, bool):
+            if valor.lower() not in ("1", "0", "true", "false", "si", "sí", "no"):
+                raise ValueError(valor)
+            return clave, valor.lower() in ("1", "true", "si", "sí")
+        if isinstance(defecto, int):
+            return clave, int(valor)
+        if isinstance(defecto, float):
+            return clave, float(valor)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"valor no válido para {clave}: {valor}")
+    return clave, valor
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(
+        description="Barrido de 'a' sobre una carpeta de restas (subcarpetas con info.txt), sin interfaz.")
+    parser.add_argument("base", help="carpeta con las subcarpetas de restas")
+    parser.add_argument("subcarpetas", nargs="*",
+                        help="subcarpetas a procesar (por defecto, todas las que tienen info.txt)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="procesos para repartir los valores de 'a' (1 = en serie)")
+    parser.add_argument("--engine", choices=ENGINES, default=OPCIONES_DEFECTO["engine"])
+    parser.add_argument("--method", choices=METHODS, default=OPCIONES_DEFECTO["method"])
+    parser.add_argument("--error-mode", choices=ERROR_MODES, default=OPCIONES_DEFECTO["error_mode"])
+    parser.add_argument("--barrido", choices=BARRIDOS, default=OPCIONES_DEFECTO["barrido"])
+    parser.add_argument("--formato", choices=FORMATOS, default=OPCIONES_DEFECTO["formato"],
+                        help="formato de los resultados")
+    parser.add_argument("--parada-temprana", action="store_true",
+                        help="cortar cada integración al sincronizar o divergir")
+    parser.add_argument("--continuacion", action="store_true",
+                        help="cada 'a' parte del estado final del anterior")
+    parser.add_argument("--reverso", action="store_true",
+                        help="con --continuacion, repetir el barrido hacia atrás (histéresis)")
+    parser.add_argument("--compartida", action="store_true",
+                        help="repartir la carpeta con otros procesos o equipos (arriendos por subcarpeta)")
+    parser.add_argument("--fijar-metodo", choices=METHODS + ("ninguno",),
+                        help="fijar el método de la carpeta (metodo.json, con rtol/atol de -o) "
+                             "o quitarlo con 'ninguno', y después barrer")
+    parser.add_argument("-o", "--opcion", action="append", type=convertir_opcion, default=[],
+                        metavar="CLAVE=VALOR", help="cualquier otra opción del barrido (repetible)")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="mostrar sólo errores y el resumen final")
+    return parser
+
+
+def subcarpetas_con_info(base):
+    return sorted(nombre for nombre in os.listdir(base)
+                  if os.path.exists(os.path.join(base, nombre, "info.txt")))
+
+
+def main(argv=None):
+    args = crear_parser().parse_args(argv)
+    if not os.path.isdir(args.base):
+        print(f"No existe la carpeta {args.base}", file=sys.stderr)
+        return EXIT_USO
+    subfolders = args.subcarpetas or subcarpetas_con_info(args.base)
+    if not subfolders:
+        print(f"No hay subcarpetas con info.txt en {args.base}", file=sys.stderr)
+        return EXIT_USO
+
+    opciones = {
+        "engine": args.engine,
+        "method": args.method,
+        "error_mode": args.error_mode,
+        "barrido": args.barrido,
+        "formato": args.formato,
+        "parada_temprana": args.parada_temprana,
+        "continuacion": args.continuacion,
+        "cont_reverso": args.continuacion and args.reverso,
+        "compartida": args.compartida,
+    }
+    opciones.update(dict(args.opcion))
+
+    if args.fijar_metodo:
+        if args.fijar_metodo == "ninguno":
+            rigidez.fijar(args.base, None)
+        else:
+            path = rigidez.fijar(args.base, args.fijar_metodo,
+                                 **{k: v for k, v in args.opcion if k in ("rtol", "atol")})
+            print(f"Método fijado en {path}", flush=True)
+
+    terminadas = []
+
+    def on_progress(msg):
+        if not args.quiet:
+            print(msg, flush=True)
+
+    # Errores y avisos siempre, también con --quiet
+    def on_error(msg):
+        print(msg, file=sys.stderr, flush=True)
+
+    def on_folder_done(idx):
+        terminadas.append(idx)
+        if not args.quiet:
+            print(f"[{len(terminadas)}/{len(subfolders)}] Terminada {subfolders[idx]}", flush=True)
+
+    runner = SweepRunner(args.base, subfolders, on_progress=on_progress,
+                         on_folder_done=on_folder_done, workers=args.workers,
+                         opciones=opciones, on_error=on_error)
+
+    # Primer Ctrl+C: detener tras lo que se está calculando (lo hecho ya
+    # está guardado); el segundo interrumpe en seco
+    def on_sigint(signum, frame):
+        if runner.stop_requested:
+            raise KeyboardInterrupt
+        print("Deteniendo... (Ctrl+C otra vez para salir ya)", file=sys.stderr, flush=True)
+        runner.request_stop()
+
+    anterior = signal.signal(signal.SIGINT, on_sigint)
+    inicio = time.time()
+    try:
+        if not args.quiet:
+            print(f"{len(subfolders)} subcarpetas, opciones: {opciones_barrido(opciones)}", flush=True)
+        runner.run()
+    except KeyboardInterrupt:
+        return EXIT_INTERRUMPIDO
+    finally:
+        signal.signal(signal.SIGINT, anterior)
+
+    print(f"Terminado en {time.time() - inicio:.1f}s: {runner.done_iterations} integraciones, "
+          f"{len(runner.errores)} errores", flush=True)
+    if runner.stop_requested:
+        return EXIT_INTERRUMPIDO
+    return EXIT_ERRORES if runner.errores else EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
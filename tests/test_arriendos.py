@@ -0,0 +1,144 @@
+import os
+import threading
+import time
+
+import pytest
+
+from clases import arriendos
+from clases.arriendos import GestorArriendos
+
+
+@pytest.fixture
+def base(tmp_path):
+    for nombre in ("r1", "r2", "r3"):
+        (tmp_path / nombre).mkdir()
+    return str(tmp_path)
+
+
+def envejecer(base, subfolder, segundos):
+    path = arriendos.ruta(os.path.join(base, subfolder))
+    antes = time.time() - segundos
+    os.utime(path, (antes, antes))
+
+
+def a_la_vez(gestores, accion):
+    barrera = threading.Barrier(len(gestores))
+    resultados = [None] * len(gestores)
+
+    def correr(i):
+        barrera.wait()
+        resultados[i] = accion(gestores[i])
+
+    hilos = [threading.Thread(target=correr, args=(i,)) for i in range(len(gestores))]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return resultados
+
+
+def propietario(base, subfolder):
+    return arriendos.leer(arriendos.ruta(os.path.join(base, subfolder)))["propietario"]
+
+
+def test_carrera_por_una_subcarpeta(base):
+    gestores = [GestorArriendos(base) for _ in range(8)]
+    ganadores = a_la_vez(gestores, lambda g: g.reclamar("r1"))
+    assert ganadores.count(True) == 1
+    ganador = gestores[ganadores.index(True)]
+    assert propietario(base, "r1") == ganador.propietario
+    assert all(g.ocupada("r1") for g in gestores if g is not ganador)
+
+
+def test_carrera_por_un_arriendo_caducado(base):
+    viejo = GestorArriendos(base, duracion=60)
+    assert viejo.reclamar("r1")
+    envejecer(base, "r1", 120)
+    gestores = [GestorArriendos(base, duracion=60) for _ in range(8)]
+    ganadores = a_la_vez(gestores, lambda g: g.reclamar("r1"))
+    assert ganadores.count(True) == 1
+    assert propietario(base, "r1") == gestores[ganadores.index(True)].propietario
+    # No quedan arriendos apartados
+    assert os.listdir(os.path.join(base, "r1")) == [arriendos.NOMBRE]
+
+
+def test_recoger_arriendo_caducado(base):
+    a, b = GestorArriendos(base, duracion=60), GestorArriendos(base, duracion=60)
+    assert a.reclamar("r1")
+    assert not b.reclamar("r1")
+    envejecer(base, "r1", 30)
+    assert not b.reclamar("r1")
+    envejecer(base, "r1", 120)
+    assert b.reclamar("r1")
+    assert propietario(base, "r1") == b.propietario
+
+
+def test_apartar_devuelve_un_arriendo_renovado(base, monkeypatch):
+    a, b = GestorArriendos(base, duracion=60), GestorArriendos(base, duracion=60)
+    assert a.reclamar("r1")
+    envejecer(base, "r1", 120)
+    path = arriendos.ruta(os.path.join(base, "r1"))
+    leer = arriendos.leer
+
+    def leer_y_renovar(p):
+        # a renueva justo después de que b lo haya visto caducado
+        datos = leer(p)
+        monkeypatch.setattr(arriendos, "leer", leer)
+        assert a.renovar() == []
+        return datos
+
+    monkeypatch.setattr(arriendos, "leer", leer_y_renovar)
+    assert not b.reclamar("r1")
+    assert propietario(base, "r1") == a.propietario
+    assert not arriendos.caducado(path, 60)
+    assert os.listdir(os.path.join(base, "r1")) == [arriendos.NOMBRE]
+    assert a.renovar() == []
+
+
+def test_renovar_detecta_arriendo_perdido(base):
+    a, b = GestorArriendos(base, duracion=60), GestorArriendos(base, duracion=60)
+    assert a.reclamar("r1") and a.reclamar("r2")
+    envejecer(base, "r1", 120)
+    assert b.reclamar("r1")
+    assert a.renovar() == ["r1"]
+    assert a.propios == {"r2"}
+    # Liberar lo perdido no borra el arriendo del nuevo dueño
+    a.liberar("r1")
+    assert propietario(base, "r1") == b.propietario
+
+
+def test_latido_avisa_de_arriendo_perdido(base):
+    perdidos = []
+    aviso = threading.Event()
+    a = GestorArriendos(base, duracion=60, latido=0.05,
+                        on_perdido=lambda s: (perdidos.append(s), aviso.set()))
+    b = GestorArriendos(base, duracion=60)
+    assert a.reclamar("r1") and a.reclamar("r2")
+    # a se quedó colgado más de "duracion" y b recogió r1
+    envejecer(base, "r1", 120)
+    assert b.reclamar("r1")
+    a.iniciar()
+    try:
+        assert aviso.wait(5)
+    finally:
+        a.detener()
+    assert perdidos == ["r1"]
+    assert propietario(base, "r1") == b.propietario
+    # detener libera lo que seguía siendo suyo
+    assert not os.path.exists(arriendos.ruta(os.path.join(base, "r2")))
+
+
+def test_reclamar_todas_deshace_si_falla_una(base):
+    a, b = GestorArriendos(base), GestorArriendos(base)
+    assert b.reclamar("r2")
+    assert not a.reclamar_todas(["r1", "r2", "r3"])
+    assert a.propios == set()
+    assert not os.path.exists(arriendos.ruta(os.path.join(base, "r1")))
+    assert not os.path.exists(arriendos.ruta(os.path.join(base, "r3")))
+    assert propietario(base, "r2") == b.propietario
+
+    b.liberar("r2")
+    assert a.reclamar_todas(["r1", "r2", "r3"])
+    assert a.propios == {"r1", "r2", "r3"}
+    a.liberar_todas()
+    assert all(not os.path.exists(arriendos.ruta(os.path.join(base, s))) for s in ("r1", "r2", "r3"))
@@ -0,0 +1,174 @@
+import os
+
+import numpy as np
+
+from clases import checkpoint
+from clases.sweep_engine import SweepRunner
+
+# Par de osciladores lineales (barato): cada 'a' se integra en poco tiempo
+ECUACIONES = """def sistema_dinamico(t, variables, a):
+    x1, y1, z1, x2, y2, z2 = variables
+    return [y1, -x1 - 0.1*y1, -z1, y2 + a*(x1 - x2), -x2 - 0.1*y2, -z2]
+"""
+A_START, A_STOP, A_STEP = 0.0, 2.5, 0.5
+N_A = 5
+
+
+def crear_resta(base, nombre="x1-x2", a_stop=A_STOP):
+    subdir = os.path.join(base, nombre)
+    os.makedirs(subdir)
+    with open(os.path.join(subdir, "info.txt"), "w", encoding="utf-8") as f:
+        f.write("Resta: x1 - x2\n")
+        f.write(f"a_start = {A_START}\n")
+        f.write(f"a_stop = {a_stop}\n")
+        f.write(f"a_step = {A_STEP}\n\n")
+        f.write("Ecuaciones:\n" + ECUACIONES + "\n")
+        f.write("CondicionesIniciales:\n")
+        f.write("x1 = 1.0\ny1 = 0.0\nz1 = 1.0\nx2 = -1.0\ny2 = 0.5\nz2 = 2.0\n")
+    return subdir
+
+
+def leer(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def rutas(subdir):
+    return (checkpoint.ruta_diario(subdir), os.path.join(subdir, "log.csv"),
+            os.path.join(subdir, "eventos.csv"))
+
+
+def bloques(a_values):
+    return [(a, np.array([a + 1.0, np.nan, a + 2.0]), []) for a in a_values]
+
+
+def test_anexar_y_reparar(tmp_path):
+    diario, log_path, eventos_path = rutas(str(tmp_path))
+    escritos = checkpoint.anexar(diario, log_path, eventos_path,
+                                 bloques([0.0, 0.5, 1.0]), A_START, A_STEP)
+    assert escritos == [0, 1, 2]
+    assert checkpoint.completados(diario) == {0, 1, 2}
+
+    antes = leer(log_path)
+    # Los NaN no se escriben
+    assert antes.decode("utf-8").splitlines()[1:3] == ["0.0,1.0", "0.0,2.0"]
+    assert checkpoint.reparar(diario, log_path, eventos_path, A_START, A_STEP) == {0, 1, 2}
+    assert leer(log_path) == antes
+
+
+def test_reparar_descarta_bloque_a_medio_escribir(tmp_path):
+    diario, log_path, eventos_path = rutas(str(tmp_path))
+    checkpoint.anexar(diario, log_path, eventos_path, bloques([0.0, 0.5]), A_START, A_STEP)
+    log_bueno, diario_bueno = leer(log_path), leer(diario)
+
+    # Corte tras escribir filas de un 'a' y media línea del diario
+    with open(log_path, "ab") as f:
+        f.write(b"1.0,3.0\n1.0,4")
+    with open(diario, "ab") as f:
+        f.write(b"2,1.0,99")
+
+    assert checkpoint.reparar(diario, log_path, eventos_path, A_START, A_STEP) == {0, 1}
+    assert leer(log_path) == log_bueno
+    assert leer(diario) == diario_bueno
+
+    # Tras reparar se puede seguir anexando
+    checkpoint.anexar(diario, log_path, eventos_path, bloques([1.0]), A_START, A_STEP)
+    assert checkpoint.reparar(diario, log_path, eventos_path, A_START, A_STEP) == {0, 1, 2}
+
+
+def test_reparar_ignora_entradas_mas_alla_de_los_datos(tmp_path):
+    diario, log_path, eventos_path = rutas(str(tmp_path))
+    checkpoint.anexar(diario, log_path, eventos_path, bloques([0.0, 0.5]), A_START, A_STEP)
+    with open(diario, "ab") as f:
+        f.write(f"2,1.0,{os.path.getsize(log_path) + 100},0\n".encode("utf-8"))
+    assert checkpoint.reparar(diario, log_path, eventos_path, A_START, A_STEP) == {0, 1}
+    assert checkpoint.completados(diario) == {0, 1}
+
+
+def test_diario_desde_log_antiguo(tmp_path):
+    diario, log_path, eventos_path = rutas(str(tmp_path))
+    with open(log_path, "w", encoding="utf-8") as f:
+        f.write(checkpoint.CABECERA_LOG + "0.0,1.0\n0.0,2.0\n1.0,3.0\n1.5,4")
+    assert checkpoint.reparar(diario, log_path, eventos_path, A_START, A_STEP) == {0, 2}
+    assert leer(log_path).endswith(b"1.0,3.0\n")
+
+
+def ejecutar(base, al_resultado=None, workers=1):
+    runner = SweepRunner(base, ["x1-x2"], workers=workers, opciones={"perfil": False})
+    if al_resultado is not None:
+        runner.on_result = lambda sol: al_resultado(runner)
+    runner.run()
+    assert runner.errores == []
+    return runner
+
+
+def test_reanudar_barrido_interrumpido(tmp_path):
+    continuo = crear_resta(str(tmp_path / "continuo"))
+    ejecutar(str(tmp_path / "continuo"))
+    assert checkpoint.completados(checkpoint.ruta_diario(continuo)) == set(range(N_A))
+
+    cortado = crear_resta(str(tmp_path / "cortado"))
+    hechos = []
+
+    def parar(runner):
+        hechos.append(1)
+        if len(hechos) == 2:
+            runner.request_stop()
+
+    ejecutar(str(tmp_path / "cortado"), parar)
+    diario, log_path, _ = rutas(cortado)
+    assert checkpoint.completados(diario) == {0, 1}
+
+    # Corte a mitad del tercer 'a'
+    with open(log_path, "ab") as f:
+        f.write(b"1.0,0.12")
+
+    runner = ejecutar(str(tmp_path / "cortado"))
+    assert runner.total_iterations == N_A - 2
+    assert checkpoint.completados(diario) == set(range(N_A))
+    assert leer(log_path) == leer(os.path.join(continuo, "log.csv"))
+
+
+def test_anexar_lineas_descarta_linea_cortada(tmp_path):
+    path = str(tmp_path / "aux.csv")
+    checkpoint.anexar_lineas(path, ["0.0,1\n"], "a,v\n")
+    with open(path, "ab") as f:
+        f.write(b"0.5,")
+    checkpoint.anexar_lineas(path, ["0.5,2\n", "1.0,3\n"], "a,v\n")
+    assert leer(path) == b"a,v\n0.0,1\n0.5,2\n1.0,3\n"
+
+
+def test_ordenar_log(tmp_path):
+    diario, log_path, eventos_path = rutas(str(tmp_path))
+    checkpoint.anexar(diario, log_path, eventos_path, bloques([1.0, 0.0, 0.5]), A_START, A_STEP)
+    assert checkpoint.ordenar_log(log_path)
+    assert leer(log_path).decode("utf-8").splitlines() == [
+        "a,max_value", "0.0,1.0", "0.0,2.0", "0.5,1.5", "0.5,2.5", "1.0,2.0", "1.0,3.0"]
+    assert not checkpoint.ordenar_log(log_path)
+    # Mismo tamaño: el diario sigue siendo válido
+    assert checkpoint.reparar(diario, log_path, eventos_path, A_START, A_STEP) == {0, 1, 2}
+
+
+def log_ordenado(log_path):
+    a_values = [float(l.split(",")[0]) for l in leer(log_path).decode("utf-8").splitlines()[1:]]
+    return a_values == sorted(a_values)
+
+
+def test_paralelo_escribe_en_orden_de_a(tmp_path):
+    serie = crear_resta(str(tmp_path / "serie"), a_stop=5.0)
+    ejecutar(str(tmp_path / "serie"))
+    paralelo = crear_resta(str(tmp_path / "paralelo"), a_stop=5.0)
+    ejecutar(str(tmp_path / "paralelo"), workers=2)
+    _, log_path, _ = rutas(paralelo)
+    assert log_ordenado(log_path)
+    assert leer(log_path) == leer(os.path.join(serie, "log.csv"))
+
+
+def test_paralelo_reanudado_queda_ordenado(tmp_path):
+    subdir = crear_resta(str(tmp_path), a_stop=5.0)
+    diario, log_path, eventos_path = rutas(subdir)
+    # Como tras detener un barrido paralelo: 'a' terminados con huecos
+    checkpoint.anexar(diario, log_path, eventos_path, bloques([4.5, 1.0]), A_START, A_STEP)
+    ejecutar(str(tmp_path), workers=2)
+    assert checkpoint.completados(diario) == set(range(10))
+    assert log_ordenado(log_path)
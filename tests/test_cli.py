@@ -0,0 +1,25 @@
+import cli
+from clases import rigidez
+
+
+def test_quiet_muestra_errores_por_stderr(tmp_path, capsys):
+    (tmp_path / "x1-x2").mkdir()
+    (tmp_path / "x1-x2" / "info.txt").write_text("Resta: x1 - x2\n", encoding="utf-8")
+    # Mensaje que no empieza por "Error" ni por "No "
+    with open(rigidez.ruta_fijado(str(tmp_path)), "w", encoding="utf-8") as f:
+        f.write('{"method": "BDF", "max_step": 1}')
+
+    assert cli.main([str(tmp_path), "--quiet", "-o", "perfil=0"]) == cli.EXIT_ERRORES
+    salida = capsys.readouterr()
+    assert "Opciones no fijables" in salida.err
+    assert "Opciones no fijables" not in salida.out
+    assert salida.out.startswith("Terminado en ")
+
+
+def test_quiet_oculta_el_avance(tmp_path, capsys):
+    (tmp_path / "vacia").mkdir()
+    assert cli.main([str(tmp_path), "vacia", "--quiet", "-o", "perfil=0"]) == cli.EXIT_ERRORES
+    salida = capsys.readouterr()
+    assert salida.err == "No existe info.txt en vacia, se omite.\n"
+    assert len(salida.out.splitlines()) == 1
+    assert salida.out.startswith("Terminado en ")
@@ -0,0 +1,48 @@
+import numpy as np
+
+from clases import coste
+
+
+def test_predecir_interpola_en_log():
+    modelo = coste.ModeloCoste()
+    assert modelo.predecir("g", [1.0]) is None
+    modelo.observar("g", 0.0, 1.0)
+    modelo.observar("g", 2.0, 100.0)
+    # Punto medio en escala logarítmica y constante fuera del rango
+    assert np.allclose(modelo.predecir("g", [1.0, -1.0, 5.0]), [10.0, 1.0, 100.0])
+    # Un grupo sin muestras usa la mediana de todas
+    assert np.allclose(modelo.predecir("otro", [0.0]), [50.5])
+
+
+def test_predecir_con_nfev():
+    modelo = coste.ModeloCoste()
+    modelo.observar("g", 0.0, 2.0, nfev=100)
+    modelo.observar("g", 1.0, 6.0, nfev=1000)
+    # Segundos por evaluación: mediana de 0.02 y 0.006
+    assert np.allclose(modelo.predecir("g", [0.5]), [0.013 * np.sqrt(1e5)])
+
+
+def test_ordenar_por_coste():
+    modelo = coste.ModeloCoste()
+    trabajos = [("g", np.array([0.0, 1.0])), ("g", np.array([4.0])), ("g", np.array([2.0]))]
+    assert coste.ordenar(trabajos, modelo, lambda g: g) == trabajos
+    modelo.observar("g", 0.0, 1.0)
+    modelo.observar("g", 4.0, 1000.0)
+    ordenados = coste.ordenar(trabajos, modelo, lambda g: g)
+    assert [b.tolist() for _, b in ordenados] == [[0.0, 1.0], [2.0], [4.0]]
+
+
+def test_eta_e_intervalo():
+    estimador = coste.EstimadorETA()
+    estimador.planificar("g", np.arange(10.0))
+    assert estimador.estimar() == (None, None, None)
+    for a, segundos in [(0.0, 1.0), (9.0, 1.0), (3.0, 1.2), (6.0, 0.9), (1.0, 1.1)]:
+        estimador.completar("g", a, segundos)
+    assert len(estimador.restante()) == 5
+    eta, eta_min, eta_max = estimador.estimar()
+    assert eta_min < eta < eta_max
+
+
+def test_indices_sondeo():
+    assert coste.indices_sondeo(3, 5) == [0, 1, 2]
+    assert coste.indices_sondeo(11, 3) == [0, 5, 10]
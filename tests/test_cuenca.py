@@ -0,0 +1,29 @@
+import numpy as np
+
+from clases import cuenca
+
+
+def test_muestras():
+    Y0 = cuenca.muestras([1.0, -2.0], 9, "lhs", radio=0.5, semilla=3)
+    assert Y0.shape == (2, 9)
+    assert np.array_equal(Y0[:, 0], [1.0, -2.0])
+    assert np.all(np.abs(Y0 - Y0[:, :1]) <= 0.5)
+    # Un punto por estrato en cada variable
+    for fila, centro in zip(Y0[:, 1:], [1.0, -2.0]):
+        estratos = np.floor((fila - centro + 0.5) * 8).astype(int)
+        assert sorted(estratos) == list(range(8))
+
+
+def test_anexar_tras_corte(tmp_path):
+    path = cuenca.ruta(str(tmp_path))
+    cuantiles = np.arange(len(cuenca.CUANTILES), dtype=float)
+    cuenca.anexar(path, [(0.0, 8, 0.25, cuantiles)])
+    # Corte a mitad de la línea del siguiente 'a'
+    with open(path, "ab") as f:
+        f.write(b"0.5,8,0.7")
+    cuenca.anexar(path, [(0.5, 8, 0.75, cuantiles + 1)])
+    filas = cuenca.leer(path)
+    assert sorted(filas) == [0.0, 0.5]
+    k, fraccion, q = filas[0.5]
+    assert (k, fraccion) == (8, 0.75)
+    assert np.array_equal(q, cuantiles + 1)
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+from scipy.integrate import solve_ivp
+
+from clases.ensemble import integrar_lote, rhs_lote
+
+
+def lorenz_acoplado(t, variables, a):
+    x1, y1, z1, x2, y2, z2 = variables
+    return [10*(y1 - x1), x1*(28 - z1) - y1, x1*y1 - 8/3*z1,
+            10*(y2 - x2) + a*(x1 - x2), x2*(28 - z2) - y2, x2*y2 - 8/3*z2]
+
+
+Y0 = [1.0, 1.0, 1.0, -1.0, 2.0, 3.0]
+T_MUESTRAS = np.linspace(0.0, 5.0, 51)
+
+
+def referencia(fun, y0, a, t_muestras, t_final=5.0):
+    sol = solve_ivp(fun, (0.0, t_final), y0, args=(a,), method="DOP853",
+                    t_eval=t_muestras, rtol=1e-12, atol=1e-12)
+    assert sol.success
+    return sol.y
+
+
+@pytest.mark.parametrize("method, opciones, tol", [
+    ("rk45", {"rtol": 1e-10, "atol": 1e-12}, 1e-5),
+    ("rk4", {"h": 1e-3}, 1e-5),
+])
+def test_lote_igual_que_solve_ivp(method, opciones, tol):
+    a_values = np.array([0.0, 2.0, 5.0, 12.0])
+    Y, info = integrar_lote(lorenz_acoplado, (0.0, 5.0), Y0, a_values, T_MUESTRAS,
+                            method=method, **opciones)
+    assert Y.shape == (6, len(a_values), len(T_MUESTRAS))
+    assert info["vivos"].all()
+    for j, a in enumerate(a_values):
+        ref = referencia(lorenz_acoplado, Y0, a, T_MUESTRAS)
+        np.testing.assert_allclose(Y[:, j, :], ref, rtol=0, atol=tol * np.abs(ref).max())
+
+
+def test_rhs_escalar_por_miembro():
+    # max() de Python no admite arrays: se evalúa miembro a miembro
+    def escalar(t, variables, a):
+        x, y = variables
+        return [-max(x, 0.0) - a*x, -y]
+
+    Y = np.array([[1.0, -2.0, 3.0], [1.0, 1.0, 1.0]])
+    a = np.array([0.5, 1.0, 2.0])
+    f = rhs_lote(escalar, 2, 3)
+    F = f.probar(0.0, Y, a)
+    for j in range(3):
+        np.testing.assert_allclose(F[:, j], escalar(0.0, Y[:, j], a[j]))
+
+
+def rapido_y_lento(t, variables, a):
+    x, y = variables
+    return [-a*(x - np.cos(t)), -y]
+
+
+def test_rechazos_por_miembro_no_degradan_a_los_demas():
+    # El miembro con a grande rechaza pasos y fija el paso común; el
+    # resultado de todos sigue dentro de la tolerancia
+    a_values = np.array([0.5, 1.0, 200.0])
+    t_muestras = np.linspace(0.0, 2.0, 21)
+    Y, info = integrar_lote(rapido_y_lento, (0.0, 2.0), [3.0, 1.0], a_values, t_muestras,
+                            rtol=1e-8, atol=1e-10)
+    assert info["rechazados"] > 0
+    assert info["vivos"].all()
+    for j, a in enumerate(a_values):
+        ref = referencia(rapido_y_lento, [3.0, 1.0], a, t_muestras, t_final=2.0)
+        np.testing.assert_allclose(Y[:, j, :], ref, rtol=1e-6, atol=1e-8)
+
+    # Solo, el miembro lento da pasos más largos
+    _, solo = integrar_lote(rapido_y_lento, (0.0, 2.0), [3.0, 1.0], a_values[:1], t_muestras,
+                            rtol=1e-8, atol=1e-10)
+    assert solo["n_pasos"] < info["n_pasos"]
+
+
+def explosivo(t, variables, a):
+    y, z = variables
+    return [a*y*y, -z]
+
+
+def exponencial(t, variables, a):
+    y, z = variables
+    return [a*y, -z]
+
+
+@pytest.mark.parametrize("fun, a_values, malo", [
+    # Desbordamiento a inf (y = e^(300 t))
+    (exponencial, [1.0, 300.0, -1.0], 1),
+    # Explosión en tiempo finito (t = 1/a): el paso colapsa sin llegar a inf
+    (explosivo, [0.1, 1.0, -1.0], 1),
+])
+def test_miembro_divergente_no_contamina_el_lote(fun, a_values, malo):
+    Y, info = integrar_lote(fun, (0.0, 5.0), [1.0, 1.0], a_values, T_MUESTRAS,
+                            rtol=1e-9, atol=1e-12)
+    vivos = np.ones(len(a_values), dtype=bool)
+    vivos[malo] = False
+    assert info["vivos"].tolist() == vivos.tolist()
+    assert np.isnan(Y[:, malo, -1]).all()
+    for j in np.nonzero(vivos)[0]:
+        ref = referencia(fun, [1.0, 1.0], a_values[j], T_MUESTRAS)
+        np.testing.assert_allclose(Y[:, j, :], ref, rtol=1e-6)
+
+
+def test_lote_sin_miembros_validos_falla():
+    with pytest.raises(RuntimeError):
+        integrar_lote(explosivo, (0.0, 5.0), [1.0, 1.0], [1.0, 2.0], T_MUESTRAS)
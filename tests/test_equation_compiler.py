@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+from scipy.integrate import solve_ivp
+
+from clases.equation_compiler import compilar_ecuaciones
+from clases.sweep_engine import argumentos_solver, opciones_barrido
+
+LORENZ = """def sistema_dinamico(t, variables, a):
+    x1, y1, z1, x2, y2, z2 = variables
+    return [10*(y1 - x1), x1*(28 - z1) - y1, x1*y1 - 8/3*z1, 10*(y2 - x2) + a*(x1 - x2), x2*(28 - z2) - y2, x2*y2 - 8/3*z2]
+"""
+
+FUNCIONES = """def sistema_dinamico(t, variables, a):
+    x1, y1 = variables
+    return [np.sin(x1)*np.exp(-y1**2) + a*np.tanh(y1 - x1), x1**3/(1 + y1**2) - np.sqrt(np.abs(x1) + 1)]
+"""
+
+# Expresiones que sólo funcionan con escalares (no derivables ni vectorizables)
+CONDICIONAL = """def sistema_dinamico(t, variables, a):
+    x1, y1 = variables
+    return [-x1 if x1 > 0 else -2*x1, -max(x1, 0) - a*y1]
+"""
+
+
+def original(eq_code):
+    entorno = {"np": np}
+    exec(eq_code, entorno)
+    return entorno["sistema_dinamico"]
+
+
+@pytest.mark.parametrize("eq_code", [LORENZ, FUNCIONES, CONDICIONAL])
+def test_rhs_igual_que_el_original(eq_code):
+    sistema = compilar_ecuaciones(eq_code)
+    f = original(eq_code)
+    rng = np.random.default_rng(0)
+    n = len(sistema.var_names)
+    for _ in range(20):
+        y = rng.uniform(-3, 3, n)
+        a = rng.uniform(0, 5)
+        F = sistema(0.0, y, a)
+        assert isinstance(F, np.ndarray) and F.shape == (n,) and F.dtype == float
+        np.testing.assert_allclose(F, f(0.0, y, a), rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("eq_code", [LORENZ, FUNCIONES])
+def test_rhs_vectorizado_por_columnas(eq_code):
+    sistema = compilar_ecuaciones(eq_code)
+    assert sistema.vectorized
+    Y = np.random.default_rng(1).uniform(-3, 3, (len(sistema.var_names), 7))
+    F = sistema(0.0, Y, 1.5)
+    for k in range(Y.shape[1]):
+        np.testing.assert_allclose(F[:, k], sistema(0.0, Y[:, k], 1.5), rtol=1e-12)
+
+
+@pytest.mark.parametrize("eq_code", [LORENZ, FUNCIONES])
+def test_jacobiano_frente_a_diferencias(eq_code):
+    sistema = compilar_ecuaciones(eq_code)
+    f = original(eq_code)
+    y = np.random.default_rng(2).uniform(-2, 2, len(sistema.var_names))
+    a = 0.7
+    J = sistema.jac(0.0, y, a)
+    J = J.toarray() if hasattr(J, "toarray") else J
+    n = len(y)
+    J_num = np.empty((n, n))
+    for j in range(n):
+        h = 1e-6 * max(1.0, abs(y[j]))
+        e = np.zeros(n)
+        e[j] = h
+        J_num[:, j] = (np.asarray(f(0.0, y + e, a)) - np.asarray(f(0.0, y - e, a))) / (2 * h)
+    np.testing.assert_allclose(J, J_num, rtol=1e-6, atol=1e-6)
+
+
+def test_condicional_no_vectorizado():
+    sistema = compilar_ecuaciones(CONDICIONAL)
+    assert not sistema.vectorized
+    assert sistema.jac is None
+
+
+@pytest.mark.parametrize("metodo", ["Radau", "BDF", "LSODA"])
+def test_implicitos_con_expresiones_escalares(metodo):
+    sistema = compilar_ecuaciones(CONDICIONAL)
+    kwargs = argumentos_solver(sistema, opciones_barrido({"method": metodo}))
+    assert "vectorized" not in kwargs
+    sol = solve_ivp(sistema, (0, 5), [1.0, -1.0], args=(0.5,), **kwargs)
+    ref = solve_ivp(original(CONDICIONAL), (0, 5), [1.0, -1.0], args=(0.5,),
+                    rtol=1e-10, atol=1e-12)
+    assert sol.success
+    np.testing.assert_allclose(sol.y[:, -1], ref.y[:, -1], rtol=1e-2, atol=1e-4)
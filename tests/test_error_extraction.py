@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from scipy.integrate import solve_ivp
+
+from clases.error_extraction import (VENTANAS, maximos_por_ventana, maximos_interp,
+                                     maximos_minimize, salida_densa_vectorizada)
+from clases.sweep_engine import METHODS
+
+METODOS_SOLVE_IVP = [m for m in METHODS if m != "auto"]
+
+
+def rossler(t, v, a):
+    x1, y1, z1, x2, y2, z2 = v
+    return [-y1 - z1, x1 + 0.2 * y1, 0.2 + z1 * (x1 - 5.7),
+            -y2 - z2 + a * (x1 - x2), x2 + 0.2 * y2, 0.2 + z2 * (x2 - 5.7)]
+
+
+@pytest.mark.parametrize("metodo", METODOS_SOLVE_IVP)
+def test_salida_densa_igual_que_odesolution(metodo):
+    sol = solve_ivp(rossler, (0, 50), [1, 1, 1, -1, 2, 3], args=(0.05,), method=metodo,
+                    dense_output=True, rtol=1e-6, atol=1e-9)
+    t = np.linspace(0, 50, 2001)
+    np.testing.assert_allclose(salida_densa_vectorizada(sol.sol)(t), sol.sol(t),
+                               rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize("metodo", ["RK45", "Radau"])
+def test_modos_de_error_equivalentes(metodo):
+    # Con t_eval fino el interpolante lineal y la salida densa dan el mismo
+    # máximo por ventana; minimize se puede quedar en un máximo local
+    sol = solve_ivp(rossler, (0, 310), [1, 1, 1, -1, 2, 3], args=(0.05,), method=metodo,
+                    t_eval=np.linspace(0, 310, 31001), dense_output=True,
+                    rtol=1e-8, atol=1e-10)
+    pares = [(0, 3), (1, 4)]
+    denso = maximos_por_ventana(sol, pares, "denso")
+    interp = maximos_por_ventana(sol, pares, "interp")
+    minimize = maximos_por_ventana(sol, pares, "minimize")
+    assert denso.shape == interp.shape == (2, len(VENTANAS))
+    np.testing.assert_allclose(denso, interp, rtol=1e-3)
+    assert np.all(minimize <= interp * (1 + 1e-9) + 1e-12)
+
+
+def test_interp_y_minimize_coinciden_con_un_solo_maximo():
+    # |sin(pi t)| tiene un único máximo (1) en cada ventana [i, i+1]
+    t = np.linspace(190, 310, 120001)
+    diffs = np.sin(np.pi * t)[None, :]
+    np.testing.assert_allclose(maximos_interp(t, diffs), 1.0, atol=1e-6)
+    np.testing.assert_allclose(maximos_minimize(t, diffs), 1.0, atol=1e-4)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from clases import msf
+
+ROSSLER = """def sistema_dinamico(t, variables, a):
+    x1, y1, z1 = variables
+    return [-y1 - z1, x1 + 0.2*y1, 0.2 + z1*(x1 - 5.7)]"""
+
+# Mayor exponente de Lyapunov del Rössler (0.2, 0.2, 5.7)
+LYAPUNOV_ROSSLER = 0.0714
+
+
+@pytest.fixture(scope="module")
+def rossler_x():
+    alfas = np.concatenate([[0.0], np.linspace(0.05, 0.3, 11), np.linspace(3.5, 5.0, 16)])
+    return msf.msf(ROSSLER, alfas, "x", init_values=[1.0, 1.0, 1.0], t_medida=500.0)
+
+
+def test_alfa_cero_da_el_exponente_del_nodo(rossler_x):
+    assert rossler_x["alfas"][0] == 0.0
+    assert abs(rossler_x["lyapunov"][0] - LYAPUNOV_ROSSLER) < 0.01
+
+
+def test_intervalo_estable_rossler(rossler_x):
+    # Acoplamiento en x: Lambda < 0 aproximadamente en (0.13-0.2, 4.1-4.6)
+    (inicio, fin), = rossler_x["estables"]
+    assert 0.1 < inicio < 0.2
+    assert 3.9 < fin < 4.7
+
+
+def test_resultado_en_cache(rossler_x):
+    alfas = rossler_x["alfas"]
+    assert msf.msf(ROSSLER, alfas, "x", init_values=[1.0, 1.0, 1.0],
+                   t_medida=500.0) is rossler_x
+
+
+def test_cancelar():
+    with pytest.raises(msf.MSFCancelado):
+        msf.calcular_msf(ROSSLER, [0.0, 1.0], cancelado=lambda: True)
+
+
+def test_intervalos_y_umbrales():
+    alfas = np.array([0.0, 1.0, 2.0, 3.0, 4.0])
+    lyapunov = np.array([1.0, -1.0, -1.0, 1.0, 1.0])
+    assert msf.intervalos_estables(alfas, lyapunov) == [(0.5, 2.5)]
+    # Par bidireccional (lambda = 2) y una red con lambda 1 y 2
+    assert msf.umbrales([(0.5, 2.5)], msf.AUTOVALORES_PAR["bidireccional"]) == [(0.25, 1.25)]
+    assert msf.umbrales([(0.5, 2.5)], [0.0, 1.0, 2.0]) == [(0.5, 1.25)]
+    assert msf.umbrales([(0.5, 1.0)], [0.0, 1.0, 4.0]) == []
+
+
+def test_autovalores_anillo():
+    red = {"nodos": 6, "topologia": "anillo", "k": 1, "normalizar": False}
+    esperados = np.sort(2 - 2 * np.cos(2 * np.pi * np.arange(6) / 6))
+    np.testing.assert_allclose(msf.autovalores_red(red), esperados, atol=1e-12)
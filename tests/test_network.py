@@ -0,0 +1,97 @@
+import os
+
+import numpy as np
+import pytest
+from scipy.integrate import solve_ivp
+
+from clases import network
+from clases.sweep_engine import compilar_sistema
+from clases.utils import parse_info_file
+
+ROSSLER = """def sistema_dinamico(t, variables, a):
+    x1, y1, z1 = variables
+    return [-y1 - z1, x1 + 0.2*y1, 0.2 + z1*(x1 - 5.7)]"""
+
+# El par de siempre con el acoplamiento difusivo en ambos sentidos
+PAR = """def sistema_dinamico(t, variables, a):
+    x1, y1, z1, x2, y2, z2 = variables
+    return [-y1 - z1 + a*(x2 - x1), x1 + 0.2*y1, 0.2 + z1*(x1 - 5.7), -y2 - z2 + a*(x1 - x2), x2 + 0.2*y2, 0.2 + z2*(x2 - 5.7)]"""
+
+
+def red(**claves):
+    return network.compilar_red(network.codigo_red(dict(network.RED_DEFECTO, **claves), ROSSLER))
+
+
+def jacobiano_diferencias(f, y, a, h=1e-6):
+    n = len(y)
+    J = np.zeros((n, n))
+    for j in range(n):
+        dy = np.zeros(n)
+        dy[j] = h
+        J[:, j] = (f(0.0, y + dy, a) - f(0.0, y - dy, a)) / (2 * h)
+    return J
+
+
+@pytest.mark.parametrize("claves", [
+    {"nodos": 6, "topologia": "anillo", "k": 1, "acoplamiento": "x"},
+    {"nodos": 6, "topologia": "anillo", "k": 2, "acoplamiento": "x,y", "normalizar": True},
+    # 60 variables: jacobiano disperso
+    {"nodos": 20, "topologia": "aleatoria", "p": 0.3, "acoplamiento": "y"},
+])
+def test_jacobiano_frente_a_diferencias(claves):
+    sistema = red(**claves)
+    assert sistema.disperso == (claves["nodos"] * 3 >= network.N_MIN_DISPERSO)
+    y = np.random.default_rng(0).uniform(-3, 3, len(sistema.var_names))
+    J = sistema.jac(0.0, y, 0.8)
+    J = J.toarray() if hasattr(J, "toarray") else J
+    np.testing.assert_allclose(J, jacobiano_diferencias(sistema, y, 0.8), rtol=1e-6, atol=1e-6)
+    # Todo lo no nulo está en el patrón de dispersión
+    assert np.all(sistema.sparsity.toarray()[J != 0] == 1)
+
+
+def test_rhs_vectorizado_por_columnas():
+    sistema = red(nodos=5, k=1)
+    Y = np.random.default_rng(1).uniform(-3, 3, (15, 4))
+    a = np.array([0.0, 0.5, 1.0, 2.0])
+    F = sistema(0.0, Y, a)
+    for j in range(4):
+        np.testing.assert_allclose(F[:, j], sistema(0.0, Y[:, j], a[j]), rtol=1e-12)
+
+
+def test_anillo():
+    A = network.adyacencia(dict(network.RED_DEFECTO, nodos=6, k=2))
+    assert A.sum(axis=1).tolist() == [[4]] * 6
+    assert (A != A.T).nnz == 0
+    L = network.laplaciano(A, normalizar=True)
+    np.testing.assert_allclose(L.sum(axis=1), 0, atol=1e-12)
+    np.testing.assert_allclose(L.diagonal(), 1.0)
+
+
+def test_dos_nodos_completa_igual_que_el_par():
+    sistema = red(nodos=2, topologia="completa", acoplamiento="x")
+    entorno = {"np": np}
+    exec(PAR, entorno)
+    par = entorno["sistema_dinamico"]
+    rng = np.random.default_rng(2)
+    for _ in range(10):
+        y, a = rng.uniform(-5, 5, 6), rng.uniform(0, 3)
+        np.testing.assert_allclose(sistema(0.0, y, a), par(0.0, y, a), rtol=1e-12, atol=1e-12)
+
+    y0 = [1.0, 1.0, 1.0, -1.0, 2.0, 3.0]
+    t_eval = np.linspace(0, 20, 201)
+    ref = solve_ivp(par, (0, 20), y0, args=(0.3,), t_eval=t_eval, rtol=1e-10, atol=1e-12)
+    sol = solve_ivp(sistema, (0, 20), y0, args=(0.3,), t_eval=t_eval, rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(sol.y, ref.y, rtol=1e-6, atol=1e-6)
+
+
+def test_info_de_red(tmp_path):
+    subdir = str(tmp_path / "x1-x2")
+    claves = {"nodos": 2, "topologia": "completa", "acoplamiento": "x"}
+    network.escribir_info(subdir, "x1 - x2", 0.0, 1.0, 0.5, ROSSLER, claves,
+                          [1.0, 1.0, 1.0, -1.0, 2.0, 3.0])
+    _, _, _, _, eq_code, init_values = parse_info_file(os.path.join(subdir, "info.txt"))
+    assert network.es_red(eq_code)
+    assert init_values == [1.0, 1.0, 1.0, -1.0, 2.0, 3.0]
+    sistema = compilar_sistema(eq_code)
+    assert isinstance(sistema, network.RedCompilada)
+    assert sistema.var_names == ["x1", "y1", "z1", "x2", "y2", "z2"]
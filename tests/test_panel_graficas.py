@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("PyQt6")
+pytest.importorskip("matplotlib")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from scipy.integrate import solve_ivp
+
+from clases import panel_graficas
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture(params=["pyqtgraph", "matplotlib"])
+def panel(request, app, monkeypatch):
+    if request.param == "pyqtgraph":
+        if panel_graficas.pg is None:
+            pytest.skip("pyqtgraph no está instalado")
+    else:
+        # Respaldo sin pyqtgraph
+        monkeypatch.setattr(panel_graficas, "pg", None)
+    return panel_graficas.PanelGraficas()
+
+
+def lorenz(t, y):
+    x, v, z = y
+    return [10.0 * (v - x), x * (28.0 - z) - v, x * v - 8.0 / 3.0 * z]
+
+
+def test_plot_simulation_batch(panel):
+    sol = solve_ivp(lorenz, (0.0, 1.0), [1.0, 1.0, 1.0])
+    panel.plot_simulation_batch([sol, sol])
+    assert len(panel.results) == 2
+    # Menos series que antes: las sobrantes se vacían
+    panel.plot_simulation_batch(sol)
+    assert len(panel.results) == 1
+
+
+def test_plot_mapa(panel):
+    a_values = np.arange(0.0, 1.0, 0.25)
+    p_values = np.arange(0.0, 0.6, 0.2)
+    matriz = np.full((len(p_values), len(a_values)), np.nan)
+    matriz[:, :2] = [[1e-3, 1e-1]] * len(p_values)
+    panel.plot_mapa(a_values, p_values, matriz, "p2", "x1-x2")
+    panel.plot_mapa(a_values, p_values, np.full_like(matriz, np.nan))
+    assert panel.mapa is not None
+
+
+def test_plot_msf(panel):
+    alfas = np.linspace(0.0, 5.0, 11)
+    panel.plot_msf(alfas, np.sin(alfas))
+    panel.plot_msf(alfas, np.cos(alfas))
+    assert panel.grafica_msf is not None
@@ -0,0 +1,55 @@
+import threading
+
+from clases import profiling
+
+
+def test_etapa_y_contexto():
+    tiempos = profiling.activar(profiling.TiemposEtapas(eventos=True))
+    try:
+        with profiling.contexto(restas="x1 - x2"):
+            with profiling.etapa("integracion", a=0.5) as datos:
+                datos["nfev"] = 10
+        with profiling.etapa("escritura"):
+            pass
+    finally:
+        assert profiling.desactivar() is tiempos
+    assert profiling.activo() is None
+    assert tiempos.llamadas == {"integracion": 1, "escritura": 1}
+    assert tiempos.eventos[0]["restas"] == "x1 - x2"
+    assert tiempos.eventos[0]["nfev"] == 10
+    assert "restas" not in tiempos.eventos[1]
+
+
+def test_perfil_activo_por_hilo():
+    tiempos = profiling.activar(profiling.TiemposEtapas(eventos=True))
+    dentro = threading.Event()
+    seguir = threading.Event()
+    visto = []
+
+    def otro_hilo():
+        # Lo que mide otro hilo no va al perfil de este
+        visto.append(profiling.activo())
+        with profiling.etapa("compilacion"):
+            pass
+        propio = profiling.activar(profiling.TiemposEtapas(eventos=True))
+        with profiling.contexto(restas="otro"):
+            dentro.set()
+            seguir.wait(5)
+            with profiling.etapa("compilacion"):
+                pass
+        visto.append(profiling.desactivar() is propio)
+
+    try:
+        hilo = threading.Thread(target=otro_hilo)
+        hilo.start()
+        dentro.wait(5)
+        with profiling.contexto(restas="barrido"):
+            seguir.set()
+            with profiling.etapa("integracion"):
+                pass
+        hilo.join(5)
+    finally:
+        profiling.desactivar()
+    assert visto == [None, True]
+    assert tiempos.llamadas == {"integracion": 1}
+    assert [e["restas"] for e in tiempos.eventos] == ["barrido"]
@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+
+from clases import checkpoint, result_store
+
+A_START, A_STOP, A_STEP = 0.0, 2.5, 0.5
+N_VENTANAS = 3
+
+
+def bloques(a_values):
+    return [(a, np.array([a + 1.0, np.nan, a + 2.0]), []) for a in a_values]
+
+
+def leer(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def anexar_csv(subdir, a_values):
+    checkpoint.anexar(checkpoint.ruta_diario(subdir), os.path.join(subdir, "log.csv"),
+                      os.path.join(subdir, "eventos.csv"), bloques(a_values), A_START, A_STEP)
+
+
+def anexar_npy(subdir, a_values):
+    almacen = result_store.AlmacenResultados.crear(subdir, A_START, A_STOP, A_STEP, N_VENTANAS)
+    checkpoint.anexar(checkpoint.ruta_diario(subdir, formato="npy"), None,
+                      os.path.join(subdir, "eventos.csv"), bloques(a_values),
+                      A_START, A_STEP, almacen)
+
+
+def test_almacen_filas_completas(tmp_path):
+    subdir = str(tmp_path)
+    anexar_npy(subdir, [0.0, 1.0])
+    a_values, matriz, completos = result_store.leer(subdir)
+    assert np.allclose(a_values, np.arange(A_START, A_STOP, A_STEP))
+    assert completos.tolist() == [True, False, True, False, False]
+    assert np.array_equal(matriz[2], [2.0, np.nan, 3.0], equal_nan=True)
+    assert np.all(np.isnan(matriz[1]))
+    assert result_store.metricas(subdir, "", A_START, A_STEP) == {0: 1.5, 2: 2.5}
+
+
+def test_npy_a_csv_igual_que_log(tmp_path):
+    csv_dir, npy_dir = str(tmp_path / "csv"), str(tmp_path / "npy")
+    os.makedirs(csv_dir)
+    os.makedirs(npy_dir)
+    anexar_csv(csv_dir, [0.0, 0.5, 2.0])
+    anexar_npy(npy_dir, [0.0, 0.5, 2.0])
+
+    destino = result_store.npy_a_csv(npy_dir)
+    assert leer(destino) == leer(os.path.join(csv_dir, "log.csv"))
+    # Sin diario csv: se regenera desde el nuevo log.csv
+    diario = checkpoint.ruta_diario(npy_dir)
+    assert not os.path.exists(diario)
+    assert checkpoint.reparar(diario, destino, os.path.join(npy_dir, "eventos.csv"),
+                              A_START, A_STEP) == {0, 1, 4}
+
+
+def test_csv_a_npy_ida_y_vuelta(tmp_path):
+    subdir = str(tmp_path)
+    anexar_csv(subdir, [0.5, 1.5])
+    original = leer(os.path.join(subdir, "log.csv"))
+
+    result_store.csv_a_npy(subdir, A_START, A_STOP, A_STEP, N_VENTANAS)
+    assert result_store.existe(subdir)
+    assert checkpoint.completados(checkpoint.ruta_diario(subdir, formato="npy")) == {1, 3}
+    # Las ventanas NaN no están en log.csv: los valores quedan al principio
+    _, matriz, _ = result_store.leer(subdir)
+    assert np.array_equal(matriz[1], [1.5, 2.5, np.nan], equal_nan=True)
+
+    destino = result_store.npy_a_csv(subdir, os.path.join(subdir, "copia.csv"))
+    assert leer(destino) == original
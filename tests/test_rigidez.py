@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from clases import rigidez
+
+
+def oscilador(t, y, a):
+    return [y[1], -y[0] - 0.1 * y[1]]
+
+
+def rigido(t, y, a):
+    return [-a * (y[0] - np.cos(t)), -y[1]]
+
+
+def sondear(fun, a):
+    return rigidez.sondear(fun, 0.0, [1.0, 0.0], (a,),
+                           {"method": "RK45", "rtol": 1e-6, "atol": 1e-9},
+                           {"method": "LSODA", "rtol": 1e-6, "atol": 1e-9},
+                           t_sonda=5.0, umbral=200.0)
+
+
+def test_sondear_elige_rk45_si_no_es_rigido():
+    metodo, ritmo = sondear(oscilador, 0.0)
+    assert metodo == "RK45"
+    assert ritmo <= 200.0
+
+
+def test_sondear_elige_rigido():
+    metodo, ritmo = sondear(rigido, 1e5)
+    assert metodo == "LSODA"
+    assert ritmo > 200.0
+
+
+def test_anexar_y_leer(tmp_path):
+    path = rigidez.ruta(str(tmp_path))
+    rigidez.anexar(path, [(0.0, "RK45", 10.0), (1.0, "LSODA", 900.0)])
+    # Al reanudar puede repetirse un 'a': vale la última línea
+    rigidez.anexar(path, [(1.0, "RK45", 50.0)])
+    assert rigidez.leer(path) == {0.0: ("RK45", 10.0), 1.0: ("RK45", 50.0)}
+    # Corte a mitad de una línea
+    with open(path, "ab") as f:
+        f.write(b"2.0,LSO")
+    rigidez.anexar(path, [(2.0, "LSODA", 700.0)])
+    assert rigidez.leer(path)[2.0] == ("LSODA", 700.0)
+
+
+def test_fijar_y_leer_fijado(tmp_path):
+    base = str(tmp_path)
+    assert rigidez.leer_fijado(base) == {}
+    rigidez.fijar(base, "BDF", rtol=1e-6, atol=None, otra=1)
+    assert rigidez.leer_fijado(base) == {"method": "BDF", "rtol": 1e-6}
+    rigidez.fijar(base, None)
+    assert rigidez.leer_fijado(base) == {}
+
+    with open(rigidez.ruta_fijado(base), "w", encoding="utf-8") as f:
+        f.write('{"method": "BDF", "max_step": 1}')
+    with pytest.raises(ValueError):
+        rigidez.leer_fijado(base)
+
+
+def van_der_pol(t, y, mu):
+    return [y[1], mu * (1 - y[0] ** 2) * y[1] - y[0]]
+
+
+@pytest.mark.parametrize("rigido", rigidez.RIGIDOS)
+def test_van_der_pol_rigido_elige_implicito(rigido):
+    elegidos = set()
+    for _ in range(3):
+        metodo, ritmo = rigidez.sondear(van_der_pol, 0.0, [2.0, 0.0], (1000.0,),
+                                        {"method": "RK45", "rtol": 1e-6, "atol": 1e-9},
+                                        {"method": rigido, "rtol": 1e-6, "atol": 1e-9},
+                                        t_sonda=10.0, umbral=1000.0)
+        elegidos.add((metodo, ritmo))
+    # Sin tiempos de reloj: siempre lo mismo
+    assert elegidos == {(rigido, ritmo)}
+    assert ritmo > 1000.0
+
+
+def test_van_der_pol_no_rigido_elige_rk45():
+    metodo, _ = rigidez.sondear(van_der_pol, 0.0, [2.0, 0.0], (1.0,),
+                                {"method": "RK45", "rtol": 1e-6, "atol": 1e-9},
+                                {"method": "Radau", "rtol": 1e-6, "atol": 1e-9},
+                                t_sonda=10.0, umbral=1000.0)
+    assert metodo == "RK45"
@@ -0,0 +1,37 @@
+import numpy as np
+
+from clases import streaming
+
+
+def test_maximo_por_ventana():
+    reductor = streaming.MaximoPorVentana([0.0, 1.0, 2.0, 3.0], 2)
+    t = np.array([0.0, 0.5, 1.5, 3.0])
+    reductor.actualizar(t, np.array([[1.0, 3.0, 2.0, 5.0], [0.0, 0.0, 1.0, 0.0]]))
+    # La ventana central no tiene muestras; el último borde va a la última
+    resultado = reductor.resultado()
+    assert np.array_equal(resultado, [[3.0, 2.0, 5.0], [0.0, 1.0, 0.0]], equal_nan=True)
+
+
+def test_rms_e_histograma_en_tramos():
+    d = np.abs(np.random.default_rng(0).normal(size=(2, 100)))
+    t = np.arange(100.0)
+    rms, hist = streaming.RMSEnLinea(2), streaming.Histograma(2)
+    for tramo in (slice(0, 40), slice(40, 100)):
+        rms.actualizar(t[tramo], d[:, tramo])
+        hist.actualizar(t[tramo], d[:, tramo])
+    np.testing.assert_allclose(rms.resultado(), np.sqrt(np.mean(d ** 2, axis=1)))
+    assert hist.resultado().sum(axis=1).tolist() == [100, 100]
+
+
+def test_anexar_estadisticas_tras_corte(tmp_path):
+    path = streaming.ruta_estadisticas(str(tmp_path))
+    cuentas = np.zeros(streaming.HIST_BINS, dtype=int)
+    streaming.anexar_estadisticas(path, [(0.0, 1.5, cuentas)])
+    # Corte a mitad de la línea del siguiente 'a'
+    with open(path, "ab") as f:
+        f.write(b'{"a": 0.5, "rms": 0.')
+    streaming.anexar_estadisticas(path, [(0.5, 2.5, cuentas + 1)])
+    estadisticas = streaming.leer_estadisticas(path)
+    assert sorted(estadisticas) == [0.0, 0.5]
+    assert estadisticas[0.5]["rms"] == 2.5
+    assert estadisticas[0.5]["hist"] == [1] * streaming.HIST_BINS
@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pytest
+
+from clases import sweep2d
+
+
+def leer(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_sustituir_parametro():
+    codigo = "def f(t, variables, a):\n    x, = variables\n    return [b*x - a]"
+    assert "2.5 * x" in sweep2d.sustituir_parametro(codigo, "b", 2.5)
+    with pytest.raises(ValueError):
+        sweep2d.sustituir_parametro(codigo, "c", 1.0)
+
+
+def test_teselas_cubren_la_rejilla():
+    cuentas = np.zeros((5, 7), dtype=int)
+    for p0, p1, a0, a1 in sweep2d.teselas(5, 7, 2, 3):
+        cuentas[p0:p1, a0:a1] += 1
+    assert np.all(cuentas == 1)
+
+
+def test_reanudar_mapa(tmp_path):
+    subdir = str(tmp_path)
+    a_values, p_values = np.arange(0.0, 1.0, 0.25), np.arange(0.0, 0.3, 0.1)
+    mapa = sweep2d.Mapa2D.abrir_o_crear(subdir, a_values, p_values, "b")
+    mapa.escribir((0, 2, 0, 2), np.ones((2, 2)))
+    del mapa
+
+    mapa = sweep2d.Mapa2D.abrir_o_crear(subdir, a_values, p_values, "b")
+    assert mapa.hechas().sum() == 4
+    assert np.array_equal(mapa.matriz[:2, :2], np.ones((2, 2)))
+
+
+@pytest.mark.parametrize("cambio", ["a", "p2", "nombre"])
+def test_no_sobrescribe_mapa_de_otras_rejillas(tmp_path, cambio):
+    subdir = str(tmp_path)
+    a_values, p_values = np.arange(0.0, 1.0, 0.25), np.arange(0.0, 0.3, 0.1)
+    mapa = sweep2d.Mapa2D.abrir_o_crear(subdir, a_values, p_values, "b")
+    mapa.escribir((0, 1, 0, 4), np.full((1, 4), 3.0))
+    del mapa
+    npy_path, _, diario = sweep2d.rutas(subdir)
+    antes = [leer(p) for p in (npy_path, diario)]
+
+    otros = {"a": (np.arange(0.0, 2.0, 0.25), p_values, "b"),
+             "p2": (a_values, np.arange(0.0, 0.3, 0.05), "b"),
+             "nombre": (a_values, p_values, "c")}[cambio]
+    with pytest.raises(ValueError, match="otro barrido"):
+        sweep2d.Mapa2D.abrir_o_crear(subdir, *otros)
+    assert [leer(p) for p in (npy_path, diario)] == antes
+    assert os.path.exists(diario)